@@ -6,8 +6,12 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from inventory.app.auth import login, check_authentication
-from inventory.app.pages import equipment, users, reports, qr_scanner, equipment_details
-from inventory.utils.constants import APP_TITLE, DELL_BLUE, DELL_DARK, DELL_DARK_SECONDARY
+from inventory.app.pages import PAGES, load_page
+from inventory.app.style import APP_STYLE
+from inventory.utils.constants import APP_TITLE
+from inventory.utils.overdue import start_overdue_scanner
+from inventory.utils.email_outbox import start_email_worker
+from inventory.utils.database import begin_request
 
 def main():
     st.set_page_config(
@@ -17,74 +21,17 @@ def main():
         initial_sidebar_state="expanded",
     )
     
+    # Share table reads between everything that runs in this rerun
+    begin_request()
+    
+    # Keep the overdue and due-soon buckets current in the background
+    start_overdue_scanner()
+    
+    # Deliver queued emails without blocking page scripts
+    start_email_worker()
+    
     # Apply Dell corporate styling with dark mode
-    st.markdown(
-        f"""
-        <style>
-        .reportview-container .main .block-container{{
-            max-width: 1200px;
-        }}
-        .stApp {{
-            background-color: {DELL_DARK};
-            color: white;
-        }}
-        .stButton>button {{
-            background-color: {DELL_BLUE};
-            color: white;
-        }}
-        /* Sidebar styling */
-        section[data-testid="stSidebar"] {{
-            background-color: {DELL_DARK_SECONDARY};
-            color: white;
-        }}
-        /* Card/container styling */
-        div.stTabs [data-baseweb="tab-panel"] {{
-            background-color: {DELL_DARK_SECONDARY};
-            padding: 15px;
-            border-radius: 5px;
-        }}
-        div.stTabs [data-baseweb="tab-list"] {{
-            background-color: {DELL_DARK};
-        }}
-        div.stTabs [data-baseweb="tab-border"] {{
-            background-color: {DELL_BLUE};
-        }}
-        div.stTabs [data-baseweb="tab"] {{
-            color: white;
-        }}
-        div.stTabs [data-baseweb="tab-highlight"] {{
-            background-color: {DELL_BLUE};
-        }}
-        div[data-testid="stForm"] {{
-            background-color: {DELL_DARK_SECONDARY};
-            padding: 15px;
-            border-radius: 5px;
-        }}
-        /* Text inputs */
-        div[data-baseweb="input"] {{
-            background-color: {DELL_DARK};
-        }}
-        div[data-baseweb="input"] input {{
-            color: white !important;
-        }}
-        /* Select inputs */
-        div[data-baseweb="select"] {{
-            background-color: {DELL_DARK};
-        }}
-        div[data-baseweb="select"] [data-testid="stMarkdownContainer"] {{
-            color: white;
-        }}
-        /* DataFrames */
-        .stDataFrame {{
-            background-color: {DELL_DARK_SECONDARY};
-        }}
-        .dataframe {{
-            color: white;
-        }}
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(APP_STYLE, unsafe_allow_html=True)
 
     if not check_authentication():
         login()
@@ -92,15 +39,7 @@ def main():
         # Display main navigation in sidebar
         st.sidebar.title("Lab Inventory")
         # Main navigation options without Equipment Details page
-        selection = st.sidebar.radio(
-            "Go to",
-            [
-                "Equipment",
-                "Users",
-                "Reports",
-                "QR Scanner",
-            ]
-        )
+        selection = st.sidebar.radio("Go to", list(PAGES))
         
         # Display user info and logout option in the sidebar
         st.sidebar.markdown("---")
@@ -124,19 +63,12 @@ def main():
         # Check if we should display equipment details instead of regular routing
         if "selected_equipment_sku" in st.session_state and st.session_state.get("show_equipment_details", False):
             # Show equipment details page
-            equipment_details.show()
+            load_page("Equipment Details").show()
             # Reset the flag after showing
             st.session_state.show_equipment_details = False
         else:
-            # Route to the appropriate page based on sidebar selection
-            if selection == "Equipment":
-                equipment.show()
-            elif selection == "Users":
-                users.show()
-            elif selection == "Reports":
-                reports.show()
-            elif selection == "QR Scanner":
-                qr_scanner.show()
+            # Route to the page selected in the sidebar, importing it on first use
+            load_page(selection).show()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
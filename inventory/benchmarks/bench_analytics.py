@@ -0,0 +1,102 @@
+"""Checkout-history analytics against the row loop they replaced
+
+Usage: python benchmarks/bench_analytics.py [--rows N] [--days N]
+
+Builds a checkout history of N rows (default 100,000) spread over a
+year and computes the mean checkout duration for the last --days days,
+once with the original iterrows()/strptime() loop over the whole table
+and once with the analytics module: cold (read from SQLite) and warm
+(served from the table cache).
+"""
+import sys
+import random
+import argparse
+import datetime
+from common import use_temp_data_dir, timed
+
+ITEMS = 1000
+USERS = 50
+
+def add_history(db, rows):
+    """Add ``rows`` returned checkouts of ITEMS items over the last year"""
+    rng = random.Random(0)
+    today = datetime.date.today()
+    now = datetime.datetime.now().isoformat()
+    
+    with db.bulk_equipment_insert():
+        skus = db.allocate_skus(ITEMS)
+        db.add_equipment_rows(
+            ("sku", "name", "category", "status", "created_at", "updated_at"),
+            ((sku, f"Item {i}", f"Category {i % 10}", "In Stock", now, now) for i, sku in enumerate(skus))
+        )
+    
+    history = []
+    for _ in range(rows):
+        checkout = today - datetime.timedelta(days=rng.randrange(365))
+        due = checkout + datetime.timedelta(days=14)
+        returned = checkout + datetime.timedelta(days=rng.randrange(1, 30))
+        history.append((rng.choice(skus), "Item", f"user{rng.randrange(USERS)}", checkout.isoformat(), due.isoformat(), returned.isoformat()))
+    
+    with db.transaction("checkout_history") as conn:
+        conn.executemany('''
+        INSERT INTO checkout_history (sku, equipment_name, user, checkout_date, due_date, return_date)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', history)
+
+def loop_mean_duration(db, start_date, end_date):
+    """The original report: load everything, filter in pandas, loop over rows"""
+    history_df = db.get_checkout_history()
+    start_date_str = start_date.strftime("%Y-%m-%d")
+    end_date_str = end_date.strftime("%Y-%m-%d")
+    filtered_history = history_df[
+        (history_df["checkout_date"] >= start_date_str) &
+        (history_df["checkout_date"] <= end_date_str)
+    ]
+    filtered_history_with_return = filtered_history[filtered_history["return_date"].notna()]
+    
+    checkout_durations = []
+    for _, row in filtered_history_with_return.iterrows():
+        checkout_date = datetime.datetime.strptime(row["checkout_date"], "%Y-%m-%d")
+        return_date = datetime.datetime.strptime(row["return_date"], "%Y-%m-%d")
+        checkout_durations.append((return_date - checkout_date).days)
+    return sum(checkout_durations) / len(checkout_durations)
+
+def vectorized_mean_duration(analytics, start_date, end_date):
+    """The analytics module: window in SQL, durations as column operations"""
+    history = analytics.load_history_window(start_date, end_date)
+    return analytics.duration_summary(history)["mean_days"]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark checkout-history analytics")
+    parser.add_argument("--rows", type=int, default=100_000, help="checkout history rows to generate")
+    parser.add_argument("--days", type=int, default=365, help="length of the reported date window")
+    parser.add_argument("--repeat", type=int, default=3, help="runs timed per variant")
+    args = parser.parse_args(argv)
+    
+    use_temp_data_dir()
+    from inventory.utils import database as db
+    from inventory.utils import analytics
+    
+    add_history(db, args.rows)
+    end_date = datetime.date.today()
+    start_date = end_date - datetime.timedelta(days=args.days - 1)
+    
+    loop_mean = loop_mean_duration(db, start_date, end_date)
+    vectorized_mean = vectorized_mean_duration(analytics, start_date, end_date)
+    
+    def cold():
+        db.clear_data_cache()
+        vectorized_mean_duration(analytics, start_date, end_date)
+    
+    loop = timed(lambda: loop_mean_duration(db, start_date, end_date), args.repeat)
+    vectorized_cold = timed(cold, args.repeat)
+    vectorized_warm = timed(lambda: vectorized_mean_duration(analytics, start_date, end_date), args.repeat)
+    
+    print(f"{args.rows:,} history rows, {args.days}-day window, median of {args.repeat}")
+    print(f"iterrows/strptime loop   {loop * 1e3:8.0f}ms  mean {loop_mean:.3f} days")
+    print(f"vectorized, cold         {vectorized_cold * 1e3:8.0f}ms  mean {vectorized_mean:.3f} days")
+    print(f"vectorized, warm         {vectorized_warm * 1e3:8.0f}ms")
+    return 0 if abs(loop_mean - vectorized_mean) < 1e-9 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
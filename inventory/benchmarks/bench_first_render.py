@@ -0,0 +1,85 @@
+"""Time to first render of the login and Equipment pages in a fresh process
+
+Usage: python benchmarks/bench_first_render.py [--items N] [--repeat N]
+
+Each measurement starts a new interpreter and renders the page once with
+Streamlit's AppTest, so it includes importing the app and its pages. It
+also lists which heavy libraries the first render loaded.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from common import APP_DIR, use_temp_data_dir
+
+# Libraries that should only load on pages that need them. numpy is not
+# listed: pandas always imports it.
+HEAVY_MODULES = ("matplotlib", "PIL")
+
+RENDER_PAGE = """
+import json, sys, time
+sys.path.insert(0, {app_dir!r})
+from streamlit.testing.v1 import AppTest
+
+app = AppTest.from_file({app_file!r}, default_timeout=120)
+if {logged_in!r}:
+    app.session_state.authenticated = True
+    app.session_state.username = "admin"
+    app.session_state.user_role = "admin"
+start = time.perf_counter()
+app.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "errors": [str(e.value) for e in app.exception],
+    "loaded": [module for module in {heavy!r} if module in sys.modules],
+}}))
+"""
+
+def render(logged_in):
+    """Render the login page, or the Equipment page when logged in, in a new interpreter"""
+    code = RENDER_PAGE.format(
+        app_dir=APP_DIR, app_file=os.path.join(APP_DIR, "app.py"),
+        logged_in=logged_in, heavy=HEAVY_MODULES
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def add_items(count):
+    """Add ``count`` items so the Equipment page has a list to show"""
+    from inventory.utils import database as db
+    
+    with db.bulk_equipment_insert():
+        skus = db.allocate_skus(count)
+        db.add_equipment_rows(
+            ("sku", "name", "status", "created_at", "updated_at"),
+            ((sku, f"Item {i}", "In Stock", "2026-01-01", "2026-01-01") for i, sku in enumerate(skus))
+        )
+    db.close_db_connections()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure time to first render of the app")
+    parser.add_argument("--items", type=int, default=5000, help="equipment rows in the database")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh processes per page")
+    args = parser.parse_args(argv)
+    
+    # The pages find the database in the working directory
+    use_temp_data_dir()
+    add_items(args.items)
+    
+    failed = False
+    print(f"{args.items:,} items, median of {args.repeat} fresh processes")
+    for page, logged_in in (("Login", False), ("Equipment", True)):
+        results = [render(logged_in) for _ in range(args.repeat)]
+        seconds = statistics.median(result["seconds"] for result in results)
+        errors = results[-1]["errors"]
+        print(f"{page:10} {seconds * 1e3:7.0f}ms  loaded: {', '.join(results[-1]['loaded']) or 'none'}")
+        if errors:
+            print(f"  errors: {errors}")
+            failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
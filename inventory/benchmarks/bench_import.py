@@ -0,0 +1,108 @@
+"""Bulk equipment import of a large CSV file
+
+Usage: python benchmarks/bench_import.py [--rows N] [--keep-triggers]
+
+Writes a CSV file of N rows (default 100,000), one in a hundred of them
+invalid, and times a dry run and the import itself. Fails if the import
+leaves the search index or the summary tables out of step with the
+equipment. With --keep-triggers the import also runs once more with the
+per-row index and summary triggers left in place, as before imports
+deferred them; that takes much longer.
+"""
+import sys
+import time
+import sqlite3
+import random
+import argparse
+from contextlib import contextmanager
+import pandas as pd
+from common import use_temp_data_dir
+
+CATEGORIES = ("Microscope", "Centrifuge", "Pipette", "Oscilloscope", "Spectrometer")
+MANUFACTURERS = ("Acme", "Zeiss", "Fluke", "Thermo", "Olympus")
+
+def write_import_file(path, count):
+    """Write ``count`` import rows; every hundredth has a bad date"""
+    rng = random.Random(0)
+    rows = []
+    for i in range(count):
+        category = rng.choice(CATEGORIES)
+        rows.append({
+            "Name": f"{category} model {i}",
+            "Description": f"A {category.lower()} for the teaching labs",
+            "Category": category,
+            "Manufacturer": rng.choice(MANUFACTURERS),
+            "Serial Number": f"SN-{i:07d}",
+            "Purchase Date": "2024-13-01" if i % 100 == 99 else f"2024-{i % 12 + 1:02d}-15",
+            "Purchase Price": f"{rng.uniform(50, 5000):.2f}",
+            "Status": "In Stock",
+        })
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+def timed_import(bulk_import, path, dry_run=False):
+    start = time.perf_counter()
+    result = bulk_import.import_equipment(path, dry_run=dry_run)
+    return time.perf_counter() - start, result
+
+@contextmanager
+def triggers_kept(db, bulk_import):
+    """Import through a plain transaction, so every row fires the triggers"""
+    @contextmanager
+    def plain_transaction():
+        with db.transaction("equipment") as conn:
+            yield conn
+    
+    original = bulk_import.bulk_equipment_insert
+    bulk_import.bulk_equipment_insert = plain_transaction
+    try:
+        yield
+    finally:
+        bulk_import.bulk_equipment_insert = original
+
+def consistency_problems(db):
+    """Describe any difference between the equipment and its index or summaries"""
+    conn = db.get_db_connection()
+    problems = [f"summary table {table} is out of step" for table in db.check_summary_tables()]
+    indexed = conn.execute("SELECT COUNT(*) FROM equipment_fts").fetchone()[0]
+    rows = conn.execute("SELECT COUNT(*) FROM equipment").fetchone()[0]
+    if indexed != rows:
+        problems.append(f"search index has {indexed} rows for {rows} items")
+    try:
+        conn.execute("INSERT INTO equipment_fts (equipment_fts, rank) VALUES ('integrity-check', 1)")
+    except sqlite3.DatabaseError as e:
+        problems.append(f"search index integrity check failed: {e}")
+    return problems
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the bulk equipment import")
+    parser.add_argument("--rows", type=int, default=100_000, help="rows in the import file")
+    parser.add_argument("--keep-triggers", action="store_true", help="also time the import with per-row triggers")
+    args = parser.parse_args(argv)
+    
+    use_temp_data_dir()
+    from inventory.utils import database as db, bulk_import
+    
+    write_import_file("equipment.csv", args.rows)
+    db.ensure_initialized()
+    
+    print(f"{args.rows:,} rows")
+    seconds, result = timed_import(bulk_import, "equipment.csv", dry_run=True)
+    print(f"dry run        {seconds:6.2f}s  {result['invalid_rows']:,} invalid rows")
+    seconds, result = timed_import(bulk_import, "equipment.csv")
+    print(f"import         {seconds:6.2f}s  {result['imported']:,} rows, {result['imported'] / seconds:,.0f} rows/s")
+    
+    problems = consistency_problems(db)
+    
+    if args.keep_triggers:
+        with db.transaction("equipment") as conn:
+            conn.execute("DELETE FROM equipment")
+        with triggers_kept(db, bulk_import):
+            seconds, result = timed_import(bulk_import, "equipment.csv")
+        print(f"with triggers  {seconds:6.2f}s  {result['imported']:,} rows, {result['imported'] / seconds:,.0f} rows/s")
+    
+    for problem in problems:
+        print(f"  {problem}")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Full-text equipment search against the LIKE scan it replaces
+
+Usage: python benchmarks/bench_search.py [--items N] [--repeat N]
+
+Builds an equipment table of N items (default 100,000) in a temporary
+database and times one page of results for each search term, through
+the FTS5 index and through the LIKE scan, both for the first page and
+for a page deep into the results. Fails if a full-text search of the
+broad term misses the target time.
+"""
+import sys
+import random
+import argparse
+import datetime
+from common import use_temp_data_dir, timed
+
+# Search terms, from very selective to matching a large share of items
+SEARCH_TERMS = ("LAB-01234", "model 4242", "Zeiss", "scope")
+BROAD_TERM = "scope"
+
+# Pages followed to time a deep page
+DEEP_PAGE = 20
+
+CATEGORIES = ("Microscope", "Centrifuge", "Pipette", "Oscilloscope", "Spectrometer")
+MANUFACTURERS = ("Acme", "Zeiss", "Fluke", "Thermo", "Olympus")
+
+def add_items(db, count):
+    """Add ``count`` items in one bulk insert"""
+    rng = random.Random(0)
+    now = datetime.datetime.now().isoformat()
+    columns = ("sku", "name", "description", "category", "manufacturer", "status", "created_at", "updated_at")
+    
+    with db.bulk_equipment_insert():
+        skus = db.allocate_skus(count)
+        rows = []
+        for i, sku in enumerate(skus):
+            category = rng.choice(CATEGORIES)
+            rows.append((
+                sku, f"{category} model {i}", f"A {category.lower()} for the teaching labs",
+                category, rng.choice(MANUFACTURERS), "In Stock", now, now
+            ))
+        db.add_equipment_rows(columns, rows)
+
+def deep_cursor(search, column):
+    """Follow the pages of a search and get the cursor of page DEEP_PAGE"""
+    cursor = None
+    for _ in range(DEEP_PAGE - 1):
+        page = search(cursor)
+        if page.empty:
+            break
+        cursor = page[column].iloc[-1]
+    return cursor
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark full-text equipment search")
+    parser.add_argument("--items", type=int, default=100_000, help="equipment rows to generate")
+    parser.add_argument("--repeat", type=int, default=20, help="searches timed per term")
+    parser.add_argument("--target-ms", type=float, default=10.0, help="time allowed for a page of the broad term")
+    args = parser.parse_args(argv)
+    
+    use_temp_data_dir()
+    from inventory.utils import database as db
+    
+    add_items(db, args.items)
+    db.get_db_connection().execute("ANALYZE")
+    
+    print(f"{args.items:,} items, one page of {db.LIST_PAGE_SIZE} results, median of {args.repeat}")
+    print(f"{'term':12} {'matches':>8} {'FTS5':>9} {f'page {DEEP_PAGE}':>9} {'LIKE':>9} {f'page {DEEP_PAGE}':>9}")
+    failed = False
+    for term in SEARCH_TERMS:
+        matches = db.get_db_connection().execute(
+            "SELECT COUNT(*) FROM equipment_fts WHERE equipment_fts MATCH ?", (db.full_text_query(term),)
+        ).fetchone()[0]
+        fts_cursor = deep_cursor(lambda cursor: db.search_equipment(term, after=cursor), "cursor")
+        like_cursor = deep_cursor(lambda cursor: db.query_equipment(search=term, after_sku=cursor), "sku")
+        fts = timed(lambda: db.search_equipment(term), args.repeat)
+        fts_deep = timed(lambda: db.search_equipment(term, after=fts_cursor), args.repeat)
+        like = timed(lambda: db.query_equipment(search=term), args.repeat)
+        like_deep = timed(lambda: db.query_equipment(search=term, after_sku=like_cursor), args.repeat)
+        print(
+            f"{term:12} {matches:8,} {fts * 1e3:7.1f}ms {fts_deep * 1e3:7.1f}ms "
+            f"{like * 1e3:7.1f}ms {like_deep * 1e3:7.1f}ms"
+        )
+        if term == BROAD_TERM and max(fts, fts_deep) * 1e3 > args.target_ms:
+            print(f"  full-text search of {term!r} is slower than {args.target_ms:g}ms")
+            failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
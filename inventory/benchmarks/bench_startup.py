@@ -0,0 +1,51 @@
+"""Import time of the app and the database module in a fresh process
+
+Usage: python benchmarks/bench_startup.py [--repeat N]
+
+Each measurement runs in a new interpreter, so nothing is cached in
+memory. Importing must not touch the disk: the benchmark fails if an
+import creates the data directory.
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+from common import APP_DIR, use_temp_data_dir
+
+# Modules timed, from the database layer up to the Streamlit entry point
+MODULES = ("inventory.utils.database", "inventory.app.auth", "app")
+
+MEASURE_IMPORT = """
+import sys, time
+sys.path.insert(0, {app_dir!r})
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+def import_time(module):
+    """Import ``module`` in a new interpreter and get the seconds it took"""
+    code = MEASURE_IMPORT.format(app_dir=APP_DIR, module=module)
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold import time of the app")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh processes per module")
+    args = parser.parse_args(argv)
+    
+    data_dir = os.path.join(use_temp_data_dir(), "data")
+    
+    print(f"{'module':28} {'median':>9} {'min':>9}")
+    for module in MODULES:
+        times = [import_time(module) for _ in range(args.repeat)]
+        print(f"{module:28} {statistics.median(times) * 1e3:7.0f}ms {min(times) * 1e3:7.0f}ms")
+    
+    if os.path.exists(data_dir):
+        print("Importing created the data directory; imports must not touch the disk")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
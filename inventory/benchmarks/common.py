@@ -0,0 +1,31 @@
+import os
+import sys
+import atexit
+import shutil
+import tempfile
+import statistics
+import time
+
+# Directory of app.py; the inventory package is imported from there as
+# app.py does
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+def use_temp_data_dir():
+    """Run in a new temporary directory, so the database is created in it
+    
+    The directory is removed when the process exits. Returns its path.
+    """
+    path = tempfile.mkdtemp(prefix="inventory-bench-")
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+    os.chdir(path)
+    return path
+
+def timed(function, repeat=5):
+    """Call ``function`` ``repeat`` times and get the median seconds per call"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
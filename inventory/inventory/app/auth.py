@@ -2,16 +2,14 @@ import streamlit as st
 import pandas as pd
 import hashlib
 import datetime
-import smtplib
 import sqlite3
 import base64
 import json
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 
-from ..utils.database import get_users, save_users, get_db_connection, hash_password
+from ..utils.database import get_users, save_users, get_db_connection, transaction, hash_password
 from ..utils.constants import DELL_BLUE, DELL_DARK, DELL_DARK_SECONDARY, ROLES
 from ..utils.cookies.cookies import set_cookie, get_cookie, delete_cookie
+from ..utils.email_outbox import enqueue_email
 
 # Cookie constants
 AUTH_COOKIE_NAME = "inventory_auth"
@@ -106,10 +104,8 @@ def authenticate(username, password):
             # Set authentication data
             set_auth_data(username, user['role'])
             
-            conn.close()
             return True
     
-    conn.close()
     st.session_state.login_error = "Invalid username or password"
     return False
 
@@ -169,8 +165,6 @@ def login():
                     cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
                     user = cursor.fetchone()
                     
-                    conn.close()
-                    
                     if user:
                         # In a real app, you would send an email with a reset link
                         st.session_state.reset_success = True
@@ -191,44 +185,24 @@ def login():
 
 def change_password(username, current_password, new_password):
     """Change a user's password"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Verify current password
-    cursor.execute("SELECT password FROM users WHERE username = ?", (username,))
-    user = cursor.fetchone()
-    
-    if not user or user['password'] != hash_password(current_password):
-        conn.close()
-        return False
-    
-    # Update password
-    hashed_new_password = hash_password(new_password)
-    cursor.execute("UPDATE users SET password = ? WHERE username = ?", (hashed_new_password, username))
-    conn.commit()
-    conn.close()
-    return True
+    with transaction("users") as conn:
+        cursor = conn.cursor()
+        
+        # Verify current password
+        cursor.execute("SELECT password FROM users WHERE username = ?", (username,))
+        user = cursor.fetchone()
+        
+        if not user or user['password'] != hash_password(current_password):
+            return False
+        
+        # Update password
+        hashed_new_password = hash_password(new_password)
+        cursor.execute("UPDATE users SET password = ? WHERE username = ?", (hashed_new_password, username))
+        return True
 
 def send_email(to_email, subject, body):
-    """Send an email (mock function - in production connect to SMTP server)"""
-    # This is a mock function - in production, connect to an SMTP server
-    st.success(f"Email would be sent to {to_email}")
-    st.info(f"Subject: {subject}")
-    st.info(f"Body: {body}")
-    
-    # Real implementation would be like:
-    """
-    sender_email = "your-email@example.com"
-    password = "your-email-password"
-    
-    message = MIMEMultipart()
-    message["From"] = sender_email
-    message["To"] = to_email
-    message["Subject"] = subject
-    
-    message.attach(MIMEText(body, "plain"))
-    
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-        server.login(sender_email, password)
-        server.sendmail(sender_email, to_email, message.as_string())
-    """
\ No newline at end of file
+    """Queue an email for the background worker; never blocks on SMTP"""
+    if enqueue_email(to_email, subject, body):
+        st.success(f"Email to {to_email} queued for delivery")
+    else:
+        st.info(f"The same email to {to_email} is already queued or was sent today")
\ No newline at end of file
@@ -0,0 +1,228 @@
+import streamlit as st
+import pandas as pd
+import datetime
+
+from ..utils.database import checkout_items, return_items, get_users, CartConflictError
+from ..utils.constants import EQUIPMENT_STATUS, DEFAULT_CHECKOUT_DAYS
+
+# Return conditions and the status each one puts the item in
+RETURN_CONDITIONS = {
+    "Good": EQUIPMENT_STATUS["in_stock"],
+    "Needs Maintenance": EQUIPMENT_STATUS["maintenance"],
+    # Still in stock but with damage noted
+    "Damaged": EQUIPMENT_STATUS["in_stock"],
+}
+
+def get_cart(name):
+    """Get the SKUs in a cart ("checkout" or "return"), kept across pages"""
+    return st.session_state.setdefault(f"{name}_cart_items", [])
+
+def get_cart_versions(name):
+    """Get the version of each item in a cart as read when it was added"""
+    return st.session_state.setdefault(f"{name}_cart_versions", {})
+
+def add_to_cart(name, sku, version=None):
+    """Add a SKU to a cart unless it is already there
+    
+    ``version`` is the equipment row version that was read; the cart is
+    only processed if the item has not changed since.
+    """
+    cart = get_cart(name)
+    if sku not in cart:
+        cart.append(sku)
+    if version is not None:
+        get_cart_versions(name)[sku] = int(version)
+
+def clear_cart(name):
+    """Empty a cart and forget its last conflicts"""
+    st.session_state[f"{name}_cart_items"] = []
+    st.session_state[f"{name}_cart_versions"] = {}
+    st.session_state.pop(f"{name}_cart_conflicts", None)
+
+def _sync_cart(name, versions):
+    """Copy the cart multiselect back into the cart after the user edits it"""
+    selected = list(st.session_state[f"{name}_cart_select"])
+    added = [sku for sku in selected if sku not in get_cart(name)]
+    st.session_state[f"{name}_cart_items"] = selected
+    for sku in added:
+        if sku in versions:
+            get_cart_versions(name)[sku] = int(versions[sku])
+
+def _add_scanned(name, labels, versions):
+    """Add the SKU typed or scanned into the cart's input box, then clear it"""
+    sku = st.session_state[f"{name}_cart_scan"].strip().upper()
+    st.session_state[f"{name}_cart_scan"] = ""
+    if not sku:
+        return
+    if sku in labels:
+        add_to_cart(name, sku, versions.get(sku))
+        st.session_state.pop(f"{name}_cart_scan_error", None)
+    else:
+        st.session_state[f"{name}_cart_scan_error"] = f"{sku} cannot be added to this cart."
+
+def _remove_conflicts(name):
+    """Drop the items of the last conflict report from the cart"""
+    conflicts = st.session_state.pop(f"{name}_cart_conflicts", {})
+    st.session_state[f"{name}_cart_items"] = [sku for sku in get_cart(name) if sku not in conflicts]
+
+def cart_picker(name, labels, versions):
+    """Let the user fill a cart by scanning SKUs or picking them from a list
+    
+    ``labels`` maps the SKU of every item that may go in the cart to the
+    text shown for it and ``versions`` to its current row version. Returns
+    the SKUs in the cart, in the order added.
+    """
+    st.text_input(
+        "Scan or enter SKU",
+        key=f"{name}_cart_scan",
+        on_change=_add_scanned,
+        args=(name, labels, versions),
+        placeholder="Press Enter to add each item"
+    )
+    scan_error = st.session_state.get(f"{name}_cart_scan_error")
+    if scan_error:
+        st.warning(scan_error)
+    
+    # The multiselect shows the cart; items that left the candidates (e.g.
+    # checked out elsewhere) stay in the cart so the conflict is reported
+    cart = get_cart(name)
+    options = list(labels) + [sku for sku in cart if sku not in labels]
+    st.session_state[f"{name}_cart_select"] = list(cart)
+    st.multiselect(
+        "Cart",
+        options=options,
+        format_func=lambda sku: labels.get(sku, sku),
+        key=f"{name}_cart_select",
+        on_change=_sync_cart,
+        args=(name, versions)
+    )
+    
+    return get_cart(name)
+
+def _show_outcome(name):
+    """Show the result of the last submit: a success message or the conflicts"""
+    message = st.session_state.pop(f"{name}_cart_message", None)
+    if message:
+        st.success(message)
+    
+    conflicts = st.session_state.get(f"{name}_cart_conflicts")
+    if conflicts:
+        st.error("Nothing was changed because some items cannot be processed:")
+        st.dataframe(
+            pd.DataFrame({"SKU": list(conflicts), "Problem": list(conflicts.values())}),
+            hide_index=True
+        )
+        st.button("Remove Conflicting Items", key=f"{name}_cart_remove_conflicts", on_click=_remove_conflicts, args=(name,))
+
+def checkout_cart_form(index):
+    """Collect in-stock items from the equipment index and check them all out at once"""
+    st.subheader("Checkout Cart")
+    _show_outcome("checkout")
+    
+    available = index.frame(index.skus(status=EQUIPMENT_STATUS["in_stock"]))
+    cart = cart_picker(
+        "checkout",
+        {sku: f"{sku} - {name}" for sku, name in zip(available["sku"], available["name"])},
+        dict(zip(available["sku"], available["version"]))
+    )
+    
+    if st.session_state.user_role == "admin":
+        # Admins can check out equipment for any user
+        usernames = get_users(columns=["username"])["username"].tolist()
+        checkout_user = st.selectbox(
+            "Checkout For",
+            options=usernames,
+            index=usernames.index(st.session_state.username) if st.session_state.username in usernames else 0,
+            key="checkout_cart_user"
+        )
+    else:
+        # Regular users can only check out for themselves
+        checkout_user = st.session_state.username
+        st.write(f"**Checkout For**: {checkout_user}")
+    
+    checkout_days = st.number_input(
+        "Checkout Duration (days)", min_value=1, max_value=180, value=DEFAULT_CHECKOUT_DAYS, key="checkout_cart_days"
+    )
+    checkout_date = datetime.datetime.now()
+    due_date = checkout_date + datetime.timedelta(days=checkout_days)
+    st.write(f"**Checkout Date**: {checkout_date.strftime('%Y-%m-%d')}")
+    st.write(f"**Due Date**: {due_date.strftime('%Y-%m-%d')}")
+    
+    notes = st.text_area("Notes", placeholder="Optional notes for this checkout", key="checkout_cart_notes")
+    
+    if st.button(f"Checkout {len(cart)} Item(s)", key="checkout_cart_submit", disabled=not cart):
+        try:
+            count = checkout_items(
+                cart,
+                checkout_user,
+                checkout_date.strftime("%Y-%m-%d"),
+                due_date.strftime("%Y-%m-%d"),
+                notes or None,
+                versions=get_cart_versions("checkout")
+            )
+        except CartConflictError as e:
+            st.session_state["checkout_cart_conflicts"] = e.conflicts
+        else:
+            clear_cart("checkout")
+            st.session_state["checkout_cart_message"] = f"{count} item(s) checked out to {checkout_user}."
+        st.rerun()
+
+def return_cart_form(index):
+    """Collect checked out items from the equipment index and return them all at once"""
+    st.subheader("Return Cart")
+    _show_outcome("return")
+    
+    # Admins can return any item, other users only their own
+    holder = None if st.session_state.user_role == "admin" else st.session_state.username
+    checked_out = index.frame(index.skus(status=EQUIPMENT_STATUS["checked_out"], holder=holder))
+    
+    cart = cart_picker(
+        "return",
+        {
+            sku: f"{sku} - {name} (checked out by {holder_name})"
+            for sku, name, holder_name in zip(checked_out["sku"], checked_out["name"], checked_out["checked_out_by"])
+        },
+        dict(zip(checked_out["sku"], checked_out["version"]))
+    )
+    # Items deleted since they were added have no name
+    names = [(index.get(sku) or {}).get("name") for sku in cart]
+    
+    # One condition per item, defaulting to Good. The editor starts over
+    # whenever the cart changes so conditions never shift between items.
+    conditions = st.data_editor(
+        pd.DataFrame({"sku": cart, "name": names, "condition": "Good"}),
+        column_config={
+            "condition": st.column_config.SelectboxColumn(
+                "Condition", options=list(RETURN_CONDITIONS), required=True
+            ),
+        },
+        disabled=["sku", "name"],
+        hide_index=True,
+        key=f"return_cart_conditions_{hash(tuple(cart))}"
+    )
+    
+    return_notes = st.text_area("Return Notes", placeholder="Enter any notes about the condition", key="return_cart_notes")
+    
+    if st.button(f"Return {len(cart)} Item(s)", key="return_cart_submit", disabled=not cart):
+        items = [
+            {
+                "sku": row.sku,
+                "status": RETURN_CONDITIONS[row.condition],
+                "notes": f"Return Condition: {row.condition}\nReturn Notes: {return_notes}",
+                "version": get_cart_versions("return").get(row.sku),
+            }
+            for row in conditions.itertuples()
+        ]
+        
+        try:
+            count = return_items(items, datetime.datetime.now().strftime("%Y-%m-%d"), holder)
+        except CartConflictError as e:
+            st.session_state["return_cart_conflicts"] = e.conflicts
+        else:
+            clear_cart("return")
+            message = f"{count} item(s) returned."
+            flagged = (conditions["condition"] != "Good").sum()
+            if flagged:
+                message += f" {flagged} item(s) were marked as needing maintenance or damaged."
+            st.session_state["return_cart_message"] = message
+        st.rerun()
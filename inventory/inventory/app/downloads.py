@@ -0,0 +1,29 @@
+import streamlit as st
+
+from ..utils.exports import EXPORT_FORMATS, available_formats, export_file_name, export_query
+
+def download_menu(label, file_stem, sql, params=(), key=None):
+    """Offer the result of a query for download in a choice of formats
+    
+    Nothing is exported until the button is clicked; the file is then
+    generated from the database on a background thread.
+    """
+    col1, col2 = st.columns([1, 3])
+    
+    with col1:
+        format_name = st.selectbox(
+            "Format",
+            available_formats(),
+            key=f"{key}_format",
+            label_visibility="collapsed"
+        )
+    
+    with col2:
+        st.download_button(
+            label,
+            data=lambda: export_query(sql, params, format_name),
+            file_name=export_file_name(file_stem, format_name),
+            mime=EXPORT_FORMATS[format_name][1],
+            key=f"{key}_download",
+            on_click="ignore"
+        )
\ No newline at end of file
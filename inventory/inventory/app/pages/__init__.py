@@ -1 +1,32 @@
-# Pages module initialization
\ No newline at end of file
+# Pages module initialization
+import importlib
+import threading
+
+# Sidebar label of each page and the module that draws it. Pages are only
+# imported when first shown, so their dependencies load on demand.
+PAGES = {
+    "Equipment": "equipment",
+    "Users": "users",
+    "Reports": "reports",
+    "QR Scanner": "qr_scanner",
+}
+
+# Pages reached from other pages rather than from the sidebar
+HIDDEN_PAGES = {
+    "Equipment Details": "equipment_details",
+}
+
+_page_lock = threading.Lock()
+_loaded_pages = {}
+
+def load_page(name):
+    """Import a page by its label on first use and return its module"""
+    page = _loaded_pages.get(name)
+    if page is None:
+        with _page_lock:
+            page = _loaded_pages.get(name)
+            if page is None:
+                module_name = PAGES.get(name) or HIDDEN_PAGES[name]
+                page = importlib.import_module(f".{module_name}", __name__)
+                _loaded_pages[name] = page
+    return page
@@ -2,49 +2,65 @@ import streamlit as st
 import pandas as pd
 import os
 import datetime
-from PIL import Image
+import tempfile
 import io
 
 from ...utils.database import (
-    get_equipment, 
-    save_equipment, 
-    get_checkout_history, 
-    save_checkout_history, 
-    generate_sku,
-    get_users,
+    add_equipment,
+    update_equipment,
+    EquipmentConflictError,
+    get_equipment_by_sku,
+    get_history_for_sku,
+    allocate_skus,
+    peek_next_sku,
+    transaction,
+    query_equipment,
+    search_equipment,
+    full_text_query,
+    get_equipment_categories,
     IMAGES_DIR
 )
-from ...utils.constants import EQUIPMENT_STATUS, DEFAULT_CHECKOUT_DAYS, DELL_BLUE
+from ...utils.constants import EQUIPMENT_STATUS, DELL_BLUE, LIST_PAGE_SIZE
 from ...utils.qr_code import generate_qr_code
+from ...utils.equipment_index import get_equipment_index
+from ...utils.bulk_import import IMPORT_COLUMNS, available_import_types, import_equipment
 from ..auth import send_email
+from ..pagination import page_cursor, pager
+from ..cart import checkout_cart_form, return_cart_form
+from ..sections import show_sections
+from ...components.component_loader import load_component
+
+# Selectable grid, replaceable by a custom implementation
+data_table = load_component("data_table")
 
 def show():
     """Display the equipment management page"""
     st.title("Equipment Management")
     
-    # Create tabs for different equipment views
-    tab1, tab2, tab3 = st.tabs([
-        "All Equipment", 
-        "Add Equipment",
-        "Checkout/Return"
-    ])
-    
-    with tab1:
-        show_equipment_list()
-    
-    with tab2:
-        if st.session_state.user_role == "admin":
-            add_equipment_form()
-        else:
-            st.warning("You don't have permission to add equipment. Please contact an administrator.")
-    
-    with tab3:
-        equipment_checkout_return()
+    # Only the selected view runs, and its widgets rerun only that view
+    show_sections("equipment", {
+        "All Equipment": show_equipment_list,
+        "Add Equipment": add_equipment_section,
+        "Bulk Import": bulk_import_section,
+        "Checkout/Return": equipment_checkout_return,
+    })
+
+def add_equipment_section():
+    """Show the add equipment form to admins"""
+    if st.session_state.user_role == "admin":
+        add_equipment_form()
+    else:
+        st.warning("You don't have permission to add equipment. Please contact an administrator.")
+
+def bulk_import_section():
+    """Show the bulk import form to admins"""
+    if st.session_state.user_role == "admin":
+        bulk_import_form()
+    else:
+        st.warning("You don't have permission to import equipment. Please contact an administrator.")
 
 def show_equipment_list():
-    """Display a list of all equipment"""
-    equipment_df = get_equipment()
-    
+    """Display a paginated list of all equipment"""
     # Filters
     col1, col2, col3 = st.columns(3)
     
@@ -56,8 +72,8 @@ def show_equipment_list():
         )
     
     with col2:
-        if not equipment_df.empty and "category" in equipment_df.columns:
-            categories = equipment_df["category"].dropna().unique().tolist()
+        categories = get_equipment_categories()
+        if categories:
             category_filter = st.multiselect(
                 "Filter by Category",
                 options=categories,
@@ -69,76 +85,54 @@ def show_equipment_list():
     with col3:
         search_term = st.text_input("Search Equipment", "")
     
-    # Apply filters
-    filtered_df = equipment_df.copy()
-    
-    if status_filter:
-        filtered_df = filtered_df[filtered_df["status"].isin(status_filter)]
-    
-    if category_filter:
-        filtered_df = filtered_df[filtered_df["category"].isin(category_filter)]
+    # Fetch only the current page, filtered in SQL; one extra row tells
+    # the pager whether there is a next page
+    filters = (tuple(status_filter), tuple(category_filter), search_term)
+    cursor = page_cursor("equipment_list", filters)
+    ranked = bool(search_term) and full_text_query(search_term) is not None
     
-    if search_term:
-        search_mask = (
-            filtered_df["name"].str.contains(search_term, case=False, na=False) |
-            filtered_df["description"].str.contains(search_term, case=False, na=False) |
-            filtered_df["sku"].str.contains(search_term, case=False, na=False) |
-            filtered_df["manufacturer"].str.contains(search_term, case=False, na=False)
+    if ranked:
+        # Results from the full-text index, ranked unless the term is very common
+        page_df = search_equipment(
+            search_term,
+            statuses=status_filter,
+            categories=category_filter,
+            after=cursor,
+            limit=LIST_PAGE_SIZE + 1
+        )
+    else:
+        # Search terms too short for the index fall back to a LIKE scan
+        page_df = query_equipment(
+            statuses=status_filter,
+            categories=category_filter,
+            search=search_term,
+            after_sku=cursor,
+            limit=LIST_PAGE_SIZE + 1
         )
-        filtered_df = filtered_df[search_mask]
     
     # Display the filtered equipment
-    if not filtered_df.empty:
-        # First, initialize session state for selected row if not exists
-        if "selected_equipment_row" not in st.session_state:
-            st.session_state.selected_equipment_row = None
-        
-        # Create a specialized dataframe for display
-        display_df = filtered_df.copy()
-        
-        # Add a selection column that will contain checkboxes
-        display_df = display_df.reset_index(drop=True)  # Reset index for clean display
-        
-        # Create a checkbox column
-        display_df["Select"] = [
-            "✓" if sku == st.session_state.selected_equipment_row else "" 
-            for sku in display_df["sku"]
-        ]
+    if not page_df.empty:
+        filtered_df = pager("equipment_list", page_df, "cursor" if ranked else "sku", LIST_PAGE_SIZE)
         
         # Choose columns to display and their order
-        display_cols = ["Select", "sku", "name", "category", "status", "checked_out_by"]
+        display_cols = ["sku", "name", "category", "status", "checked_out_by"]
+        if ranked:
+            display_cols.append("match")
         
-        # Create clickable data frame
+        # Rows are selected in the grid itself; each page of each search has
+        # its own selection, since a selection is a row position
         st.write("Select an item from the equipment list:")
-        clicked = st.dataframe(
-            display_df[display_cols],
-            use_container_width=True,
-            hide_index=True
+        selected = data_table(
+            filtered_df,
+            columns=display_cols,
+            selection="single",
+            key=f"equipment_grid_{filters}_{cursor}"
         )
         
-        # Create a list of buttons below the table for easier selection
-        st.write("Or click an item below:")
-        
-        # Create 4 columns for the buttons
-        cols = st.columns(4)
-        
-        # Add a button for each equipment item
-        for i, (idx, row) in enumerate(filtered_df.iterrows()):
-            sku = row["sku"]
-            col_idx = i % 4
-            
-            # Determine button style based on selection
-            button_type = "primary" if sku == st.session_state.selected_equipment_row else "secondary"
-            
-            # Add the button to the appropriate column
-            if cols[col_idx].button(sku, key=f"btn_{sku}", type=button_type):
-                st.session_state.selected_equipment_row = sku
-                st.rerun()
-        
         # Show view details button if a row is selected
-        if st.session_state.selected_equipment_row:
-            sku = st.session_state.selected_equipment_row
-            st.write(f"Selected: {sku} - {filtered_df[filtered_df['sku'] == sku]['name'].values[0]}")
+        if not selected.empty:
+            sku = selected["sku"].iloc[0]
+            st.write(f"Selected: {sku} - {selected['name'].iloc[0]}")
             
             if st.button("View Details", type="primary"):
                 # Store selected SKU in session state
@@ -153,18 +147,16 @@ def show_equipment_details():
     """Display details for a selected piece of equipment"""
     if "selected_equipment_sku" in st.session_state:
         sku = st.session_state.selected_equipment_sku
-        equipment_df = get_equipment()
+        equipment = get_equipment_by_sku(sku)
         
-        equipment = equipment_df[equipment_df["sku"] == sku]
-        
-        if not equipment.empty:
-            equipment = equipment.iloc[0]
-            
+        if equipment is not None:
             col1, col2 = st.columns([1, 2])
             
             with col1:
                 # Display equipment image if available
                 if pd.notna(equipment["image_path"]) and os.path.exists(equipment["image_path"]):
+                    # PIL is only imported once there is an image to handle
+                    from PIL import Image
                     image = Image.open(equipment["image_path"])
                     st.image(image, width=300)
                 else:
@@ -211,20 +203,29 @@ def show_equipment_details():
                 if st.session_state.user_role == "admin":
                     if st.button("Edit Equipment"):
                         st.session_state.edit_equipment_sku = sku
+                        st.session_state.pop(f"edit_equipment_version_{sku}", None)
                         st.rerun()
             
             # Display checkout history
             st.subheader("Checkout History")
-            history_df = get_checkout_history()
-            item_history = history_df[history_df["sku"] == sku].sort_values(by="checkout_date", ascending=False)
+            history_page = get_history_for_sku(
+                sku, before_id=page_cursor("equipment_history", sku), limit=LIST_PAGE_SIZE + 1
+            )
             
-            if not item_history.empty:
+            if not history_page.empty:
+                item_history = pager("equipment_history", history_page, "id", LIST_PAGE_SIZE)
                 st.dataframe(item_history[["user", "checkout_date", "due_date", "return_date", "notes"]], use_container_width=True)
             else:
                 st.info("No checkout history for this item.")
             
             # Equipment edit form
             if "edit_equipment_sku" in st.session_state and st.session_state.edit_equipment_sku == sku:
+                # Remember the version the form was filled from; the update only
+                # applies if nobody changed the item in the meantime
+                version_key = f"edit_equipment_version_{sku}"
+                if version_key not in st.session_state:
+                    st.session_state[version_key] = int(equipment["version"])
+                
                 with st.form(key="edit_equipment_form"):
                     st.subheader("Edit Equipment")
                     
@@ -258,6 +259,7 @@ def show_equipment_details():
                             image_path = os.path.join(IMAGES_DIR, image_filename)
                             
                             # Open the uploaded image
+                            from PIL import Image
                             image = Image.open(uploaded_file)
                             
                             # Save the image
@@ -266,28 +268,32 @@ def show_equipment_details():
                             # Keep existing image
                             image_path = equipment["image_path"] if pd.notna(equipment["image_path"]) else None
                         
-                        # Update the equipment in the DataFrame
-                        equipment_df.loc[equipment_df["sku"] == sku, "name"] = name
-                        equipment_df.loc[equipment_df["sku"] == sku, "description"] = description
-                        equipment_df.loc[equipment_df["sku"] == sku, "category"] = category
-                        equipment_df.loc[equipment_df["sku"] == sku, "manufacturer"] = manufacturer
-                        equipment_df.loc[equipment_df["sku"] == sku, "model"] = model
-                        equipment_df.loc[equipment_df["sku"] == sku, "serial_number"] = serial_number
-                        equipment_df.loc[equipment_df["sku"] == sku, "purchase_date"] = purchase_date.strftime("%Y-%m-%d")
-                        equipment_df.loc[equipment_df["sku"] == sku, "purchase_price"] = purchase_price
-                        equipment_df.loc[equipment_df["sku"] == sku, "status"] = status
-                        equipment_df.loc[equipment_df["sku"] == sku, "location"] = location
-                        equipment_df.loc[equipment_df["sku"] == sku, "image_path"] = image_path
-                        equipment_df.loc[equipment_df["sku"] == sku, "updated_at"] = datetime.datetime.now().isoformat()
-                        
-                        # Save the updated DataFrame
-                        save_equipment(equipment_df)
-                        
-                        # Clear the edit flag
-                        del st.session_state.edit_equipment_sku
-                        
-                        st.success("Equipment updated successfully!")
-                        st.rerun()
+                        # Update only this equipment row
+                        try:
+                            update_equipment(
+                                sku,
+                                expected_version=st.session_state.pop(version_key),
+                                name=name,
+                                description=description,
+                                category=category,
+                                manufacturer=manufacturer,
+                                model=model,
+                                serial_number=serial_number,
+                                purchase_date=purchase_date.strftime("%Y-%m-%d"),
+                                purchase_price=purchase_price,
+                                status=status,
+                                location=location,
+                                image_path=image_path
+                            )
+                        except EquipmentConflictError:
+                            # The form is refilled from the latest values on this run
+                            st.error("This equipment was changed by someone else while you were editing. Your changes were not saved; the form now shows the latest values.")
+                        else:
+                            # Clear the edit flag
+                            del st.session_state.edit_equipment_sku
+                            
+                            st.success("Equipment updated successfully!")
+                            st.rerun()
         else:
             st.info("Select an equipment item from the 'All Equipment' tab to view details.")
     else:
@@ -298,9 +304,8 @@ def add_equipment_form():
     with st.form(key="add_equipment_form"):
         st.subheader("Add New Equipment")
         
-        # Generate a new SKU
-        new_sku = generate_sku()
-        st.write(f"New SKU: {new_sku}")
+        # Preview the next SKU; it is only reserved when the form is saved
+        st.write(f"New SKU: {peek_next_sku()}")
         
         name = st.text_input("Name", placeholder="Enter equipment name")
         description = st.text_area("Description", placeholder="Enter equipment description")
@@ -321,47 +326,55 @@ def add_equipment_form():
         if submit_button:
             # Process the form data
             if name:
-                # Process uploaded image if provided
-                image_path = None
+                # Save the uploaded image before taking the write lock; it is
+                # renamed after the SKU once the row is committed
+                upload_path = None
                 if uploaded_file is not None:
-                    # Create a unique filename
-                    image_filename = f"{new_sku}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.jpg"
-                    image_path = os.path.join(IMAGES_DIR, image_filename)
-                    
-                    # Open the uploaded image
-                    image = Image.open(uploaded_file)
-                    
-                    # Save the image
-                    image.save(image_path)
-                
-                # Add the new equipment to the DataFrame
-                equipment_df = get_equipment()
-                
-                new_row = {
-                    "sku": new_sku,
-                    "name": name,
-                    "description": description,
-                    "category": category,
-                    "manufacturer": manufacturer,
-                    "model": model,
-                    "serial_number": serial_number,
-                    "purchase_date": purchase_date.strftime("%Y-%m-%d"),
-                    "purchase_price": purchase_price,
-                    "status": status,
-                    "checked_out_by": None,
-                    "checkout_date": None,
-                    "due_date": None,
-                    "location": location,
-                    "image_path": image_path,
-                    "created_at": datetime.datetime.now().isoformat(),
-                    "updated_at": datetime.datetime.now().isoformat()
-                }
+                    from PIL import Image
+                    with tempfile.NamedTemporaryFile(dir=IMAGES_DIR, prefix=".upload_", suffix=".jpg", delete=False) as upload:
+                        upload_path = upload.name
+                    Image.open(uploaded_file).save(upload_path)
                 
-                # Append the new row
-                equipment_df = pd.concat([equipment_df, pd.DataFrame([new_row])], ignore_index=True)
+                try:
+                    # Reserve the SKU and insert the row in one transaction
+                    with transaction():
+                        new_sku = allocate_skus()[0]
+                        
+                        # Create a unique filename for the image
+                        image_path = None
+                        if upload_path is not None:
+                            image_filename = f"{new_sku}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.jpg"
+                            image_path = os.path.join(IMAGES_DIR, image_filename)
+                        
+                        # Insert the new equipment row under the reserved SKU
+                        new_row = {
+                            "sku": new_sku,
+                            "name": name,
+                            "description": description,
+                            "category": category,
+                            "manufacturer": manufacturer,
+                            "model": model,
+                            "serial_number": serial_number,
+                            "purchase_date": purchase_date.strftime("%Y-%m-%d"),
+                            "purchase_price": purchase_price,
+                            "status": status,
+                            "checked_out_by": None,
+                            "checkout_date": None,
+                            "due_date": None,
+                            "location": location,
+                            "image_path": image_path,
+                            "created_at": datetime.datetime.now().isoformat(),
+                            "updated_at": datetime.datetime.now().isoformat()
+                        }
+                        
+                        add_equipment(new_row)
+                except Exception:
+                    if upload_path is not None:
+                        os.remove(upload_path)
+                    raise
                 
-                # Save the updated DataFrame
-                save_equipment(equipment_df)
+                if upload_path is not None:
+                    os.replace(upload_path, image_path)
                 
                 # Generate QR code for the new equipment
                 generate_qr_code(new_sku)
@@ -376,205 +389,67 @@ def add_equipment_form():
             else:
                 st.error("Equipment name is required.")
 
+def bulk_import_form():
+    """Import many equipment items from a CSV or Excel file"""
+    st.subheader("Bulk Import")
+    st.write(f"Columns: {', '.join(IMPORT_COLUMNS)}. Only name is required; status defaults to In Stock.")
+    
+    uploaded_file = st.file_uploader("Equipment file", type=available_import_types(), key="bulk_import_file")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        validate_clicked = st.button("Validate", key="bulk_import_validate", disabled=uploaded_file is None)
+    with col2:
+        import_clicked = st.button("Import Valid Rows", key="bulk_import_run", disabled=uploaded_file is None)
+    
+    if not (validate_clicked or import_clicked):
+        return
+    
+    uploaded_file.seek(0)
+    try:
+        with st.spinner("Reading file..."):
+            result = import_equipment(uploaded_file, uploaded_file.name, dry_run=validate_clicked)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Rows", f"{result['rows']:,}")
+    if validate_clicked:
+        col2.metric("Valid", f"{result['rows'] - result['invalid_rows']:,}")
+    else:
+        col2.metric("Imported", f"{result['imported']:,}")
+    col3.metric("Rows With Errors", f"{result['invalid_rows']:,}")
+    
+    if result["first_sku"]:
+        st.success(f"Added SKUs {result['first_sku']} to {result['last_sku']}.")
+    
+    errors = result["errors"]
+    if len(errors):
+        st.dataframe(errors.head(1000), hide_index=True)
+        st.download_button(
+            label="Download Error Report",
+            data=errors.to_csv(index=False),
+            file_name="import_errors.csv",
+            mime="text/csv",
+            key="bulk_import_errors"
+        )
+    elif validate_clicked:
+        st.success("No problems found.")
+
 def equipment_checkout_return():
-    """Form for checking out or returning equipment"""
-    equipment_df = get_equipment()
+    """Carts for checking out or returning several items at once"""
+    index = get_equipment_index()
     
     # Only show if there's equipment to checkout
-    if equipment_df.empty:
+    if len(index) == 0:
         st.info("No equipment available in the inventory.")
         return
     
     tab1, tab2 = st.tabs(["Checkout Equipment", "Return Equipment"])
     
     with tab1:
-        st.subheader("Checkout Equipment")
-        
-        # QR scanner option
-        use_qr = st.checkbox("Use QR Scanner")
-        
-        if use_qr:
-            st.write("Scan the QR code on the equipment.")
-            # This would be replaced with actual QR scanning
-            st.write("QR scanner placeholder - in real implementation, use camera input")
-            sku = st.text_input("Or enter SKU manually")
-        else:
-            # Filter to only show equipment that's in stock
-            available_equipment = equipment_df[equipment_df["status"] == EQUIPMENT_STATUS["in_stock"]]
-            
-            if available_equipment.empty:
-                st.warning("No equipment currently available for checkout.")
-                return
-            
-            sku = st.selectbox(
-                "Select Equipment",
-                options=available_equipment["sku"].tolist(),
-                format_func=lambda x: f"{x} - {available_equipment[available_equipment['sku'] == x]['name'].values[0]}"
-            )
-        
-        if sku:
-            # Get equipment details
-            equipment = equipment_df[equipment_df["sku"] == sku]
-            
-            if not equipment.empty:
-                equipment = equipment.iloc[0]
-                
-                # Only allow checkout if equipment is in stock
-                if equipment["status"] == EQUIPMENT_STATUS["in_stock"]:
-                    st.write(f"**Equipment**: {equipment['name']}")
-                    st.write(f"**SKU**: {sku}")
-                    
-                    # Get user list for checkout
-                    users_df = get_users()
-                    
-                    # Current user is the default
-                    default_user_idx = users_df.index[users_df["username"] == st.session_state.username].tolist()[0] if st.session_state.username in users_df["username"].values else 0
-                    
-                    if st.session_state.user_role == "admin":
-                        # Admins can check out equipment for any user
-                        checkout_user = st.selectbox(
-                            "Checkout For",
-                            options=users_df["username"].tolist(),
-                            index=default_user_idx
-                        )
-                    else:
-                        # Regular users can only check out for themselves
-                        checkout_user = st.session_state.username
-                        st.write(f"**Checkout For**: {checkout_user}")
-                    
-                    # Set checkout duration
-                    checkout_days = st.number_input("Checkout Duration (days)", min_value=1, max_value=180, value=DEFAULT_CHECKOUT_DAYS)
-                    
-                    checkout_date = datetime.datetime.now()
-                    due_date = checkout_date + datetime.timedelta(days=checkout_days)
-                    
-                    st.write(f"**Checkout Date**: {checkout_date.strftime('%Y-%m-%d')}")
-                    st.write(f"**Due Date**: {due_date.strftime('%Y-%m-%d')}")
-                    
-                    notes = st.text_area("Notes", placeholder="Optional notes for this checkout")
-                    
-                    if st.button("Checkout Equipment"):
-                        # Update equipment status
-                        equipment_df.loc[equipment_df["sku"] == sku, "status"] = EQUIPMENT_STATUS["checked_out"]
-                        equipment_df.loc[equipment_df["sku"] == sku, "checked_out_by"] = checkout_user
-                        equipment_df.loc[equipment_df["sku"] == sku, "checkout_date"] = checkout_date.strftime("%Y-%m-%d")
-                        equipment_df.loc[equipment_df["sku"] == sku, "due_date"] = due_date.strftime("%Y-%m-%d")
-                        equipment_df.loc[equipment_df["sku"] == sku, "updated_at"] = datetime.datetime.now().isoformat()
-                        
-                        # Save the updated equipment data
-                        save_equipment(equipment_df)
-                        
-                        # Add to checkout history
-                        history_df = get_checkout_history()
-                        
-                        new_history = {
-                            "sku": sku,
-                            "equipment_name": equipment["name"],
-                            "user": checkout_user,
-                            "checkout_date": checkout_date.strftime("%Y-%m-%d"),
-                            "due_date": due_date.strftime("%Y-%m-%d"),
-                            "return_date": None,
-                            "notes": notes
-                        }
-                        
-                        # Append the new history record
-                        history_df = pd.concat([history_df, pd.DataFrame([new_history])], ignore_index=True)
-                        
-                        # Save the updated history
-                        save_checkout_history(history_df)
-                        
-                        st.success(f"Equipment {equipment['name']} checked out successfully!")
-                        st.rerun()
-                else:
-                    st.error(f"This equipment is currently {equipment['status']} and cannot be checked out.")
+        checkout_cart_form(index)
     
     with tab2:
-        st.subheader("Return Equipment")
-        
-        # Filter to only show checked out equipment
-        checked_out_equipment = equipment_df[equipment_df["status"] == EQUIPMENT_STATUS["checked_out"]]
-        
-        if checked_out_equipment.empty:
-            st.info("No equipment is currently checked out.")
-            return
-        
-        # If admin, show all checked out equipment, otherwise show only user's equipment
-        if st.session_state.user_role == "admin":
-            filtered_equipment = checked_out_equipment
-        else:
-            filtered_equipment = checked_out_equipment[checked_out_equipment["checked_out_by"] == st.session_state.username]
-            
-            if filtered_equipment.empty:
-                st.info("You don't have any equipment checked out.")
-                return
-        
-        return_sku = st.selectbox(
-            "Select Equipment to Return",
-            options=filtered_equipment["sku"].tolist(),
-            format_func=lambda x: f"{x} - {filtered_equipment[filtered_equipment['sku'] == x]['name'].values[0]} (checked out by {filtered_equipment[filtered_equipment['sku'] == x]['checked_out_by'].values[0]})"
-        )
-        
-        if return_sku:
-            # Get equipment details
-            equipment = filtered_equipment[filtered_equipment["sku"] == return_sku].iloc[0]
-            
-            st.write(f"**Equipment**: {equipment['name']}")
-            st.write(f"**SKU**: {return_sku}")
-            st.write(f"**Checked Out By**: {equipment['checked_out_by']}")
-            st.write(f"**Checkout Date**: {equipment['checkout_date']}")
-            st.write(f"**Due Date**: {equipment['due_date']}")
-            
-            return_condition = st.selectbox(
-                "Condition Upon Return",
-                options=["Good", "Needs Maintenance", "Damaged"]
-            )
-            
-            return_notes = st.text_area("Return Notes", placeholder="Enter any notes about the condition")
-            
-            if st.button("Return Equipment"):
-                # Update equipment status based on condition
-                if return_condition == "Good":
-                    new_status = EQUIPMENT_STATUS["in_stock"]
-                elif return_condition == "Needs Maintenance":
-                    new_status = EQUIPMENT_STATUS["maintenance"]
-                else:  # Damaged
-                    new_status = EQUIPMENT_STATUS["in_stock"]  # Still in stock but with damage noted
-                
-                # Update equipment status
-                equipment_df.loc[equipment_df["sku"] == return_sku, "status"] = new_status
-                equipment_df.loc[equipment_df["sku"] == return_sku, "checked_out_by"] = None
-                equipment_df.loc[equipment_df["sku"] == return_sku, "checkout_date"] = None
-                equipment_df.loc[equipment_df["sku"] == return_sku, "due_date"] = None
-                equipment_df.loc[equipment_df["sku"] == return_sku, "updated_at"] = datetime.datetime.now().isoformat()
-                
-                # Save the updated equipment data
-                save_equipment(equipment_df)
-                
-                # Update checkout history
-                history_df = get_checkout_history()
-                
-                # Find the most recent checkout for this equipment without a return date
-                checkout_idx = history_df[(history_df["sku"] == return_sku) & (history_df["return_date"].isna())].index.max()
-                
-                if pd.notna(checkout_idx):
-                    # Update the return date and notes
-                    history_df.loc[checkout_idx, "return_date"] = datetime.datetime.now().strftime("%Y-%m-%d")
-                    
-                    # Append return notes to existing notes
-                    existing_notes = history_df.loc[checkout_idx, "notes"]
-                    if pd.isna(existing_notes):
-                        existing_notes = ""
-                    
-                    updated_notes = f"{existing_notes}\nReturn Condition: {return_condition}\nReturn Notes: {return_notes}".strip()
-                    history_df.loc[checkout_idx, "notes"] = updated_notes
-                    
-                    # Save the updated history
-                    save_checkout_history(history_df)
-                
-                st.success(f"Equipment {equipment['name']} returned successfully!")
-                
-                # If equipment needs maintenance, show an alert
-                if return_condition in ["Needs Maintenance", "Damaged"]:
-                    st.warning(f"This equipment has been marked as {return_condition}. Maintenance may be required.")
-                
-                st.rerun()
\ No newline at end of file
+        return_cart_form(index)
\ No newline at end of file
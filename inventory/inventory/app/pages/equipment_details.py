@@ -6,17 +6,16 @@ from PIL import Image
 import io
 
 from ...utils.database import (
-    get_equipment, 
-    save_equipment, 
-    get_checkout_history, 
-    save_checkout_history, 
-    generate_sku,
-    get_users,
+    get_equipment_by_sku, 
+    update_equipment, 
+    EquipmentConflictError,
+    get_history_for_sku, 
     IMAGES_DIR
 )
-from ...utils.constants import EQUIPMENT_STATUS, DEFAULT_CHECKOUT_DAYS, DELL_BLUE
+from ...utils.constants import EQUIPMENT_STATUS, DEFAULT_CHECKOUT_DAYS, DELL_BLUE, LIST_PAGE_SIZE
 from ...utils.qr_code import generate_qr_code
 from ..auth import send_email
+from ..pagination import page_cursor, pager
 
 def show():
     """Display the equipment details page"""
@@ -41,12 +40,9 @@ def show():
 
 def display_equipment_details(sku):
     """Display detailed information and edit form for a piece of equipment"""
-    equipment_df = get_equipment()
+    equipment = get_equipment_by_sku(sku)
     
-    # Find the equipment with the given SKU
-    equipment = equipment_df[equipment_df["sku"] == sku]
-    
-    if equipment.empty:
+    if equipment is None:
         st.error(f"No equipment found with SKU: {sku}")
         if st.button("Clear Selection"):
             if "selected_equipment_sku" in st.session_state:
@@ -54,9 +50,6 @@ def display_equipment_details(sku):
             st.rerun()
         return
     
-    # Get the equipment details
-    equipment = equipment.iloc[0]
-    
     # Create tabs for different views
     tab1, tab2, tab3 = st.tabs(["Details", "Edit Equipment", "Checkout History"])
     
@@ -67,7 +60,7 @@ def display_equipment_details(sku):
     # Tab 2: Edit Equipment (admin only)
     with tab2:
         if st.session_state.user_role == "admin":
-            edit_equipment_form(equipment, equipment_df)
+            edit_equipment_form(equipment)
         else:
             st.warning("You don't have permission to edit equipment. Please contact an administrator.")
     
@@ -172,10 +165,16 @@ def display_equipment_info(equipment):
                 else:
                     st.markdown(f"<div style='color: green;'>{days_diff} days remaining</div>", unsafe_allow_html=True)
 
-def edit_equipment_form(equipment, equipment_df):
+def edit_equipment_form(equipment):
     """Form for editing equipment details"""
     sku = equipment["sku"]
     
+    # The form is rebuilt from the latest row on every view, so it remembers
+    # the version it showed last; a submit only applies if nobody changed
+    # the item since then
+    version_key = f"details_equipment_version_{sku}"
+    shown_version = int(equipment["version"])
+    
     with st.form(key="edit_equipment_form"):
         st.subheader("Edit Equipment Details")
         
@@ -233,38 +232,48 @@ def edit_equipment_form(equipment, equipment_df):
                 # Keep existing image
                 image_path = equipment["image_path"] if pd.notna(equipment["image_path"]) else None
             
-            # Update the equipment in the DataFrame
-            equipment_df.loc[equipment_df["sku"] == sku, "name"] = name
-            equipment_df.loc[equipment_df["sku"] == sku, "description"] = description
-            equipment_df.loc[equipment_df["sku"] == sku, "category"] = category
-            equipment_df.loc[equipment_df["sku"] == sku, "manufacturer"] = manufacturer
-            equipment_df.loc[equipment_df["sku"] == sku, "model"] = model
-            equipment_df.loc[equipment_df["sku"] == sku, "serial_number"] = serial_number
-            equipment_df.loc[equipment_df["sku"] == sku, "purchase_date"] = purchase_date.strftime("%Y-%m-%d")
-            equipment_df.loc[equipment_df["sku"] == sku, "purchase_price"] = purchase_price
-            equipment_df.loc[equipment_df["sku"] == sku, "status"] = status
-            equipment_df.loc[equipment_df["sku"] == sku, "location"] = location
-            equipment_df.loc[equipment_df["sku"] == sku, "image_path"] = image_path
-            equipment_df.loc[equipment_df["sku"] == sku, "updated_at"] = datetime.datetime.now().isoformat()
-            
-            # Save the updated DataFrame
-            save_equipment(equipment_df)
-            
-            st.success("Equipment updated successfully!")
-            st.session_state.show_success = True
+            # Update only this equipment row
+            try:
+                update_equipment(
+                    sku,
+                    expected_version=st.session_state.get(version_key, shown_version),
+                    name=name,
+                    description=description,
+                    category=category,
+                    manufacturer=manufacturer,
+                    model=model,
+                    serial_number=serial_number,
+                    purchase_date=purchase_date.strftime("%Y-%m-%d"),
+                    purchase_price=purchase_price,
+                    status=status,
+                    location=location,
+                    image_path=image_path
+                )
+            except EquipmentConflictError:
+                st.error("This equipment was changed by someone else while you were editing. Your changes were not saved; the form now shows the latest values.")
+            else:
+                # The form now shows the values just saved
+                shown_version += 1
+                st.success("Equipment updated successfully!")
+                st.session_state.show_success = True
+    
+    st.session_state[version_key] = shown_version
 
 def display_checkout_history(sku):
     """Display checkout history for a piece of equipment"""
     st.subheader("Checkout History")
     
-    history_df = get_checkout_history()
-    item_history = history_df[history_df["sku"] == sku].sort_values(by="checkout_date", ascending=False)
+    history_page = get_history_for_sku(
+        sku, before_id=page_cursor("details_history", sku), limit=LIST_PAGE_SIZE + 1
+    )
     
-    if not item_history.empty:
+    if not history_page.empty:
+        item_history = pager("details_history", history_page, "id", LIST_PAGE_SIZE)
+        
         # Add a Status column
         item_history["status"] = item_history.apply(
             lambda x: "Returned" if pd.notna(x["return_date"]) else (
-                "Overdue" if pd.to_datetime(x["due_date"]) < datetime.datetime.now().date() else "Checked Out"
+                "Overdue" if pd.to_datetime(x["due_date"]).date() < datetime.datetime.now().date() else "Checked Out"
             ),
             axis=1
         )
@@ -1,53 +1,67 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import io
 import datetime
-import base64
 
-from ...utils.database import get_equipment, get_checkout_history, get_users
+from ...utils.database import (
+    get_status_counts,
+    get_category_counts,
+    get_user_checkout_counts,
+    OVERDUE_EQUIPMENT_SQL
+)
+from ...utils.overdue import get_due_items, get_due_buckets, last_scan
 from ...utils.constants import EQUIPMENT_STATUS
+from ...utils.analytics import (
+    load_history_window,
+    recent_checkouts,
+    duration_summary,
+    duration_breakdown,
+    DURATION_PERCENTILES
+)
+from ...utils.utilization import (
+    load_intervals,
+    category_sizes,
+    utilization_timeline,
+    asset_utilization,
+    peak_concurrency,
+    UTILIZATION_FREQUENCIES
+)
+from ..downloads import download_menu
+from ..sections import show_sections
+
+# Most recent checkouts listed in the history report; the download has all
+HISTORY_DISPLAY_ROWS = 1000
+
+# Number of most utilized items listed in the utilization report
+TOP_UTILIZED_ROWS = 25
 
 def show():
     """Display the reports page"""
     st.title("Reports")
     
-    # Create tabs for different reports
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "Equipment Status", 
-        "Checkout History", 
-        "User Activity",
-        "Overdue Items"
-    ])
-    
-    with tab1:
-        equipment_status_report()
-    
-    with tab2:
-        checkout_history_report()
-    
-    with tab3:
-        user_activity_report()
-    
-    with tab4:
-        overdue_items_report()
+    # Only the selected report is queried and drawn, and its widgets rerun
+    # only that report
+    show_sections("reports", {
+        "Equipment Status": equipment_status_report,
+        "Checkout History": checkout_history_report,
+        "User Activity": user_activity_report,
+        "Overdue Items": overdue_items_report,
+        "Utilization": utilization_report,
+    })
 
 def equipment_status_report():
     """Report on equipment status"""
     st.subheader("Equipment Status Report")
     
-    equipment_df = get_equipment()
+    # Counts come from summary tables kept current by triggers
+    status_counts = get_status_counts()
     
-    if equipment_df.empty:
+    if status_counts.empty:
         st.info("No equipment data available.")
         return
     
-    # Count equipment by status
-    status_counts = equipment_df["status"].value_counts()
-    
-    # Create a pie chart
+    # Create a pie chart; matplotlib is only imported once a chart is drawn
+    import matplotlib.pyplot as plt
     fig, ax = plt.subplots(figsize=(10, 6))
-    ax.pie(status_counts, labels=status_counts.index, autopct='%1.1f%%', startangle=90)
+    ax.pie(status_counts["count"], labels=status_counts["status"], autopct='%1.1f%%', startangle=90)
     ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle
     
     st.pyplot(fig)
@@ -55,8 +69,9 @@ def equipment_status_report():
     # Display a table of equipment counts by category
     st.subheader("Equipment by Category")
     
-    if "category" in equipment_df.columns:
-        category_counts = equipment_df["category"].value_counts().reset_index()
+    category_counts = get_category_counts()
+    
+    if not category_counts.empty:
         category_counts.columns = ["Category", "Count"]
         st.dataframe(category_counts, use_container_width=True)
     else:
@@ -65,29 +80,22 @@ def equipment_status_report():
     # Display a table of equipment by status
     st.subheader("Equipment by Status")
     
-    status_table = pd.DataFrame({
-        "Status": status_counts.index,
-        "Count": status_counts.values
-    })
+    status_table = status_counts.rename(columns={"status": "Status", "count": "Count"})
     
     st.dataframe(status_table, use_container_width=True)
     
-    # Download CSV
-    csv = equipment_df.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()
-    href = f'<a href="data:file/csv;base64,{b64}" download="equipment_report.csv">Download Equipment Data (CSV)</a>'
-    st.markdown(href, unsafe_allow_html=True)
+    # Download the equipment data
+    download_menu(
+        "Download Equipment Data",
+        "equipment_report",
+        "SELECT * FROM equipment ORDER BY sku",
+        key="equipment_report"
+    )
 
 def checkout_history_report():
     """Report on checkout history"""
     st.subheader("Checkout History Report")
     
-    history_df = get_checkout_history()
-    
-    if history_df.empty:
-        st.info("No checkout history available.")
-        return
-    
     # Date filters
     col1, col2 = st.columns(2)
     
@@ -103,78 +111,73 @@ def checkout_history_report():
             value=datetime.datetime.now()
         )
     
-    # Convert dates to string format for comparison
-    start_date_str = start_date.strftime("%Y-%m-%d")
-    end_date_str = end_date.strftime("%Y-%m-%d")
-    
-    # Filter history by date range
-    filtered_history = history_df[
-        (history_df["checkout_date"] >= start_date_str) & 
-        (history_df["checkout_date"] <= end_date_str)
-    ]
+    # Load the date range, including the whole end date, filtered in SQL
+    history = load_history_window(start_date, end_date)
     
-    if filtered_history.empty:
-        st.info(f"No checkout history found between {start_date_str} and {end_date_str}.")
+    if history.empty:
+        st.info(f"No checkout history found between {start_date:%Y-%m-%d} and {end_date:%Y-%m-%d}.")
         return
     
-    # Display checkout history
-    st.dataframe(filtered_history, use_container_width=True)
+    # Headline figures for the range
+    summary = duration_summary(history)
+    metric_cols = st.columns(3 + len(DURATION_PERCENTILES))
     
-    # Calculate average checkout duration
-    filtered_history_with_return = filtered_history[filtered_history["return_date"].notna()]
+    metric_cols[0].metric("Checkouts", f"{summary['checkouts']:,}")
+    metric_cols[1].metric("Returned", f"{summary['returned']:,}")
     
-    if not filtered_history_with_return.empty:
-        # Calculate checkout duration in days
-        checkout_durations = []
-        
-        for _, row in filtered_history_with_return.iterrows():
-            checkout_date = datetime.datetime.strptime(row["checkout_date"], "%Y-%m-%d")
-            return_date = datetime.datetime.strptime(row["return_date"], "%Y-%m-%d")
-            duration = (return_date - checkout_date).days
-            checkout_durations.append(duration)
-        
-        avg_duration = sum(checkout_durations) / len(checkout_durations)
+    if summary["returned"]:
+        metric_cols[2].metric("Late Returns", f"{summary['late_rate']:.1%}")
+        for col, percentile in zip(metric_cols[3:], DURATION_PERCENTILES):
+            col.metric(f"p{percentile} Duration", f"{summary[f'p{percentile}_days']:.0f} days")
         
-        st.info(f"Average checkout duration: {avg_duration:.1f} days")
-    
-    # Download CSV
-    csv = filtered_history.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()
-    href = f'<a href="data:file/csv;base64,{b64}" download="checkout_history_report.csv">Download Checkout History (CSV)</a>'
-    st.markdown(href, unsafe_allow_html=True)
+        st.info(f"Average checkout duration: {summary['mean_days']:.1f} days")
+    
+    # Display the most recent checkouts
+    recent = recent_checkouts(start_date, end_date, HISTORY_DISPLAY_ROWS)
+    if summary["checkouts"] > HISTORY_DISPLAY_ROWS:
+        st.caption(f"Showing the latest {HISTORY_DISPLAY_ROWS:,} of {summary['checkouts']:,} checkouts.")
+    st.dataframe(recent, use_container_width=True)
+    
+    # Breakdowns by equipment category and by user
+    st.subheader("Durations by Category")
+    st.dataframe(duration_breakdown(history, "category"), use_container_width=True)
+    
+    st.subheader("Durations by User")
+    st.dataframe(duration_breakdown(history, "user"), use_container_width=True)
+    
+    # Download the filtered history; dates are stored as ISO strings
+    download_menu(
+        "Download Checkout History",
+        "checkout_history_report",
+        "SELECT * FROM checkout_history WHERE checkout_date >= ? AND checkout_date < ? ORDER BY id",
+        (start_date.isoformat(), (end_date + datetime.timedelta(days=1)).isoformat()),
+        key="checkout_history_report"
+    )
 
 def user_activity_report():
     """Report on user activity"""
     st.subheader("User Activity Report")
     
-    history_df = get_checkout_history()
-    users_df = get_users()
+    # Checkouts per user, already joined with user names and sorted
+    user_counts = get_user_checkout_counts()
     
-    if history_df.empty:
+    if user_counts.empty:
         st.info("No checkout history available.")
         return
     
-    # Count checkouts by user
-    user_counts = history_df["user"].value_counts().reset_index()
-    user_counts.columns = ["Username", "Checkouts"]
-    
-    # Merge with user data to get user names
-    if not users_df.empty and "name" in users_df.columns:
-        user_counts = user_counts.merge(
-            users_df[["username", "name", "department"]],
-            left_on="Username",
-            right_on="username",
-            how="left"
-        )
-        user_counts.drop("username", axis=1, inplace=True)
+    user_counts = user_counts.rename(columns={
+        "username": "Username",
+        "checkouts": "Checkouts",
+        "open_checkouts": "Open Checkouts"
+    })
     
     # Display user activity
     st.dataframe(user_counts, use_container_width=True)
     
     # Create a bar chart of top users
-    top_n = min(10, len(user_counts))
-    top_users = user_counts.sort_values("Checkouts", ascending=False).head(top_n)
+    top_users = user_counts.head(10)
     
+    import matplotlib.pyplot as plt
     fig, ax = plt.subplots(figsize=(10, 6))
     ax.bar(
         top_users["Username"], 
@@ -189,34 +192,39 @@ def user_activity_report():
     
     st.pyplot(fig)
     
-    # Download CSV
-    csv = user_counts.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()
-    href = f'<a href="data:file/csv;base64,{b64}" download="user_activity_report.csv">Download User Activity (CSV)</a>'
-    st.markdown(href, unsafe_allow_html=True)
+    # Download the checkout counts per user
+    download_menu(
+        "Download User Activity",
+        "user_activity_report",
+        '''
+        SELECT c.user AS Username, c.checkouts AS Checkouts, c.open_checkouts AS "Open Checkouts",
+            u.name, u.department
+        FROM user_checkout_counts c
+        LEFT JOIN users u ON u.username = c.user
+        ORDER BY c.checkouts DESC, c.user
+        ''',
+        key="user_activity_report"
+    )
 
 def overdue_items_report():
     """Report on overdue items"""
     st.subheader("Overdue Items Report")
     
-    equipment_df = get_equipment()
+    status_counts = get_status_counts()
     
-    if equipment_df.empty:
+    if status_counts.empty:
         st.info("No equipment data available.")
         return
     
-    # Get checked out equipment
-    checked_out = equipment_df[equipment_df["status"] == EQUIPMENT_STATUS["checked_out"]]
-    
-    if checked_out.empty:
+    # Check for checked out equipment
+    if EQUIPMENT_STATUS["checked_out"] not in status_counts["status"].values:
         st.info("No equipment is currently checked out.")
         return
     
-    # Today's date
-    today = datetime.datetime.now().strftime("%Y-%m-%d")
-    
-    # Get overdue items
-    overdue_items = checked_out[checked_out["due_date"] < today]
+    # Overdue items and per-user counts are precomputed by the overdue scanner
+    overdue_items = get_due_items(bucket="overdue")
+    scan = last_scan()
+    st.caption(f"Last checked at {scan['scanned_at'][:16].replace('T', ' ')}.")
     
     if overdue_items.empty:
         st.success("There are no overdue items.")
@@ -225,25 +233,90 @@ def overdue_items_report():
     # Display overdue items
     st.warning(f"There are {len(overdue_items)} overdue items.")
     
-    # Add days overdue column
-    overdue_items_display = overdue_items.copy()
-    overdue_items_display["days_overdue"] = overdue_items_display["due_date"].apply(
-        lambda x: (datetime.datetime.now() - datetime.datetime.strptime(x, "%Y-%m-%d")).days
-    )
-    
     # Display columns for the report
     display_cols = ["sku", "name", "checked_out_by", "checkout_date", "due_date", "days_overdue"]
-    st.dataframe(overdue_items_display[display_cols], use_container_width=True)
+    st.dataframe(overdue_items[display_cols], use_container_width=True)
     
-    # Group by user
-    user_overdue = overdue_items.groupby("checked_out_by").size().reset_index()
-    user_overdue.columns = ["Username", "Overdue Items"]
+    # Overdue and upcoming due dates per user
+    user_overdue = get_due_buckets()
+    user_overdue = user_overdue[user_overdue["username"] != ""]
+    user_overdue.columns = ["Username", "Overdue Items", "Due Today", "Due Soon"]
     
     st.subheader("Overdue Items by User")
     st.dataframe(user_overdue, use_container_width=True)
     
-    # Download CSV
-    csv = overdue_items_display.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()
-    href = f'<a href="data:file/csv;base64,{b64}" download="overdue_items_report.csv">Download Overdue Items Report (CSV)</a>'
-    st.markdown(href, unsafe_allow_html=True)
\ No newline at end of file
+    # Download the overdue items
+    download_menu(
+        "Download Overdue Items Report",
+        "overdue_items_report",
+        OVERDUE_EQUIPMENT_SQL,
+        key="overdue_items_report"
+    )
+
+def utilization_report():
+    """Report on how much of the time equipment is checked out"""
+    st.subheader("Equipment Utilization Report")
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        start_date = st.date_input(
+            "Start Date",
+            value=datetime.date.today() - datetime.timedelta(days=90),
+            key="utilization_start"
+        )
+    
+    with col2:
+        end_date = st.date_input(
+            "End Date",
+            value=datetime.date.today(),
+            key="utilization_end"
+        )
+    
+    with col3:
+        bucket = st.selectbox("Group By", list(UTILIZATION_FREQUENCIES), index=1, key="utilization_bucket")
+    
+    if start_date > end_date:
+        st.error("The start date must not be after the end date.")
+        return
+    
+    intervals = load_intervals(start_date, end_date)
+    
+    if intervals.empty:
+        st.info(f"No equipment was checked out between {start_date:%Y-%m-%d} and {end_date:%Y-%m-%d}.")
+        return
+    
+    # Peak number of items out at once
+    peak = peak_concurrency(intervals).iloc[0]
+    st.metric("Peak Checked Out", f"{peak['peak']:,}", help=f"First reached on {peak['first_reached']:%Y-%m-%d}")
+    
+    # Heatmap of the share of each category's item-days spent checked out
+    timeline = utilization_timeline(
+        intervals, start_date, end_date,
+        freq=UTILIZATION_FREQUENCIES[bucket],
+        group_sizes=category_sizes()
+    )
+    
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(10, max(2, 0.5 * len(timeline.columns))))
+    heatmap = ax.imshow(timeline.T.to_numpy(), aspect="auto", cmap="Blues", vmin=0, vmax=1)
+    ax.set_yticks(range(len(timeline.columns)))
+    ax.set_yticklabels(timeline.columns)
+    
+    # Label at most about a dozen buckets along the time axis
+    step = max(1, len(timeline) // 12)
+    ax.set_xticks(range(0, len(timeline), step))
+    ax.set_xticklabels([f"{day:%Y-%m-%d}" for day in timeline.index[::step]], rotation=45, ha="right")
+    ax.set_title(f"Utilization by Category and {bucket}")
+    fig.colorbar(heatmap, ax=ax, label="Share of time checked out")
+    plt.tight_layout()
+    
+    st.pyplot(fig)
+    
+    # Peak concurrency per category
+    st.subheader("Peak Concurrency by Category")
+    st.dataframe(peak_concurrency(intervals, by="category"), use_container_width=True)
+    
+    # Most utilized individual items over the whole range
+    st.subheader("Most Utilized Equipment")
+    st.dataframe(asset_utilization(intervals, start_date, end_date).head(TOP_UTILIZED_ROWS), use_container_width=True)
\ No newline at end of file
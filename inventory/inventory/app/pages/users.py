@@ -1,10 +1,26 @@
 import streamlit as st
-import pandas as pd
 import datetime
 
-from ...utils.database import get_users, save_users, get_equipment, save_equipment
-from ...utils.constants import ROLES
+from ...utils.database import (
+    get_user,
+    get_items_held_by,
+    update_equipment,
+    transaction,
+    hash_password,
+    query_users,
+    search_users,
+    full_text_query
+)
+from ...utils.constants import ROLES, EQUIPMENT_STATUS, LIST_PAGE_SIZE
+from ...utils.overdue import get_due_items
+from ...utils.equipment_index import get_equipment_index
 from ..auth import change_password, send_email
+from ..pagination import page_cursor, pager
+from ..sections import show_sections
+from ...components.component_loader import load_component
+
+# Selectable grid, replaceable by a custom implementation
+data_table = load_component("data_table")
 
 def show():
     """Display the users management page"""
@@ -16,92 +32,60 @@ def show():
         show_user_profile(st.session_state.username)
         return
     
-    # Create tabs for different user views
-    tab1, tab2, tab3 = st.tabs(["All Users", "Add User", "User Profile"])
-    
-    with tab1:
-        show_user_list()
-    
-    with tab2:
-        add_user_form()
-    
-    with tab3:
-        if "selected_username" in st.session_state:
-            show_user_profile(st.session_state.selected_username)
-        else:
-            st.info("Select a user from the 'All Users' tab to view their profile.")
+    # Only the selected view runs, and its widgets rerun only that view
+    show_sections("users", {
+        "All Users": show_user_list,
+        "Add User": add_user_form,
+        "User Profile": selected_user_profile,
+    })
+
+def selected_user_profile():
+    """Show the profile of the user selected in the user list"""
+    if "selected_username" in st.session_state:
+        show_user_profile(st.session_state.selected_username)
+    else:
+        st.info("Select a user from the 'All Users' section to view their profile.")
 
 def show_user_list():
-    """Display a list of all users"""
-    users_df = get_users()
-    
+    """Display a paginated list of all users"""
     # Search filter
     search_term = st.text_input("Search Users", "")
     
-    # Apply search filter
-    if search_term:
-        search_mask = (
-            users_df["username"].str.contains(search_term, case=False, na=False) |
-            users_df["name"].str.contains(search_term, case=False, na=False) |
-            users_df["email"].str.contains(search_term, case=False, na=False) |
-            users_df["department"].str.contains(search_term, case=False, na=False)
-        )
-        filtered_df = users_df[search_mask]
+    # Fetch only the current page, searched in SQL; one extra row tells
+    # the pager whether there is a next page
+    cursor = page_cursor("user_list", search_term)
+    ranked = bool(search_term) and full_text_query(search_term) is not None
+    
+    if ranked:
+        # Results from the full-text index, ranked unless the term is very common
+        page_df = search_users(search_term, after=cursor, limit=LIST_PAGE_SIZE + 1)
     else:
-        filtered_df = users_df
+        # Search terms too short for the index fall back to a LIKE scan
+        page_df = query_users(search=search_term, after_username=cursor, limit=LIST_PAGE_SIZE + 1)
     
     # Display the filtered users
-    if not filtered_df.empty:
-        # First, initialize session state for selected row if not exists
-        if "selected_user_row" not in st.session_state:
-            st.session_state.selected_user_row = None
-        
-        # Create a specialized dataframe for display
-        display_df = filtered_df.copy()
-        
-        # Add a selection column that will contain checkboxes
-        display_df = display_df.reset_index(drop=True)  # Reset index for clean display
-        
-        # Create a checkbox column
-        display_df["Select"] = [
-            "✓" if username == st.session_state.selected_user_row else "" 
-            for username in display_df["username"]
-        ]
+    if not page_df.empty:
+        filtered_df = pager("user_list", page_df, "cursor" if ranked else "username", LIST_PAGE_SIZE)
         
         # Choose columns to display and their order
-        display_cols = ["Select", "username", "name", "email", "role", "department"]
+        display_cols = ["username", "name", "email", "role", "department"]
+        if ranked:
+            display_cols.append("match")
         
-        # Create clickable data frame
+        # Rows are selected in the grid itself; each page of each search has
+        # its own selection, since a selection is a row position
         st.write("Select a user from the list:")
-        clicked = st.dataframe(
-            display_df[display_cols],
-            use_container_width=True,
-            hide_index=True
+        selected = data_table(
+            filtered_df,
+            columns=display_cols,
+            selection="single",
+            key=f"user_grid_{search_term}_{cursor}"
         )
         
-        # Create a list of buttons below the table for easier selection
-        st.write("Or click a user below:")
-        
-        # Create 4 columns for the buttons
-        cols = st.columns(4)
-        
-        # Add a button for each user
-        for i, (idx, row) in enumerate(filtered_df.iterrows()):
-            username = row["username"]
-            col_idx = i % 4
-            
-            # Determine button style based on selection
-            button_type = "primary" if username == st.session_state.selected_user_row else "secondary"
-            
-            # Add the button to the appropriate column
-            if cols[col_idx].button(username, key=f"btn_{username}", type=button_type):
-                st.session_state.selected_user_row = username
-                st.rerun()
-        
         # Show action buttons if a row is selected
-        if st.session_state.selected_user_row:
-            username = st.session_state.selected_user_row
-            st.write(f"Selected: {username} - {filtered_df[filtered_df['username'] == username]['name'].values[0]}")
+        if not selected.empty:
+            username = selected["username"].iloc[0]
+            st.write(f"Selected: {username} - {selected['name'].iloc[0]}")
             
             col1, col2 = st.columns(2)
             with col1:
@@ -136,12 +120,9 @@ def show_user_list():
 
 def show_user_profile(username):
     """Display profile for a selected user"""
-    users_df = get_users()
-    user = users_df[users_df["username"] == username]
+    user = get_user(username)
     
-    if not user.empty:
-        user = user.iloc[0]
-        
+    if user is not None:
         col1, col2 = st.columns(2)
         
         with col1:
@@ -166,21 +147,20 @@ def show_user_profile(username):
         # Show equipment checked out by user
         st.subheader("Checked Out Equipment")
         
-        equipment_df = get_equipment()
-        user_equipment = equipment_df[equipment_df["checked_out_by"] == username]
+        index = get_equipment_index()
+        user_equipment = index.frame(index.skus(holder=username))
         
         if not user_equipment.empty:
             st.dataframe(user_equipment[["sku", "name", "checkout_date", "due_date"]], use_container_width=True)
             
-            # Check for overdue items
-            today = datetime.datetime.now().strftime("%Y-%m-%d")
-            overdue_items = user_equipment[user_equipment["due_date"] < today]
+            # Check for overdue items, as found by the overdue scanner
+            overdue_items = get_due_items(username=username, bucket="overdue")
             
             if not overdue_items.empty:
                 st.warning(f"This user has {len(overdue_items)} overdue item(s).")
                 
                 if st.button("Send Reminder Email"):
-                    send_reminder_email(username, overdue_items)
+                    send_reminder_email(username)
         else:
             st.info("This user has no equipment checked out.")
         
@@ -234,17 +214,17 @@ def show_user_profile(username):
                     elif reset_password and not new_password:
                         st.error("New password is required when resetting password.")
                     else:
-                        # Update the user in the DataFrame
-                        users_df.loc[users_df["username"] == username, "name"] = name
-                        users_df.loc[users_df["username"] == username, "email"] = email
-                        users_df.loc[users_df["username"] == username, "role"] = role
-                        users_df.loc[users_df["username"] == username, "department"] = department
-                        
+                        # Update only this user's row
+                        fields = {"name": name, "email": email, "role": role, "department": department}
                         if reset_password:
-                            users_df.loc[users_df["username"] == username, "password"] = new_password  # In production, use hashed passwords
+                            fields["password"] = hash_password(new_password)
+                        assignments = ", ".join(f"{column} = ?" for column in fields)
                         
-                        # Save the updated DataFrame
-                        save_users(users_df)
+                        with transaction("users") as conn:
+                            conn.execute(
+                                f"UPDATE users SET {assignments} WHERE username = ?",
+                                tuple(fields.values()) + (username,)
+                            )
                         
                         # Clear the edit flag
                         del st.session_state.edit_user
@@ -277,62 +257,52 @@ def add_user_form():
             elif password != confirm_password:
                 st.error("Passwords do not match.")
             else:
-                users_df = get_users()
+                # A single insert; the primary key rejects a username that
+                # exists already, even one added at the same moment
+                with transaction("users") as conn:
+                    added = conn.execute('''
+                    INSERT INTO users (username, email, password, role, name, department, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (username) DO NOTHING
+                    ''', (
+                        username, email, hash_password(password), role, name, department,
+                        datetime.datetime.now().isoformat()
+                    )).rowcount
                 
-                # Check if username already exists
-                if username in users_df["username"].values:
+                if not added:
                     st.error(f"Username '{username}' already exists.")
                     return
                 
-                # Add the new user to the DataFrame
-                new_user = {
-                    "username": username,
-                    "email": email,
-                    "password": password,  # In production, use hashed passwords
-                    "role": role,
-                    "name": name,
-                    "department": department,
-                    "created_at": datetime.datetime.now().isoformat()
-                }
-                
-                # Append the new user
-                users_df = pd.concat([users_df, pd.DataFrame([new_user])], ignore_index=True)
-                
-                # Save the updated DataFrame
-                save_users(users_df)
-                
                 st.success(f"User '{username}' added successfully!")
 
 def delete_user(username):
     """Delete a user from the system"""
-    users_df = get_users()
-    
-    # Check for equipment currently checked out by the user
-    equipment_df = get_equipment()
-    user_equipment = equipment_df[equipment_df["checked_out_by"] == username]
-    
-    if not user_equipment.empty:
-        # Mark all equipment as returned
-        equipment_df.loc[equipment_df["checked_out_by"] == username, "status"] = "In Stock"
-        equipment_df.loc[equipment_df["checked_out_by"] == username, "checked_out_by"] = None
-        equipment_df.loc[equipment_df["checked_out_by"] == username, "checkout_date"] = None
-        equipment_df.loc[equipment_df["checked_out_by"] == username, "due_date"] = None
+    with transaction("users", "equipment") as conn:
+        # Read under the write lock, so nothing can be checked out to the
+        # user between the read and the delete
+        user_equipment = get_items_held_by(username)
+        if not user_equipment.empty:
+            # Mark all equipment as returned
+            update_equipment(
+                user_equipment["sku"].tolist(),
+                status=EQUIPMENT_STATUS["in_stock"],
+                checked_out_by=None,
+                checkout_date=None,
+                due_date=None
+            )
         
-        # Save the updated equipment data
-        save_equipment(equipment_df)
-    
-    # Remove the user
-    users_df = users_df[users_df["username"] != username]
-    
-    # Save the updated DataFrame
-    save_users(users_df)
+        # Remove the user in the same transaction
+        conn.execute("DELETE FROM users WHERE username = ?", (username,))
     
     st.success(f"User '{username}' deleted successfully!")
 
-def send_reminder_email(username, overdue_items):
-    """Send a reminder email to a user with overdue items"""
-    users_df = get_users()
-    user = users_df[users_df["username"] == username].iloc[0]
+def send_reminder_email(username):
+    """Send a reminder email to a user about their overdue items"""
+    overdue_items = get_due_items(username=username, bucket="overdue")
+    if overdue_items.empty:
+        return
+    
+    user = get_user(username)
     user_email = user["email"]
     
     subject = "Reminder: Overdue Lab Equipment"
@@ -0,0 +1,43 @@
+import streamlit as st
+
+def page_cursor(key, filters):
+    """Get the keyset cursor for the current page of a paginated list
+    
+    Returns None for the first page, otherwise the last key of the previous
+    page. The list starts over at the first page whenever ``filters`` change.
+    """
+    state_key = f"{key}_pages"
+    state = st.session_state.get(state_key)
+    
+    if state is None or state["filters"] != filters:
+        state = {"filters": filters, "cursors": [None]}
+        st.session_state[state_key] = state
+    
+    return state["cursors"][-1]
+
+def pager(key, page_df, column, page_size):
+    """Show previous/next controls for a page fetched with ``page_size + 1`` rows
+    
+    The extra row only tells us whether a next page exists. Returns the rows
+    to display.
+    """
+    state = st.session_state[f"{key}_pages"]
+    has_next = len(page_df) > page_size
+    rows = page_df.head(page_size)
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    
+    with col1:
+        if st.button("Previous", key=f"{key}_prev", disabled=len(state["cursors"]) == 1):
+            state["cursors"].pop()
+            st.rerun()
+    
+    with col2:
+        st.write(f"Page {len(state['cursors'])}")
+    
+    with col3:
+        if st.button("Next", key=f"{key}_next", disabled=not has_next):
+            state["cursors"].append(rows[column].iloc[-1])
+            st.rerun()
+    
+    return rows
@@ -0,0 +1,21 @@
+import streamlit as st
+
+def show_sections(key, sections):
+    """Let the user pick one section of a page and run only that section
+    
+    ``sections`` maps each section label to the function that draws it.
+    Unlike st.tabs, sections that are not selected do not run at all. The
+    selected section runs as a fragment, so interacting with its widgets
+    reruns only that section instead of the whole page.
+    """
+    labels = list(sections)
+    selected = st.segmented_control(
+        "Section",
+        labels,
+        default=labels[0],
+        required=True,
+        key=f"{key}_section",
+        label_visibility="collapsed"
+    )
+    
+    st.fragment(sections[selected])()
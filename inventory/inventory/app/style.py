@@ -0,0 +1,79 @@
+from ..utils.constants import DELL_BLUE, DELL_DARK, DELL_DARK_SECONDARY
+
+# Dell corporate styling with dark mode, built once per process and added to
+# every page by app.py
+APP_STYLE = f"""
+<style>
+.reportview-container .main .block-container{{
+    max-width: 1200px;
+}}
+.stApp {{
+    background-color: {DELL_DARK};
+    color: white;
+}}
+.stButton>button {{
+    background-color: {DELL_BLUE};
+    color: white;
+}}
+/* Sidebar styling */
+section[data-testid="stSidebar"] {{
+    background-color: {DELL_DARK_SECONDARY};
+    color: white;
+}}
+/* Section picker of pages split into sections (see sections.py) */
+div[data-testid="stButtonGroup"] button[kind="segmented_control"] {{
+    background-color: {DELL_DARK_SECONDARY};
+    color: white;
+}}
+div[data-testid="stButtonGroup"] button[kind="segmented_controlActive"] {{
+    background-color: {DELL_BLUE};
+    border-color: {DELL_BLUE};
+    color: white;
+}}
+/* Tabs that remain inside sections and on the details and scanner pages */
+div.stTabs [data-baseweb="tab-panel"] {{
+    background-color: {DELL_DARK_SECONDARY};
+    padding: 15px;
+    border-radius: 5px;
+}}
+div.stTabs [data-baseweb="tab-list"] {{
+    background-color: {DELL_DARK};
+}}
+div.stTabs [data-baseweb="tab-border"] {{
+    background-color: {DELL_BLUE};
+}}
+div.stTabs [data-baseweb="tab"] {{
+    color: white;
+}}
+div.stTabs [data-baseweb="tab-highlight"] {{
+    background-color: {DELL_BLUE};
+}}
+/* Card/container styling */
+div[data-testid="stForm"] {{
+    background-color: {DELL_DARK_SECONDARY};
+    padding: 15px;
+    border-radius: 5px;
+}}
+/* Text inputs */
+div[data-baseweb="input"] {{
+    background-color: {DELL_DARK};
+}}
+div[data-baseweb="input"] input {{
+    color: white !important;
+}}
+/* Select inputs */
+div[data-baseweb="select"] {{
+    background-color: {DELL_DARK};
+}}
+div[data-baseweb="select"] [data-testid="stMarkdownContainer"] {{
+    color: white;
+}}
+/* DataFrames */
+.stDataFrame {{
+    background-color: {DELL_DARK_SECONDARY};
+}}
+.dataframe {{
+    color: white;
+}}
+</style>
+"""
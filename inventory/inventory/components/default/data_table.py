@@ -1,9 +1,13 @@
 import streamlit as st
 import pandas as pd
 
-def data_table(df, columns=None, use_container_width=True, height=None, selection=None, key=None):
+def data_table(df, columns=None, use_container_width=True, height=None, selection=None, key=None, page_size=None):
     """
-    Enhanced data table with sorting and optional column selection.
+    Paginated data table with native row selection.
+    
+    Rows are selected by clicking them in the grid, so the table is a single
+    widget however many rows it shows. The grid only draws the rows in view,
+    and with ``page_size`` only the current page is sent to the browser.
     
     Args:
         df (pd.DataFrame): The DataFrame to display
@@ -12,25 +16,39 @@ def data_table(df, columns=None, use_container_width=True, height=None, selectio
         height (int): Optional height specification
         selection (str): Selection mode ('single' or 'multi')
         key (str): Key for the component
+        page_size (int): Rows per page (default: no paging, e.g. when the
+            caller already fetched a single page)
     
     Returns:
-        list: Selected rows if selection is enabled
+        pd.DataFrame: The selected rows, with all columns of ``df``, if
+        selection is enabled
     """
     if df.empty:
         st.info("No data to display.")
-        return None
-    
-    # Use specified columns or all columns
-    display_df = df[columns] if columns else df
+        return df.iloc[:0] if selection else None
     
     # Generate key if not provided
     if key is None:
         key = f"data_table_{id(df)}"
     
+    # Keep only the current page
+    if page_size and len(df) > page_size:
+        page_count = (len(df) - 1) // page_size + 1
+        page = st.number_input(
+            f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, key=f"{key}_page"
+        )
+        df = df.iloc[(page - 1) * page_size:page * page_size]
+        # Row positions are per page, so each page keeps its own selection
+        key = f"{key}_{page}"
+    
+    # Use specified columns or all columns
+    display_df = df[columns] if columns else df
+    
     # Set up table options
     table_args = {
         "data": display_df,
         "use_container_width": use_container_width,
+        "hide_index": True,
         "key": key
     }
     
@@ -39,20 +57,16 @@ def data_table(df, columns=None, use_container_width=True, height=None, selectio
         table_args["height"] = height
     
     # Handle selection modes
-    if selection == "single":
-        return st.data_editor(
-            **table_args,
-            disabled=True,
-            num_rows="fixed",
-            selection_mode="single"
-        )
-    elif selection == "multi":
-        return st.data_editor(
+    if selection in ("single", "multi"):
+        event = st.dataframe(
             **table_args,
-            disabled=True,
-            num_rows="fixed",
-            selection_mode="multi"
+            on_select="rerun",
+            selection_mode=f"{selection}-row"
         )
+        # A stored selection may point past the end of rows that changed
+        rows = [row for row in event.selection.rows if row < len(df)]
+        return df.iloc[rows]
     else:
         # Standard display with no selection
-        return st.dataframe(**table_args)
\ No newline at end of file
+        st.dataframe(**table_args)
+        return None
\ No newline at end of file
@@ -0,0 +1,100 @@
+import datetime
+import numpy as np
+import pandas as pd
+from .database import get_db_connection, cached_query, apply_column_types
+from .utilization import UNCATEGORIZED
+
+# Percentiles reported for checkout durations
+DURATION_PERCENTILES = (50, 90, 99)
+
+def _window_bounds(start_date, end_date):
+    """Get ISO bounds covering start_date up to and including end_date"""
+    return start_date.isoformat(), (end_date + datetime.timedelta(days=1)).isoformat()
+
+def _load_window(start, end):
+    """Read and type the checkouts in a date window"""
+    conn = get_db_connection()
+    history = pd.read_sql_query('''
+    SELECT h.id, h.sku, h.user, e.category, h.checkout_date, h.due_date, h.return_date
+    FROM checkout_history h
+    LEFT JOIN equipment e ON e.sku = h.sku
+    WHERE h.checkout_date >= ? AND h.checkout_date < ?
+    ''', conn, params=(start, end))
+    
+    # Items without a category get a group of their own, as in utilization
+    history["category"] = history["category"].fillna(UNCATEGORIZED)
+    apply_column_types(history, categorical=("category", "user"))
+    
+    # Whole days out for returned items, NaN while still checked out
+    history["duration_days"] = (history["return_date"] - history["checkout_date"]).dt.days
+    history["returned_late"] = history["return_date"] > history["due_date"]
+    return history
+
+def load_history_window(start_date, end_date):
+    """Get checkouts made from start_date through end_date for analysis
+    
+    The date window is applied in SQL. Dates come back as datetime64 with
+    ``duration_days`` and ``returned_late`` precomputed, and the item's
+    current category joined in.
+    """
+    start, end = _window_bounds(start_date, end_date)
+    # Cached until either table is written to
+    return cached_query(
+        ("checkout_history", "equipment"), "history_window", (start, end),
+        lambda: _load_window(start, end)
+    )
+
+def recent_checkouts(start_date, end_date, limit):
+    """Get the most recent full checkout records in a date window"""
+    conn = get_db_connection()
+    return pd.read_sql_query('''
+    SELECT * FROM checkout_history
+    WHERE checkout_date >= ? AND checkout_date < ?
+    ORDER BY checkout_date DESC, id DESC
+    LIMIT ?
+    ''', conn, params=_window_bounds(start_date, end_date) + (limit,))
+
+def duration_summary(history):
+    """Summarize checkout durations and late returns for a history window
+    
+    Returns a dict with checkout and return counts, the mean and
+    percentile durations in days (NaN when nothing was returned) and the
+    share of returned items that came back after their due date.
+    """
+    durations = history["duration_days"].to_numpy(dtype=float)
+    returned = durations[~np.isnan(durations)]
+    
+    summary = {
+        "checkouts": len(history),
+        "returned": len(returned),
+        "mean_days": returned.mean() if len(returned) else np.nan,
+    }
+    percentiles = np.percentile(returned, DURATION_PERCENTILES) if len(returned) else [np.nan] * len(DURATION_PERCENTILES)
+    for percentile, value in zip(DURATION_PERCENTILES, percentiles):
+        summary[f"p{percentile}_days"] = value
+    
+    late = int(history["returned_late"].sum())
+    summary["late_returns"] = late
+    summary["late_rate"] = late / len(returned) if len(returned) else np.nan
+    return summary
+
+def duration_breakdown(history, by):
+    """Break down checkouts, durations and late returns by a column
+    
+    ``by`` is e.g. "category" or "user". Returns one row per group, busiest
+    first, with the same figures as duration_summary().
+    """
+    grouped = history.groupby(by, observed=True)
+    breakdown = grouped.agg(
+        checkouts=("id", "size"),
+        returned=("duration_days", "count"),
+        mean_days=("duration_days", "mean"),
+        late_returns=("returned_late", "sum"),
+    )
+    
+    percentiles = grouped["duration_days"].quantile([p / 100 for p in DURATION_PERCENTILES]).unstack()
+    percentiles.columns = [f"p{percentile}_days" for percentile in DURATION_PERCENTILES]
+    breakdown = breakdown.join(percentiles)
+    
+    breakdown["late_rate"] = breakdown["late_returns"] / breakdown["returned"].replace(0, np.nan)
+    return breakdown.sort_values("checkouts", ascending=False).reset_index()
@@ -0,0 +1,229 @@
+import sys
+import argparse
+import datetime
+import importlib.util
+from contextlib import nullcontext
+import pandas as pd
+from .database import add_equipment_rows, allocate_skus, bulk_equipment_insert, find_existing_serials
+from .constants import EQUIPMENT_STATUS
+
+# Columns an import file may contain; only name is required
+IMPORT_COLUMNS = (
+    "name", "description", "category", "manufacturer", "model",
+    "serial_number", "purchase_date", "purchase_price", "status", "location"
+)
+
+# Rows read, validated and inserted per step
+IMPORT_CHUNK_ROWS = 10000
+
+# Imported items have no holder, so they cannot start out checked out
+IMPORT_STATUSES = {
+    name: label for name, label in EQUIPMENT_STATUS.items() if name != "checked_out"
+}
+
+# Columns of the row-level error report
+ERROR_COLUMNS = ["row", "column", "value", "error"]
+
+def available_import_types():
+    """Get the file extensions importable with the installed packages"""
+    if importlib.util.find_spec("openpyxl") is None:
+        return ["csv"]
+    return ["csv", "xlsx"]
+
+def _normalize_header(columns):
+    """Map headers such as 'Serial Number' to column names such as serial_number"""
+    return [str(column).strip().lower().replace(" ", "_") for column in columns]
+
+def _check_header(columns):
+    """Reject files with unknown columns or without a name column"""
+    unknown = [column for column in columns if column not in IMPORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown import columns: {', '.join(unknown)}")
+    if "name" not in columns:
+        raise ValueError("The import file needs a name column")
+
+def _read_csv_chunks(source):
+    """Yield CSV rows as string DataFrames of IMPORT_CHUNK_ROWS rows"""
+    yield from pd.read_csv(
+        source, dtype=str, keep_default_na=False, encoding="utf-8-sig", chunksize=IMPORT_CHUNK_ROWS
+    )
+
+def _excel_value(value):
+    """Turn an Excel cell into the same text a CSV export would contain"""
+    if value is None:
+        return ""
+    if isinstance(value, datetime.datetime):
+        return value.date().isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def _read_excel_chunks(source):
+    """Yield the first worksheet as string DataFrames, streamed row by row"""
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [_excel_value(value) for value in next(rows, ())]
+        
+        chunk = []
+        for row in rows:
+            chunk.append([_excel_value(value) for value in row[:len(header)]])
+            if len(chunk) == IMPORT_CHUNK_ROWS:
+                yield pd.DataFrame(chunk, columns=header)
+                chunk = []
+        if chunk or not header:
+            yield pd.DataFrame(chunk, columns=header)
+    finally:
+        workbook.close()
+
+def read_import_chunks(source, file_name=None):
+    """Read a CSV or Excel file as chunks of IMPORT_COLUMNS, all as text
+    
+    ``source`` is a path or a file object such as a Streamlit upload; the
+    format comes from ``file_name`` or the path. Each chunk is indexed by
+    the file's line numbers, counting the header as line 1.
+    """
+    file_name = file_name or getattr(source, "name", None) or str(source)
+    if file_name.lower().endswith(".xlsx"):
+        chunks = _read_excel_chunks(source)
+    else:
+        chunks = _read_csv_chunks(source)
+    
+    line = 2
+    for chunk in chunks:
+        chunk.columns = _normalize_header(chunk.columns)
+        _check_header(list(chunk.columns))
+        
+        chunk = chunk.reindex(columns=IMPORT_COLUMNS, fill_value="")
+        chunk = chunk.apply(lambda column: column.str.strip())
+        chunk.index = pd.RangeIndex(line, line + len(chunk))
+        line += len(chunk)
+        yield chunk
+
+def validate_chunk(chunk, seen_serials):
+    """Check a chunk of import rows with column-wide operations
+    
+    Returns the chunk converted to equipment values and an error report
+    with one row per problem. ``seen_serials`` holds the serial numbers of
+    earlier chunks and is updated with this one.
+    """
+    errors = []
+    
+    def flag(mask, column, message):
+        if mask.any():
+            errors.append(pd.DataFrame({
+                "row": chunk.index[mask],
+                "column": column,
+                "value": chunk.loc[mask, column].to_numpy(),
+                "error": message,
+            }))
+    
+    flag(chunk["name"] == "", "name", "Name is required")
+    
+    # Statuses may be given as names (in_stock) or labels (In Stock)
+    status_lookup = {key.lower(): label for key, label in IMPORT_STATUSES.items()}
+    status_lookup.update({label.lower(): label for label in IMPORT_STATUSES.values()})
+    statuses = chunk["status"].str.lower().map(status_lookup)
+    statuses = statuses.mask(chunk["status"] == "", IMPORT_STATUSES["in_stock"])
+    flag(statuses.isna(), "status", f"Status must be one of: {', '.join(IMPORT_STATUSES.values())}")
+    
+    dates = pd.to_datetime(chunk["purchase_date"], format="ISO8601", errors="coerce")
+    flag(dates.isna() & (chunk["purchase_date"] != ""), "purchase_date", "Date must be YYYY-MM-DD")
+    
+    prices = pd.to_numeric(chunk["purchase_price"].str.replace(",", "", regex=False), errors="coerce")
+    flag(prices.isna() & (chunk["purchase_price"] != ""), "purchase_price", "Price must be a number")
+    flag(prices < 0, "purchase_price", "Price cannot be negative")
+    
+    serials = chunk["serial_number"]
+    has_serial = serials != ""
+    # Membership in the set of earlier serials is a hash lookup per row; isin()
+    # would copy the whole set for every chunk
+    earlier = pd.Series([serial in seen_serials for serial in serials], index=serials.index, dtype=bool)
+    existing = find_existing_serials(serials[has_serial & ~earlier].unique())
+    flag(has_serial & ~earlier & serials.isin(existing), "serial_number", "Serial number already belongs to other equipment")
+    
+    # Only rows without other errors are imported, so only they claim their
+    # serial number; a rejected row does not get a later copy rejected too
+    rejected = chunk.index.isin(pd.concat([error["row"] for error in errors])) if errors else False
+    claims = has_serial & ~rejected
+    in_file = has_serial & (earlier | (claims & serials.where(claims).duplicated()))
+    flag(in_file, "serial_number", "Serial number appears earlier in the file")
+    seen_serials.update(serials[claims & ~in_file])
+    
+    values = chunk.replace("", None)
+    values["status"] = statuses
+    values["purchase_date"] = dates.dt.strftime("%Y-%m-%d")
+    values["purchase_price"] = prices
+    
+    report = pd.concat(errors, ignore_index=True) if errors else pd.DataFrame(columns=ERROR_COLUMNS)
+    return values, report
+
+def import_equipment(source, file_name=None, dry_run=False):
+    """Validate an equipment file and insert its valid rows
+    
+    The file is streamed in chunks; each chunk is validated, gets a block
+    of SKUs and is inserted with executemany(), all in one transaction
+    that indexes the new rows for search once at the end.
+    Rows with errors are skipped and listed in the report. With
+    ``dry_run`` nothing is written. Returns a dict with the row counts,
+    the first and last new SKU and the error report sorted by row.
+    """
+    result = {"rows": 0, "imported": 0, "first_sku": None, "last_sku": None}
+    reports = []
+    seen_serials = set()
+    now = datetime.datetime.now().isoformat()
+    columns = ("sku",) + IMPORT_COLUMNS + ("created_at", "updated_at")
+    
+    # A dry run only reads, so it takes no write lock
+    with nullcontext() if dry_run else bulk_equipment_insert():
+        for chunk in read_import_chunks(source, file_name):
+            values, report = validate_chunk(chunk, seen_serials)
+            valid = values[~values.index.isin(report["row"])]
+            result["rows"] += len(chunk)
+            reports.append(report)
+            
+            if dry_run or valid.empty:
+                continue
+            
+            skus = allocate_skus(len(valid))
+            rows = valid.astype(object).where(valid.notna(), None)
+            rows.insert(0, "sku", skus)
+            rows["created_at"] = now
+            rows["updated_at"] = now
+            
+            result["imported"] += add_equipment_rows(columns, rows.itertuples(index=False, name=None))
+            result["first_sku"] = result["first_sku"] or skus[0]
+            result["last_sku"] = skus[-1]
+    
+    errors = pd.concat(reports, ignore_index=True) if reports else pd.DataFrame(columns=ERROR_COLUMNS)
+    result["errors"] = errors.sort_values("row", kind="stable").reset_index(drop=True)
+    result["invalid_rows"] = errors["row"].nunique()
+    return result
+
+def main(argv=None):
+    """Command line entry point: python -m inventory.utils.bulk_import FILE"""
+    parser = argparse.ArgumentParser(description="Import equipment from a CSV or Excel file")
+    parser.add_argument("file", help="CSV or .xlsx file with a header row")
+    parser.add_argument("--dry-run", action="store_true", help="only validate the file")
+    parser.add_argument("--errors", metavar="CSV", help="write the row-level error report here")
+    args = parser.parse_args(argv)
+    
+    result = import_equipment(args.file, dry_run=args.dry_run)
+    
+    action = "Validated" if args.dry_run else "Imported"
+    count = result["rows"] - result["invalid_rows"] if args.dry_run else result["imported"]
+    print(f"{action} {count} of {result['rows']} rows; {result['invalid_rows']} rows have errors")
+    if result["first_sku"]:
+        print(f"New SKUs: {result['first_sku']} to {result['last_sku']}")
+    
+    if args.errors:
+        result["errors"].to_csv(args.errors, index=False)
+    elif len(result["errors"]):
+        print(result["errors"].head(20).to_string(index=False))
+    
+    return 1 if len(result["errors"]) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -25,4 +25,26 @@ EQUIPMENT_STATUS = {
 }
 
 # Default checkout duration in days
-DEFAULT_CHECKOUT_DAYS = 14
\ No newline at end of file
+DEFAULT_CHECKOUT_DAYS = 14
+
+# Equipment SKU format: prefix followed by a zero-padded sequence number.
+# Numbers that outgrow the padding simply get longer (LAB-99999, LAB-100000).
+SKU_PREFIX = "LAB-"
+SKU_DIGITS = 5
+
+# Number of rows shown per page in the equipment and user lists
+LIST_PAGE_SIZE = 50
+
+
+# Items due within this many days (after today) count as due soon
+DUE_SOON_DAYS = 3
+
+# Seconds between runs of the background overdue scanner
+OVERDUE_SCAN_INTERVAL = 300
+
+# Outgoing email: messages sent per SMTP session, delivery attempts before a
+# message is marked failed, and the first and longest retry delays in seconds
+EMAIL_BATCH_SIZE = 50
+EMAIL_MAX_ATTEMPTS = 5
+EMAIL_RETRY_SECONDS = 30
+EMAIL_RETRY_MAX_SECONDS = 3600
\ No newline at end of file
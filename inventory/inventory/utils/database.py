@@ -1,251 +1,1643 @@
 import os
 import sqlite3
 import json
+import threading
 import pandas as pd
 import datetime
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from pathlib import Path
 import hashlib
-from .constants import DATA_PATH
+from .constants import DATA_PATH, SKU_PREFIX, SKU_DIGITS, LIST_PAGE_SIZE, EQUIPMENT_STATUS
 
-# Ensure data directory exists
-Path(DATA_PATH).mkdir(exist_ok=True)
+# Name of the sequence that hands out equipment SKU numbers
+SKU_SEQUENCE = "equipment_sku"
 
 # Database file path
 DB_FILE = os.path.join(DATA_PATH, "inventory.db")
 IMAGES_DIR = os.path.join(DATA_PATH, "images")
 
-# Ensure images directory exists
-Path(IMAGES_DIR).mkdir(exist_ok=True)
+# Pragmas applied to every pooled connection. WAL lets readers proceed while
+# a checkout commits; the busy timeout makes writers wait instead of failing.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+    # REPLACE must fire delete triggers so the search index stays in sync
+    "PRAGMA recursive_triggers = ON",
+)
 
-def get_db_connection():
-    """Get a connection to the SQLite database"""
-    conn = sqlite3.connect(DB_FILE)
+# Number of prepared statements kept per connection
+STATEMENT_CACHE_SIZE = 256
+
+# Connection pool: each thread keeps one connection for as long as it lives,
+# after which the connection is handed to the next thread that needs one
+_pool_lock = threading.Lock()
+_idle_connections = []
+_bound_connections = {}
+_local = threading.local()
+
+# Lazy initialization state; see ensure_initialized()
+_init_lock = threading.RLock()
+_initialized = False
+_initializing = False
+
+# Tables whose contents are cached across reruns by _cached_read()
+CACHED_TABLES = ("users", "equipment", "checkout_history")
+
+# Column types applied by apply_column_types(). Low-cardinality text
+# becomes categorical; dates (plain or with a time) become datetime64.
+CATEGORICAL_COLUMNS = ("status", "category", "role")
+DATE_COLUMNS = (
+    "purchase_date", "checkout_date", "due_date", "return_date",
+    "created_at", "updated_at"
+)
+
+# Bounds for the shared table cache; least recently used entries go first
+DATA_CACHE_MAX_ENTRIES = 16
+DATA_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Shared table cache, keyed by table and column projection. Each
+# table has a version in the table_versions table that transaction() bumps
+# in the same transaction as the write, so every process sees a write and
+# the new version together. A cached copy is valid for exactly as long as
+# its version is unchanged; see _committed_versions().
+_cache_lock = threading.Lock()
+_data_cache = OrderedDict()
+_cache_bytes = 0
+_cache_stats = {"hits": 0, "misses": 0, "evictions": 0, "request_hits": 0}
+
+# SKUs written by recent equipment commits of this process, as (table
+# version, SKUs) with None for "unknown", so in-memory views can catch up
+# row by row; see equipment_changes_since()
+EQUIPMENT_JOURNAL_SIZE = 1000
+_equipment_journal = deque(maxlen=EQUIPMENT_JOURNAL_SIZE)
+
+def _open_connection():
+    """Open and tune a new SQLite connection for the pool"""
+    conn = sqlite3.connect(
+        DB_FILE,
+        timeout=5.0,
+        isolation_level=None,  # Transactions are managed by transaction()
+        check_same_thread=False,  # Connections move between threads via the pool
+        cached_statements=STATEMENT_CACHE_SIZE
+    )
     conn.row_factory = sqlite3.Row  # This enables column access by name
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def _reclaim_connections():
+    """Return connections held by finished threads to the idle pool"""
+    for thread in [thread for thread in _bound_connections if not thread.is_alive()]:
+        conn = _bound_connections.pop(thread)
+        if conn.in_transaction:
+            conn.rollback()
+        _idle_connections.append(conn)
+
+def get_db_connection():
+    """Get the current thread's pooled connection to the SQLite database
+    
+    The connection is shared by everything running on this thread and must
+    not be closed by the caller.
+    """
+    if not _initialized:
+        ensure_initialized()
+    
+    conn = getattr(_local, "conn", None)
+    if conn is None or _bound_connections.get(threading.current_thread()) is not conn:
+        with _pool_lock:
+            _reclaim_connections()
+            conn = _idle_connections.pop() if _idle_connections else None
+            if conn is None:
+                conn = _open_connection()
+            _bound_connections[threading.current_thread()] = conn
+        _local.conn = conn
+        _local.depth = 0
+        _local.versions = None
     return conn
 
+@contextmanager
+def transaction(*tables):
+    """Run a block of statements in a single transaction
+    
+    The outermost block takes the write lock up front with BEGIN IMMEDIATE
+    and commits on success or rolls back on error. Nested blocks run in a
+    savepoint inside the enclosing transaction.
+    
+    ``tables`` names the cached tables the block writes to. Their versions
+    are bumped as part of the outermost transaction, which invalidates
+    their cached copies in every process. Blocks writing equipment also
+    report the SKUs with _note_equipment_skus().
+    """
+    conn = get_db_connection()
+    depth = _local.depth
+    savepoint = f"sp_{depth}"
+    
+    conn.execute("BEGIN IMMEDIATE" if depth == 0 else f"SAVEPOINT {savepoint}")
+    if depth == 0:
+        _local.changed_tables = set()
+        _local.changed_skus = set()
+    _local.changed_tables.update(tables)
+    _local.depth = depth + 1
+    try:
+        yield conn
+        if depth == 0:
+            versions = _bump_table_versions(conn, _local.changed_tables)
+    except BaseException:
+        _local.depth = depth
+        if depth == 0:
+            conn.execute("ROLLBACK")
+        else:
+            conn.execute(f"ROLLBACK TO {savepoint}")
+            conn.execute(f"RELEASE {savepoint}")
+        raise
+    else:
+        _local.depth = depth
+        if depth == 0:
+            conn.execute("COMMIT")
+            _local.versions = None
+            _tables_changed(versions, _local.changed_skus)
+        else:
+            conn.execute(f"RELEASE {savepoint}")
+
+def close_db_connections():
+    """Close every pooled connection, e.g. on shutdown or between tests
+    
+    The table cache and the equipment journal are emptied too: table
+    versions are only comparable within one database, and the next
+    connection may open another one.
+    """
+    with _pool_lock:
+        for conn in _idle_connections + list(_bound_connections.values()):
+            conn.close()
+        _idle_connections.clear()
+        _bound_connections.clear()
+    _local.__dict__.clear()
+    with _cache_lock:
+        _drop_cache_entries()
+        _equipment_journal.clear()
+
+def _key_tables(key):
+    """Get the tables a cache entry was read from; see cached_query()"""
+    return key[0] if isinstance(key[0], tuple) else (key[0],)
+
+def _drop_cache_entries(tables=None):
+    """Drop cached reads of the given tables, or of every table
+    
+    Must be called with _cache_lock held.
+    """
+    global _cache_bytes
+    
+    for key in [key for key in _data_cache if tables is None or not set(tables).isdisjoint(_key_tables(key))]:
+        _cache_bytes -= _data_cache.pop(key)[2]
+
+def _note_equipment_skus(skus):
+    """Record the SKUs the current transaction writes, or None if unknown"""
+    if skus is None:
+        _local.changed_skus = None
+    elif _local.changed_skus is not None:
+        _local.changed_skus.update(skus)
+
+def _bump_table_versions(conn, tables):
+    """Bump the versions of the cached ``tables`` in the open transaction
+    
+    Returns the new version of each table.
+    """
+    tables = [table for table in tables if table in CACHED_TABLES]
+    if not tables:
+        return {}
+    return dict(conn.execute(
+        "UPDATE table_versions SET version = version + 1 WHERE name IN (SELECT value FROM json_each(?)) RETURNING name, version",
+        (json.dumps(tables),)
+    ).fetchall())
+
+def _tables_changed(versions, skus=None):
+    """Record a committed write; ``versions`` has the new version of each table written"""
+    with _cache_lock:
+        if "equipment" in versions:
+            # An equipment write that named no SKUs may have changed any row
+            _equipment_journal.append((versions["equipment"], frozenset(skus) if skus else None))
+        # Entries of the old versions are never served again
+        _drop_cache_entries(versions)
+
+def _committed_versions():
+    """Get the version of every cached table, as this thread's connection sees it
+    
+    The versions are only read again once PRAGMA data_version says another
+    connection, in this process or another one, has committed since, or
+    this thread has committed itself; otherwise this is a single pragma.
+    """
+    conn = get_db_connection()
+    data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+    if _local.versions is None or data_version != _local.data_version:
+        _local.versions = dict(conn.execute("SELECT name, version FROM table_versions").fetchall())
+        _local.data_version = data_version
+    return _local.versions
+
+def apply_column_types(df, categorical=CATEGORICAL_COLUMNS):
+    """Convert the categorical and date columns of a fresh read in place
+    
+    For loaders of derived reads, e.g. through cached_query(). Columns in
+    ``categorical`` become categorical and those in DATE_COLUMNS datetime64;
+    other columns are left as read.
+    """
+    for column in df.columns.intersection(categorical):
+        df[column] = df[column].astype("category")
+    for column in df.columns.intersection(DATE_COLUMNS):
+        # ISO8601 accepts both plain dates and full timestamps
+        df[column] = pd.to_datetime(df[column], format="ISO8601", errors="coerce")
+
+def begin_request():
+    """Start a request scope on this thread, e.g. at the top of a script run
+    
+    Until the next call, table reads on this thread are remembered and
+    shared: each table version is fetched at most once, and column subsets
+    of a table already read in full are taken from that read. Threads that
+    never call this read through the shared cache alone.
+    """
+    _local.request = {"reads": {}, "calls": 0, "queries": 0, "shared": 0}
+
+def request_stats():
+    """Get the table reads of the current request scope and the queries saved
+    
+    ``calls`` counts reads, ``queries`` the ones that ran SQL and
+    ``shared`` those answered by the request scope itself. Returns None
+    outside a request scope.
+    """
+    request = getattr(_local, "request", None)
+    if request is None:
+        return None
+    return {
+        "calls": request["calls"],
+        "queries": request["queries"],
+        "shared": request["shared"],
+        "saved": request["calls"] - request["queries"],
+    }
+
+def _request_read(request, key, version):
+    """Get a read of this request scope that answers ``key`` at ``version``"""
+    entry = request["reads"].get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    
+    # A column subset can be cut from a full read of the same table
+    table, columns = key
+    if columns is not None:
+        entry = request["reads"].get((table, None))
+        if entry is not None and entry[0] == version and set(columns) <= set(entry[1].columns):
+            return entry[1][list(columns)]
+    return None
+
+def _cached_read(table, columns=None):
+    """Read a table, served from the shared cache while it is unchanged
+    
+    ``columns`` limits the read to those columns. Inside a request scope
+    (see begin_request()) repeated reads are answered from the reads
+    already made. Every caller gets its own copy, so modifying the result
+    never affects the cache.
+    """
+    if columns is not None:
+        columns = tuple(columns)
+        invalid = [column for column in columns if not column.isidentifier()]
+        if invalid:
+            raise ValueError(f"Invalid column names: {', '.join(invalid)}")
+    key = (table, columns)
+    request = getattr(_local, "request", None)
+    if request is not None:
+        request["calls"] += 1
+    version = _committed_versions()[table]
+    
+    with _cache_lock:
+        if request is not None:
+            df = _request_read(request, key, version)
+            if df is not None:
+                request["shared"] += 1
+                _cache_stats["request_hits"] += 1
+                return df.copy()
+        
+        entry = _data_cache.get(key)
+        if entry is not None and entry[0] == version:
+            _data_cache.move_to_end(key)
+            _cache_stats["hits"] += 1
+            if request is not None:
+                request["reads"][key] = (version, entry[1])
+            return entry[1].copy()
+        _cache_stats["misses"] += 1
+    
+    # Read outside the lock. A write committed meanwhile has already bumped
+    # the version, so this copy is stored under the old one and not reused.
+    conn = get_db_connection()
+    projection = ", ".join(columns) if columns else "*"
+    df = pd.read_sql_query(f"SELECT {projection} FROM {table}", conn)
+    if request is not None:
+        request["queries"] += 1
+        request["reads"][key] = (version, df)
+    
+    _store_cache_entry(key, version, df)
+    return df.copy()
+
+def _store_cache_entry(key, version, df):
+    """Cache ``df`` under ``key``, replacing any older version, and evict to fit"""
+    global _cache_bytes
+    
+    size = int(df.memory_usage(deep=True).sum())
+    with _cache_lock:
+        old = _data_cache.pop(key, None)
+        if old is not None:
+            _cache_bytes -= old[2]
+        if size <= DATA_CACHE_MAX_BYTES:
+            _data_cache[key] = (version, df, size)
+            _cache_bytes += size
+        while len(_data_cache) > DATA_CACHE_MAX_ENTRIES or _cache_bytes > DATA_CACHE_MAX_BYTES:
+            _, (_, _, evicted_size) = _data_cache.popitem(last=False)
+            _cache_bytes -= evicted_size
+            _cache_stats["evictions"] += 1
+
+def cached_query(tables, name, args, load):
+    """Get the DataFrame ``load()`` returns, cached while ``tables`` are unchanged
+    
+    For results derived from several tables, e.g. a date window of the
+    history joined with equipment. ``name`` and ``args`` identify the
+    result. Entries live in the shared table cache: a write to any of
+    ``tables`` drops them, and they count against the same size bounds.
+    Every caller gets its own copy.
+    """
+    tables = tuple(tables)
+    key = (tables, name, args)
+    versions = _committed_versions()
+    version = tuple(versions[table] for table in tables)
+    
+    with _cache_lock:
+        entry = _data_cache.get(key)
+        if entry is not None and entry[0] == version:
+            _data_cache.move_to_end(key)
+            _cache_stats["hits"] += 1
+            return entry[1].copy()
+        _cache_stats["misses"] += 1
+    
+    # As in _cached_read(), a write committed during the load leaves this
+    # copy under the old version, so it is not reused
+    df = load()
+    _store_cache_entry(key, version, df)
+    return df.copy()
+
+def table_version(table):
+    """Get a value that changes whenever ``table`` is written to"""
+    return _committed_versions()[table]
+
+def equipment_changes_since(version):
+    """Get the SKUs written since equipment was at ``version``
+    
+    ``version`` is a value of table_version("equipment"). Returns a set
+    of SKUs (empty if nothing changed), or None if that is not known, e.g.
+    after a write by another process or a bulk import; then everything
+    has to be read again.
+    """
+    current = table_version("equipment")
+    if current == version:
+        return set()
+    
+    with _cache_lock:
+        entries = [entry for entry in _equipment_journal if version < entry[0] <= current]
+        # Writes by other processes, and commits older than the journal, are
+        # missing from it
+        if len(entries) != current - version:
+            return None
+        changed = set()
+        for _, skus in entries:
+            if skus is None:
+                return None
+            changed.update(skus)
+        return changed
+
+def cache_stats():
+    """Get hit, miss, request hit and eviction counts and the size of the table cache"""
+    with _cache_lock:
+        return dict(_cache_stats, entries=len(_data_cache), bytes=_cache_bytes)
+
+def clear_data_cache():
+    """Drop every cached table, e.g. after editing the database by hand"""
+    with _cache_lock:
+        _drop_cache_entries()
+
 def hash_password(password):
     """Simple password hashing for demo purposes"""
     return hashlib.sha256(password.encode()).hexdigest()
 
-def initialize_database():
-    """Create database tables if they don't exist"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Create users table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        username TEXT PRIMARY KEY,
-        email TEXT NOT NULL,
-        password TEXT NOT NULL,
-        role TEXT NOT NULL,
-        name TEXT NOT NULL,
-        department TEXT,
-        created_at TEXT NOT NULL
+# Aggregate tables kept current by triggers (migration 5) for the reports
+# page: key columns and the query that recomputes each from the base tables
+SUMMARY_TABLES = {
+    "equipment_status_counts": (
+        ("status",),
+        "SELECT status, COUNT(*) AS count FROM equipment GROUP BY status"
+    ),
+    "equipment_category_counts": (
+        ("category",),
+        "SELECT category, COUNT(*) AS count FROM equipment WHERE category IS NOT NULL GROUP BY category"
+    ),
+    # Checked out items per holder and due date; overdue counts depend on
+    # the current date, so they are summed from here at read time
+    "equipment_due_counts": (
+        ("holder", "due_date"),
+        f'''
+        SELECT COALESCE(checked_out_by, '') AS holder, due_date, COUNT(*) AS count
+        FROM equipment
+        WHERE status = '{EQUIPMENT_STATUS["checked_out"]}' AND due_date IS NOT NULL
+        GROUP BY holder, due_date
+        '''
+    ),
+    "user_checkout_counts": (
+        ("user",),
+        '''
+        SELECT user, COUNT(*) AS checkouts, COUNT(*) - COUNT(return_date) AS open_checkouts
+        FROM checkout_history
+        GROUP BY user
+        '''
+    ),
+}
+
+# Trigger bodies adding a NEW equipment row to the summaries or removing an
+# OLD one; an update removes the old row and adds the new one
+_ADD_EQUIPMENT_SUMMARY = f'''
+            INSERT INTO equipment_status_counts (status, count) VALUES (NEW.status, 1)
+            ON CONFLICT (status) DO UPDATE SET count = count + 1;
+            INSERT INTO equipment_category_counts (category, count)
+            SELECT NEW.category, 1 WHERE NEW.category IS NOT NULL
+            ON CONFLICT (category) DO UPDATE SET count = count + 1;
+            INSERT INTO equipment_due_counts (holder, due_date, count)
+            SELECT COALESCE(NEW.checked_out_by, ''), NEW.due_date, 1
+            WHERE NEW.status = '{EQUIPMENT_STATUS["checked_out"]}' AND NEW.due_date IS NOT NULL
+            ON CONFLICT (holder, due_date) DO UPDATE SET count = count + 1;
+'''
+_REMOVE_EQUIPMENT_SUMMARY = f'''
+            UPDATE equipment_status_counts SET count = count - 1 WHERE status = OLD.status;
+            DELETE FROM equipment_status_counts WHERE status = OLD.status AND count = 0;
+            UPDATE equipment_category_counts SET count = count - 1 WHERE category = OLD.category;
+            DELETE FROM equipment_category_counts WHERE category = OLD.category AND count = 0;
+            UPDATE equipment_due_counts SET count = count - 1
+            WHERE OLD.status = '{EQUIPMENT_STATUS["checked_out"]}'
+                AND holder = COALESCE(OLD.checked_out_by, '') AND due_date = OLD.due_date;
+            DELETE FROM equipment_due_counts
+            WHERE holder = COALESCE(OLD.checked_out_by, '') AND due_date = OLD.due_date AND count = 0;
+'''
+_ADD_HISTORY_SUMMARY = '''
+            INSERT INTO user_checkout_counts (user, checkouts, open_checkouts)
+            VALUES (NEW.user, 1, NEW.return_date IS NULL)
+            ON CONFLICT (user) DO UPDATE SET
+                checkouts = checkouts + 1,
+                open_checkouts = open_checkouts + excluded.open_checkouts;
+'''
+_REMOVE_HISTORY_SUMMARY = '''
+            UPDATE user_checkout_counts
+            SET checkouts = checkouts - 1, open_checkouts = open_checkouts - (OLD.return_date IS NULL)
+            WHERE user = OLD.user;
+            DELETE FROM user_checkout_counts WHERE user = OLD.user AND checkouts = 0;
+'''
+
+# Trigger bodies taking an OLD equipment row out of the due date buckets or
+# placing a NEW one in them. Buckets are relative to the date of the last
+# scan, as scan_due_dates() computes them, so a checkout is listed as soon
+# as it commits; before the first scan nothing is placed.
+_REMOVE_DUE_ITEM = '''
+            UPDATE due_buckets SET items = items - 1
+            WHERE (holder, bucket) IN (SELECT holder, bucket FROM due_items WHERE sku = OLD.sku);
+            DELETE FROM due_buckets WHERE items = 0;
+            DELETE FROM due_items WHERE sku = OLD.sku;
+'''
+_PLACE_DUE_ITEM = f'''
+            INSERT INTO due_items (sku, holder, name, checkout_date, due_date, bucket, days_overdue)
+            SELECT NEW.sku, COALESCE(NEW.checked_out_by, ''), NEW.name, NEW.checkout_date, NEW.due_date,
+                CASE
+                    WHEN NEW.due_date < as_of THEN 'overdue'
+                    WHEN NEW.due_date < date(as_of, '+1 day') THEN 'due_today'
+                    ELSE 'due_soon'
+                END,
+                CAST(julianday(as_of) - julianday(NEW.due_date) AS INTEGER)
+            FROM due_scans
+            WHERE id = 1 AND NEW.status = '{EQUIPMENT_STATUS["checked_out"]}' AND NEW.due_date < horizon;
+            INSERT INTO due_buckets (holder, bucket, items)
+            SELECT holder, bucket, 1 FROM due_items WHERE sku = NEW.sku
+            ON CONFLICT (holder, bucket) DO UPDATE SET items = items + 1;
+'''
+
+# Numbered schema migrations, applied once each and in order. A released
+# migration must never be edited; add a new one instead.
+MIGRATIONS = [
+    (1, "Create core tables", [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            email TEXT NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL,
+            name TEXT NOT NULL,
+            department TEXT,
+            created_at TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS equipment (
+            sku TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            description TEXT,
+            category TEXT,
+            manufacturer TEXT,
+            model TEXT,
+            serial_number TEXT,
+            purchase_date TEXT,
+            purchase_price REAL,
+            status TEXT NOT NULL,
+            checked_out_by TEXT,
+            checkout_date TEXT,
+            due_date TEXT,
+            location TEXT,
+            image_path TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            FOREIGN KEY (checked_out_by) REFERENCES users (username)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS checkout_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sku TEXT NOT NULL,
+            equipment_name TEXT NOT NULL,
+            user TEXT NOT NULL,
+            checkout_date TEXT NOT NULL,
+            due_date TEXT NOT NULL,
+            return_date TEXT,
+            notes TEXT,
+            FOREIGN KEY (sku) REFERENCES equipment (sku),
+            FOREIGN KEY (user) REFERENCES users (username)
+        )
+        ''',
+    ]),
+    (2, "Add indexes for list filters, holders, due dates and history lookups", [
+        # Status and category filters; sku keeps filtered lists ordered
+        "CREATE INDEX IF NOT EXISTS idx_equipment_status ON equipment (status, sku)",
+        "CREATE INDEX IF NOT EXISTS idx_equipment_category ON equipment (category, sku)",
+        # Items held by a user and overdue scans only cover checked out rows
+        "CREATE INDEX IF NOT EXISTS idx_equipment_checked_out_by ON equipment (checked_out_by, due_date) WHERE checked_out_by IS NOT NULL",
+        "CREATE INDEX IF NOT EXISTS idx_equipment_due_date ON equipment (due_date) WHERE due_date IS NOT NULL",
+        # History per item, per user and by date range
+        "CREATE INDEX IF NOT EXISTS idx_history_sku ON checkout_history (sku, checkout_date)",
+        "CREATE INDEX IF NOT EXISTS idx_history_user ON checkout_history (user, checkout_date)",
+        "CREATE INDEX IF NOT EXISTS idx_history_checkout_date ON checkout_history (checkout_date)",
+        # Open checkouts, used when closing a checkout on return
+        "CREATE INDEX IF NOT EXISTS idx_history_open ON checkout_history (sku) WHERE return_date IS NULL",
+    ]),
+    (3, "Add sequences table for atomic SKU allocation", [
+        '''
+        CREATE TABLE IF NOT EXISTS sequences (
+            name TEXT PRIMARY KEY,
+            next_value INTEGER NOT NULL
+        )
+        ''',
+        # Continue numbering after the highest existing SKU, compared numerically
+        f'''
+        INSERT OR IGNORE INTO sequences (name, next_value)
+        SELECT '{SKU_SEQUENCE}', COALESCE(MAX(CAST(SUBSTR(sku, {len(SKU_PREFIX) + 1}) AS INTEGER)), 0) + 1
+        FROM equipment
+        WHERE sku GLOB '{SKU_PREFIX}[0-9]*'
+        ''',
+    ]),
+    (4, "Add trigram full-text search indexes over equipment and users", [
+        # External-content indexes: the text lives only in the base tables and
+        # triggers keep the index in step with every insert, update and delete
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS equipment_fts USING fts5(
+            sku, name, description, manufacturer,
+            content='equipment', content_rowid='rowid', tokenize='trigram'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS equipment_fts_insert AFTER INSERT ON equipment BEGIN
+            INSERT INTO equipment_fts (rowid, sku, name, description, manufacturer)
+            VALUES (NEW.rowid, NEW.sku, NEW.name, NEW.description, NEW.manufacturer);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS equipment_fts_delete AFTER DELETE ON equipment BEGIN
+            INSERT INTO equipment_fts (equipment_fts, rowid, sku, name, description, manufacturer)
+            VALUES ('delete', OLD.rowid, OLD.sku, OLD.name, OLD.description, OLD.manufacturer);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS equipment_fts_update
+        AFTER UPDATE OF sku, name, description, manufacturer ON equipment BEGIN
+            INSERT INTO equipment_fts (equipment_fts, rowid, sku, name, description, manufacturer)
+            VALUES ('delete', OLD.rowid, OLD.sku, OLD.name, OLD.description, OLD.manufacturer);
+            INSERT INTO equipment_fts (rowid, sku, name, description, manufacturer)
+            VALUES (NEW.rowid, NEW.sku, NEW.name, NEW.description, NEW.manufacturer);
+        END
+        ''',
+        "INSERT INTO equipment_fts (equipment_fts) VALUES ('rebuild')",
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+            username, name, email, department,
+            content='users', content_rowid='rowid', tokenize='trigram'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS users_fts_insert AFTER INSERT ON users BEGIN
+            INSERT INTO users_fts (rowid, username, name, email, department)
+            VALUES (NEW.rowid, NEW.username, NEW.name, NEW.email, NEW.department);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS users_fts_delete AFTER DELETE ON users BEGIN
+            INSERT INTO users_fts (users_fts, rowid, username, name, email, department)
+            VALUES ('delete', OLD.rowid, OLD.username, OLD.name, OLD.email, OLD.department);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS users_fts_update
+        AFTER UPDATE OF username, name, email, department ON users BEGIN
+            INSERT INTO users_fts (users_fts, rowid, username, name, email, department)
+            VALUES ('delete', OLD.rowid, OLD.username, OLD.name, OLD.email, OLD.department);
+            INSERT INTO users_fts (rowid, username, name, email, department)
+            VALUES (NEW.rowid, NEW.username, NEW.name, NEW.email, NEW.department);
+        END
+        ''',
+        "INSERT INTO users_fts (users_fts) VALUES ('rebuild')",
+    ]),
+    (5, "Add trigger-maintained summary tables for reports", [
+        '''
+        CREATE TABLE IF NOT EXISTS equipment_status_counts (
+            status TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS equipment_category_counts (
+            category TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS equipment_due_counts (
+            holder TEXT NOT NULL,
+            due_date TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (holder, due_date)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS user_checkout_counts (
+            user TEXT PRIMARY KEY,
+            checkouts INTEGER NOT NULL,
+            open_checkouts INTEGER NOT NULL
+        )
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS equipment_summary_insert AFTER INSERT ON equipment BEGIN
+{_ADD_EQUIPMENT_SUMMARY}        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS equipment_summary_delete AFTER DELETE ON equipment BEGIN
+{_REMOVE_EQUIPMENT_SUMMARY}        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS equipment_summary_update
+        AFTER UPDATE OF status, category, checked_out_by, due_date ON equipment BEGIN
+{_REMOVE_EQUIPMENT_SUMMARY}{_ADD_EQUIPMENT_SUMMARY}        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS history_summary_insert AFTER INSERT ON checkout_history BEGIN
+{_ADD_HISTORY_SUMMARY}        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS history_summary_delete AFTER DELETE ON checkout_history BEGIN
+{_REMOVE_HISTORY_SUMMARY}        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS history_summary_update
+        AFTER UPDATE OF user, return_date ON checkout_history BEGIN
+{_REMOVE_HISTORY_SUMMARY}{_ADD_HISTORY_SUMMARY}        END
+        ''',
+    ] + [
+        f"INSERT INTO {table} {query}" for table, (_, query) in SUMMARY_TABLES.items()
+    ]),
+    (6, "Add due date buckets written by the overdue scanner", [
+        # Checked out items that are overdue or due soon, as of the last scan
+        '''
+        CREATE TABLE IF NOT EXISTS due_items (
+            sku TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            name TEXT NOT NULL,
+            checkout_date TEXT,
+            due_date TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            days_overdue INTEGER NOT NULL
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_due_items_holder ON due_items (holder, bucket)",
+        '''
+        CREATE TABLE IF NOT EXISTS due_buckets (
+            holder TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            items INTEGER NOT NULL,
+            PRIMARY KEY (holder, bucket)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS due_scans (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            as_of TEXT NOT NULL,
+            scanned_at TEXT NOT NULL
+        )
+        ''',
+        # Returned, reassigned or rescheduled items leave the buckets right
+        # away; the next scan adds them back if they are still due
+        '''
+        CREATE TRIGGER IF NOT EXISTS due_items_update
+        AFTER UPDATE OF status, checked_out_by, due_date ON equipment
+        WHEN OLD.status IS NOT NEW.status
+            OR OLD.checked_out_by IS NOT NEW.checked_out_by
+            OR OLD.due_date IS NOT NEW.due_date
+        BEGIN
+            UPDATE due_buckets SET items = items - 1
+            WHERE (holder, bucket) IN (SELECT holder, bucket FROM due_items WHERE sku = OLD.sku);
+            DELETE FROM due_buckets WHERE items = 0;
+            DELETE FROM due_items WHERE sku = OLD.sku;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS due_items_delete AFTER DELETE ON equipment BEGIN
+            UPDATE due_buckets SET items = items - 1
+            WHERE (holder, bucket) IN (SELECT holder, bucket FROM due_items WHERE sku = OLD.sku);
+            DELETE FROM due_buckets WHERE items = 0;
+            DELETE FROM due_items WHERE sku = OLD.sku;
+        END
+        ''',
+    ]),
+    (7, "Add persistent email outbox", [
+        '''
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            to_email TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            dedupe_key TEXT NOT NULL UNIQUE,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TEXT NOT NULL,
+            last_error TEXT,
+            created_at TEXT NOT NULL,
+            sent_at TEXT
+        )
+        ''',
+        # The worker only ever looks for pending messages that are due
+        "CREATE INDEX IF NOT EXISTS idx_outbox_pending ON email_outbox (next_attempt_at) WHERE status = 'pending'",
+    ]),
+    (8, "Add serial number index for duplicate checks on import", [
+        "CREATE INDEX IF NOT EXISTS idx_equipment_serial ON equipment (serial_number)",
+    ]),
+    (9, "Add row versions to equipment for optimistic concurrency", [
+        # Bumped by every UPDATE in this module; writers pass the version they
+        # read and the write only applies if nobody changed the row since
+        "ALTER TABLE equipment ADD COLUMN version INTEGER NOT NULL DEFAULT 1",
+    ]),
+    (10, "Add table versions for the table cache", [
+        # One row per cached table, bumped by transaction() along with every
+        # write to the table; see _committed_versions()
+        '''
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+        ''',
+        "INSERT OR IGNORE INTO table_versions (name, version) VALUES "
+        + ", ".join(f"('{table}', 0)" for table in CACHED_TABLES),
+    ]),
+    (11, "Place checkouts in the due date buckets when they are written", [
+        # The end of the due_soon range as of the last scan; NULL until the
+        # next scan, so nothing is placed against an unknown range
+        "ALTER TABLE due_scans ADD COLUMN horizon TEXT",
+        "DROP TRIGGER IF EXISTS due_items_update",
+        f'''
+        CREATE TRIGGER due_items_update
+        AFTER UPDATE OF status, checked_out_by, due_date ON equipment
+        WHEN OLD.status IS NOT NEW.status
+            OR OLD.checked_out_by IS NOT NEW.checked_out_by
+            OR OLD.due_date IS NOT NEW.due_date
+        BEGIN
+{_REMOVE_DUE_ITEM}{_PLACE_DUE_ITEM}        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS due_items_insert AFTER INSERT ON equipment BEGIN
+{_PLACE_DUE_ITEM}        END
+        ''',
+    ]),
+]
+
+def get_schema_version(conn):
+    """Get the highest migration number applied to the database"""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TEXT NOT NULL
     )
     ''')
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+def run_migrations():
+    """Apply pending schema migrations and return the resulting version
     
-    # Create equipment table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS equipment (
-        sku TEXT PRIMARY KEY,
-        name TEXT NOT NULL,
-        description TEXT,
-        category TEXT,
-        manufacturer TEXT,
-        model TEXT,
-        serial_number TEXT,
-        purchase_date TEXT,
-        purchase_price REAL,
-        status TEXT NOT NULL,
-        checked_out_by TEXT,
-        checkout_date TEXT,
-        due_date TEXT,
-        location TEXT,
-        image_path TEXT,
-        created_at TEXT NOT NULL,
-        updated_at TEXT NOT NULL,
-        FOREIGN KEY (checked_out_by) REFERENCES users (username)
-    )
-    ''')
+    Each migration runs in its own transaction together with its
+    schema_version row. Statistics are refreshed with ANALYZE afterwards so
+    the query planner picks up new indexes on existing databases.
+    """
+    conn = get_db_connection()
+    version = get_schema_version(conn)
+    pending = [migration for migration in MIGRATIONS if migration[0] > version]
     
-    # Create checkout history table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS checkout_history (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        sku TEXT NOT NULL,
-        equipment_name TEXT NOT NULL,
-        user TEXT NOT NULL,
-        checkout_date TEXT NOT NULL,
-        due_date TEXT NOT NULL,
-        return_date TEXT,
-        notes TEXT,
-        FOREIGN KEY (sku) REFERENCES equipment (sku),
-        FOREIGN KEY (user) REFERENCES users (username)
-    )
-    ''')
+    for number, description, statements in pending:
+        with transaction():
+            # Another process (e.g. the import CLI) may have applied it since
+            # the version was read; the write lock is held from here on
+            if get_schema_version(conn) >= number:
+                version = number
+                continue
+            
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (number, description, datetime.datetime.now().isoformat())
+            )
+        version = number
     
-    # Check if admin user exists
-    cursor.execute("SELECT * FROM users WHERE username = 'admin'")
-    admin_exists = cursor.fetchone()
+    if pending:
+        conn.execute("ANALYZE")
+        # Cached reads may predate the new schema
+        clear_data_cache()
+    return version
+
+def ensure_initialized():
+    """Create the data directories and database schema once per process
+    
+    Called on first use by get_db_connection(), so importing this module
+    does no disk or database work. Later calls only check a flag.
+    """
+    global _initialized, _initializing
     
-    # Create admin user if it doesn't exist
-    if not admin_exists:
-        cursor.execute('''
-        INSERT INTO users (username, email, password, role, name, department, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', ('admin', 'admin@example.com', hash_password('admin123'), 'admin', 'Administrator', 'IT', datetime.datetime.now().isoformat()))
+    with _init_lock:
+        # Re-entrant calls from initialize_database() itself fall through
+        if _initialized or _initializing:
+            return
+        
+        _initializing = True
+        try:
+            Path(DATA_PATH).mkdir(exist_ok=True)
+            Path(IMAGES_DIR).mkdir(exist_ok=True)
+            initialize_database()
+            _initialized = True
+        finally:
+            _initializing = False
+
+def initialize_database():
+    """Bring the schema up to date and create the default admin user"""
+    run_migrations()
     
-    conn.commit()
-    conn.close()
+    with transaction("users") as conn:
+        # Create admin user if it doesn't exist
+        admin_exists = conn.execute("SELECT 1 FROM users WHERE username = 'admin'").fetchone()
+        if not admin_exists:
+            conn.execute('''
+            INSERT INTO users (username, email, password, role, name, department, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', ('admin', 'admin@example.com', hash_password('admin123'), 'admin', 'Administrator', 'IT', datetime.datetime.now().isoformat()))
 
 # Data access functions
-def get_users():
-    """Get all users as a pandas DataFrame"""
+def get_users(columns=None):
+    """Get all users as a pandas DataFrame
+    
+    ``columns`` selects a subset of columns.
+    """
+    return _cached_read("users", columns)
+
+def get_equipment(columns=None):
+    """Get all equipment as a pandas DataFrame
+    
+    ``columns`` selects a subset of columns.
+    """
+    return _cached_read("equipment", columns)
+
+def get_checkout_history(columns=None):
+    """Get all checkout history as a pandas DataFrame
+    
+    ``columns`` selects a subset of columns.
+    """
+    return _cached_read("checkout_history", columns)
+
+# Point lookups for pages about a single item or user. Each runs one indexed
+# query with constant SQL text, so the connection's statement cache hands
+# back the already prepared statement and the cost does not grow with the
+# size of the tables.
+
+def _fetch_one(sql, params):
+    """Run a single-row query and return the row as a dict, or None"""
+    row = get_db_connection().execute(sql, params).fetchone()
+    return dict(row) if row is not None else None
+
+def get_equipment_by_sku(sku):
+    """Get one piece of equipment as a dict, or None if the SKU does not exist"""
+    return _fetch_one("SELECT * FROM equipment WHERE sku = ?", (sku,))
+
+def get_equipment_by_skus(skus, columns=None):
+    """Get the equipment with the given SKUs as a DataFrame, in no particular order
+    
+    ``columns`` selects a subset of columns. SKUs that do not exist are
+    left out.
+    """
+    projection = "*"
+    if columns is not None:
+        invalid = [column for column in columns if not column.isidentifier()]
+        if invalid:
+            raise ValueError(f"Invalid column names: {', '.join(invalid)}")
+        projection = ", ".join(columns)
+    
     conn = get_db_connection()
-    users_df = pd.read_sql_query("SELECT * FROM users", conn)
-    conn.close()
-    return users_df
+    return pd.read_sql_query(
+        f"SELECT {projection} FROM equipment WHERE sku IN (SELECT value FROM json_each(?))",
+        conn, params=(json.dumps(list(skus)),)
+    )
+
+def get_user(username):
+    """Get one user as a dict, or None if the username does not exist"""
+    return _fetch_one("SELECT * FROM users WHERE username = ?", (username,))
 
-def get_equipment():
-    """Get all equipment as a pandas DataFrame"""
+def get_items_held_by(username):
+    """Get the equipment checked out by a user, soonest due first"""
     conn = get_db_connection()
-    equipment_df = pd.read_sql_query("SELECT * FROM equipment", conn)
-    conn.close()
-    return equipment_df
+    return pd.read_sql_query(
+        "SELECT * FROM equipment WHERE checked_out_by = ? ORDER BY due_date, sku",
+        conn, params=(username,)
+    )
 
-def get_checkout_history():
-    """Get all checkout history as a pandas DataFrame"""
+def get_history_for_sku(sku, before_id=None, limit=LIST_PAGE_SIZE):
+    """Get one page of a SKU's checkout history, newest checkout first
+    
+    Pages are fetched by keyset: pass the id of the last record of the
+    previous page as ``before_id``.
+    """
     conn = get_db_connection()
-    history_df = pd.read_sql_query("SELECT * FROM checkout_history", conn)
-    conn.close()
-    return history_df
+    if before_id is None:
+        return pd.read_sql_query('''
+        SELECT * FROM checkout_history
+        WHERE sku = ?
+        ORDER BY checkout_date DESC, id DESC
+        LIMIT ?
+        ''', conn, params=(sku, limit))
+    
+    # Cursors come back from a DataFrame as numpy integers
+    return pd.read_sql_query('''
+    SELECT * FROM checkout_history
+    WHERE sku = ?
+        AND (checkout_date, id) < (SELECT checkout_date, id FROM checkout_history WHERE id = ?)
+    ORDER BY checkout_date DESC, id DESC
+    LIMIT ?
+    ''', conn, params=(sku, int(before_id), limit))
 
-def save_users(users_df):
-    """Save users DataFrame to the database"""
+def _like_pattern(term):
+    """Build a LIKE pattern matching ``term`` anywhere, with wildcards escaped"""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def _in_clause(column, values):
+    """Build an IN clause with one placeholder per value"""
+    return f"{column} IN ({', '.join('?' for _ in values)})"
+
+def query_equipment(statuses=None, categories=None, search=None, after_sku=None, limit=LIST_PAGE_SIZE):
+    """Get one page of equipment matching the filters, ordered by SKU
+    
+    Filtering, searching and ordering all run in SQL. Pages are fetched by
+    keyset: pass the last SKU of the previous page as ``after_sku``.
+    """
+    clauses = []
+    params = []
+    
+    if statuses:
+        clauses.append(_in_clause("status", statuses))
+        params.extend(statuses)
+    
+    if categories:
+        clauses.append(_in_clause("category", categories))
+        params.extend(categories)
+    
+    if search:
+        clauses.append(
+            "(name LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\' "
+            "OR sku LIKE ? ESCAPE '\\' OR manufacturer LIKE ? ESCAPE '\\')"
+        )
+        params.extend([_like_pattern(search)] * 4)
+    
+    if after_sku is not None:
+        clauses.append("sku > ?")
+        params.append(after_sku)
+    
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    params.append(limit)
+    
+    conn = get_db_connection()
+    return pd.read_sql_query(f"SELECT * FROM equipment{where} ORDER BY sku LIMIT ?", conn, params=params)
+
+def get_equipment_categories():
+    """Get the distinct equipment categories in alphabetical order"""
+    conn = get_db_connection()
+    rows = conn.execute(
+        "SELECT DISTINCT category FROM equipment WHERE category IS NOT NULL ORDER BY category"
+    ).fetchall()
+    return [row[0] for row in rows]
+
+def query_users(search=None, after_username=None, limit=LIST_PAGE_SIZE):
+    """Get one page of users matching the search, ordered by username
+    
+    Pass the last username of the previous page as ``after_username`` to get
+    the next page.
+    """
+    clauses = []
+    params = []
+    
+    if search:
+        clauses.append(
+            "(username LIKE ? ESCAPE '\\' OR name LIKE ? ESCAPE '\\' "
+            "OR email LIKE ? ESCAPE '\\' OR department LIKE ? ESCAPE '\\')"
+        )
+        params.extend([_like_pattern(search)] * 4)
+    
+    if after_username is not None:
+        clauses.append("username > ?")
+        params.append(after_username)
+    
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    params.append(limit)
+    
     conn = get_db_connection()
-    cursor = conn.cursor()
+    return pd.read_sql_query(f"SELECT * FROM users{where} ORDER BY username LIMIT ?", conn, params=params)
+
+# Words matching more rows than this are too common to rank by: bm25 has to
+# count every row a word matches before it can score any of them
+SEARCH_RANK_LIMIT = 1000
+
+def _full_text_phrases(term):
+    """Split a search term into quoted FTS5 phrases, or None if it cannot be used"""
+    words = term.split()
+    if not words or any(len(word) < 3 for word in words):
+        return None
+    return ['"' + word.replace('"', '""') + '"' for word in words]
+
+def full_text_query(term):
+    """Turn a search term into an FTS5 query, or None if it cannot be used
     
-    # Delete existing users (except for those being updated)
-    usernames = tuple(users_df['username'].tolist()) if not users_df.empty else ('',)
-    if len(usernames) == 1:
-        # SQLite requires special handling for one-element tuples
-        cursor.execute("DELETE FROM users WHERE username NOT IN (?)", usernames)
+    Every word must match somewhere as a substring (so prefixes match too).
+    The trigram index needs at least three characters per word; shorter
+    terms return None and callers fall back to a LIKE scan.
+    """
+    phrases = _full_text_phrases(term)
+    return " ".join(phrases) if phrases is not None else None
+
+def _ranked_search(table, fts_table, term, clauses, params, after, limit):
+    """Run a full-text search joined back to its base table, one keyset page at a time
+    
+    Matches are ranked with bm25 on the words that match at most
+    SEARCH_RANK_LIMIT rows, so at most that many rows are scored. If every
+    word is more common than that, matches are listed in table order
+    instead, unranked. Either way a page costs the same however deep it is.
+    """
+    phrases = _full_text_phrases(term)
+    if phrases is None:
+        raise ValueError("Search terms need at least three characters per word")
+    
+    conn = get_db_connection()
+    selective = [
+        phrase for phrase in phrases
+        if conn.execute(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM {fts_table} WHERE {fts_table} MATCH ? LIMIT ?)",
+            (phrase, SEARCH_RANK_LIMIT + 1)
+        ).fetchone()[0] <= SEARCH_RANK_LIMIT
+    ]
+    filters = "".join(f" AND {clause}" for clause in clauses)
+    after_rank, after_rowid = after if after is not None else (None, None)
+    
+    if selective:
+        # Score only the few rows the selective words match, and make
+        # snippets only for the page. Rows must match the common words too;
+        # "+" makes SQLite list those matches once instead of per row.
+        if len(selective) < len(phrases):
+            filters = f" AND +{fts_table}.rowid IN (SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?){filters}"
+            params = [" ".join(phrases)] + params
+        keyset = ""
+        keyset_params = []
+        if after_rowid is not None:
+            keyset = " WHERE (rank, id) > (?, ?)" if after_rank is not None else " WHERE id > ?"
+            keyset_params = [after_rank, after_rowid] if after_rank is not None else [after_rowid]
+        sql = f'''
+        WITH page AS (
+            SELECT id, rank FROM (
+                SELECT {fts_table}.rowid AS id, bm25({fts_table}) AS rank
+                FROM {fts_table}
+                JOIN {table} t ON t.rowid = {fts_table}.rowid
+                WHERE {fts_table} MATCH ?{filters}
+            ){keyset}
+            ORDER BY rank, id
+            LIMIT ?
+        )
+        SELECT t.*,
+            snippet({fts_table}, -1, '«', '»', '…', 48) AS match,
+            page.rank,
+            page.id
+        FROM page
+        JOIN {fts_table} ON {fts_table}.rowid = page.id
+        JOIN {table} t ON t.rowid = page.id
+        WHERE {fts_table} MATCH ?
+        ORDER BY page.rank, page.id
+        '''
+        selective = " ".join(selective)
+        params = [selective] + params + keyset_params + [limit, selective]
     else:
-        cursor.execute("DELETE FROM users WHERE username NOT IN {}".format(usernames))
-    
-    # Insert or update users
-    for _, user in users_df.iterrows():
-        cursor.execute('''
-        INSERT OR REPLACE INTO users (username, email, password, role, name, department, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            user['username'],
-            user['email'],
-            user['password'],
-            user['role'],
-            user['name'],
-            user['department'],
-            user['created_at']
-        ))
-    
-    conn.commit()
-    conn.close()
-
-def save_equipment(equipment_df):
-    """Save equipment DataFrame to the database"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Delete existing equipment (except for those being updated)
-    if not equipment_df.empty:
-        skus = tuple(equipment_df['sku'].tolist())
-        if len(skus) == 1:
+        # Too common to rank: stream the matches in rowid order, which the
+        # index returns without sorting
+        keyset = f" AND {fts_table}.rowid > ?" if after_rowid is not None else ""
+        sql = f'''
+        SELECT t.*,
+            snippet({fts_table}, -1, '«', '»', '…', 48) AS match,
+            NULL AS rank,
+            {fts_table}.rowid AS id
+        FROM {fts_table}
+        JOIN {table} t ON t.rowid = {fts_table}.rowid
+        WHERE {fts_table} MATCH ?{filters}{keyset}
+        ORDER BY {fts_table}.rowid
+        LIMIT ?
+        '''
+        params = [" ".join(phrases)] + params + ([after_rowid] if after_rowid is not None else []) + [limit]
+    
+    results = pd.read_sql_query(sql, conn, params=params)
+    # The (rank, rowid) of each row is the keyset cursor for the next page
+    results["cursor"] = list(zip(results["rank"].tolist(), results.pop("id").tolist()))
+    return results
+
+def search_equipment(term, statuses=None, categories=None, after=None, limit=LIST_PAGE_SIZE):
+    """Rank equipment against a search term using the full-text index
+    
+    Matches name, description, SKU and manufacturer. Results carry a
+    highlighted ``match`` snippet, the bm25 ``rank`` (None when the term is
+    too common to rank) and a ``cursor``; pass the last cursor as ``after``
+    to get the next page.
+    """
+    clauses = []
+    params = []
+    
+    if statuses:
+        clauses.append(_in_clause("t.status", statuses))
+        params.extend(statuses)
+    
+    if categories:
+        clauses.append(_in_clause("t.category", categories))
+        params.extend(categories)
+    
+    return _ranked_search("equipment", "equipment_fts", term, clauses, params, after, limit)
+
+def search_users(term, after=None, limit=LIST_PAGE_SIZE):
+    """Rank users against a search term using the full-text index
+    
+    Matches username, name, email and department. Results carry the same
+    ``match``, ``rank`` and ``cursor`` columns as search_equipment().
+    """
+    return _ranked_search("users", "users_fts", term, [], [], after, limit)
+
+def rebuild_search_indexes():
+    """Rebuild the full-text indexes from the base tables
+    
+    Only needed after a VACUUM, which may renumber the rowids the indexes
+    refer to.
+    """
+    with transaction() as conn:
+        conn.execute("INSERT INTO equipment_fts (equipment_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO users_fts (users_fts) VALUES ('rebuild')")
+
+def get_status_counts():
+    """Get the number of equipment items per status, most common first"""
+    conn = get_db_connection()
+    return pd.read_sql_query(
+        "SELECT status, count FROM equipment_status_counts ORDER BY count DESC, status", conn
+    )
+
+def get_category_counts():
+    """Get the number of equipment items per category, most common first"""
+    conn = get_db_connection()
+    return pd.read_sql_query(
+        "SELECT category, count FROM equipment_category_counts ORDER BY count DESC, category", conn
+    )
+
+def get_user_checkout_counts():
+    """Get total and open checkouts per user with their name and department"""
+    conn = get_db_connection()
+    return pd.read_sql_query('''
+    SELECT c.user AS username, c.checkouts, c.open_checkouts, u.name, u.department
+    FROM user_checkout_counts c
+    LEFT JOIN users u ON u.username = c.user
+    ORDER BY c.checkouts DESC, c.user
+    ''', conn)
+
+# Checked out equipment past its due date, with whole days overdue
+OVERDUE_EQUIPMENT_SQL = f'''
+SELECT *, CAST(julianday('now', 'localtime') - julianday(due_date) AS INTEGER) AS days_overdue
+FROM equipment
+WHERE status = '{EQUIPMENT_STATUS["checked_out"]}' AND due_date < date('now', 'localtime')
+ORDER BY due_date, sku
+'''
+
+def rebuild_summary_tables():
+    """Recompute every summary table from the base tables"""
+    with transaction() as conn:
+        for table, (_, query) in SUMMARY_TABLES.items():
+            conn.execute(f"DELETE FROM {table}")
+            conn.execute(f"INSERT INTO {table} {query}")
+
+def check_summary_tables(repair=False):
+    """Compare the summary tables against a full recompute
+    
+    Returns a dict mapping each inconsistent table to a DataFrame of the
+    rows that differ, with ``stored`` and ``expected`` values side by side.
+    An empty dict means everything matches. With ``repair`` the tables are
+    rebuilt when a difference is found.
+    """
+    differences = {}
+    
+    # One transaction gives a consistent snapshot of summaries and base tables
+    with transaction() as conn:
+        for table, (keys, query) in SUMMARY_TABLES.items():
+            stored = pd.read_sql_query(f"SELECT * FROM {table}", conn)
+            expected = pd.read_sql_query(query, conn)
+            merged = stored.merge(
+                expected, on=list(keys), how="outer", suffixes=("_stored", "_expected")
+            )
+            
+            values = [column for column in expected.columns if column not in keys]
+            mismatch = pd.Series(False, index=merged.index)
+            for column in values:
+                mismatch |= merged[f"{column}_stored"].ne(merged[f"{column}_expected"])
+            
+            if mismatch.any():
+                differences[table] = merged[mismatch].reset_index(drop=True)
+    
+    if differences and repair:
+        rebuild_summary_tables()
+    return differences
+
+def save_users(users_df):
+    """Save users DataFrame to the database"""
+    with transaction("users") as conn:
+        cursor = conn.cursor()
+        
+        # Delete existing users (except for those being updated)
+        usernames = tuple(users_df['username'].tolist()) if not users_df.empty else ('',)
+        if len(usernames) == 1:
             # SQLite requires special handling for one-element tuples
-            cursor.execute("DELETE FROM equipment WHERE sku NOT IN (?)", skus)
+            cursor.execute("DELETE FROM users WHERE username NOT IN (?)", usernames)
         else:
-            cursor.execute("DELETE FROM equipment WHERE sku NOT IN {}".format(skus))
-    else:
-        cursor.execute("DELETE FROM equipment")
-    
-    # Insert or update equipment
-    for _, equip in equipment_df.iterrows():
-        cursor.execute('''
-        INSERT OR REPLACE INTO equipment (
-            sku, name, description, category, manufacturer, model, serial_number, 
-            purchase_date, purchase_price, status, checked_out_by, checkout_date, 
-            due_date, location, image_path, created_at, updated_at
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            equip['sku'],
-            equip['name'],
-            equip['description'],
-            equip['category'],
-            equip['manufacturer'],
-            equip['model'],
-            equip['serial_number'],
-            equip['purchase_date'],
-            equip['purchase_price'],
-            equip['status'],
-            equip['checked_out_by'],
-            equip['checkout_date'],
-            equip['due_date'],
-            equip['location'],
-            equip['image_path'],
-            equip['created_at'],
-            equip['updated_at']
-        ))
-    
-    conn.commit()
-    conn.close()
-
-def save_checkout_history(history_df):
-    """Save checkout history DataFrame to the database"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Clear existing history
-    cursor.execute("DELETE FROM checkout_history")
-    
-    # Insert history records
-    for _, record in history_df.iterrows():
-        cursor.execute('''
-        INSERT INTO checkout_history (
-            sku, equipment_name, user, checkout_date, due_date, return_date, notes
-        ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            record['sku'],
-            record['equipment_name'],
-            record['user'],
-            record['checkout_date'],
-            record['due_date'],
-            record['return_date'],
-            record['notes']
-        ))
-    
-    conn.commit()
-    conn.close()
-
-def generate_sku():
-    """Generate a unique SKU for new equipment"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Get the maximum SKU value
-    cursor.execute("SELECT sku FROM equipment WHERE sku LIKE 'LAB-%' ORDER BY sku DESC LIMIT 1")
-    result = cursor.fetchone()
-    
-    if result:
-        last_sku = result[0]
-        # Extract numeric part, assuming SKU format is LAB-XXXXX
-        next_id = int(last_sku.split('-')[1]) + 1
-    else:
-        next_id = 1
+            cursor.execute("DELETE FROM users WHERE username NOT IN {}".format(usernames))
+        
+        # Insert or update users
+        for _, user in users_df.iterrows():
+            cursor.execute('''
+            INSERT OR REPLACE INTO users (username, email, password, role, name, department, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                user['username'],
+                user['email'],
+                user['password'],
+                user['role'],
+                user['name'],
+                user['department'],
+                user['created_at']
+            ))
+
+# Columns that may be written through the row-level equipment API
+EQUIPMENT_COLUMNS = (
+    "sku", "name", "description", "category", "manufacturer", "model",
+    "serial_number", "purchase_date", "purchase_price", "status",
+    "checked_out_by", "checkout_date", "due_date", "location", "image_path",
+    "created_at", "updated_at"
+)
+
+def add_equipment(equipment):
+    """Insert a single equipment record given as a dict of column values
+    
+    A SKU is allocated in the same transaction when the record has none.
+    Returns the SKU of the new record.
+    """
+    unknown = set(equipment) - set(EQUIPMENT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown equipment columns: {', '.join(sorted(unknown))}")
+    
+    now = datetime.datetime.now().isoformat()
+    record = {"created_at": now, "updated_at": now}
+    record.update(equipment)
+    
+    with transaction("equipment") as conn:
+        if not record.get("sku"):
+            record["sku"] = allocate_skus()[0]
+        
+        columns = ", ".join(record)
+        placeholders = ", ".join("?" for _ in record)
+        conn.execute(
+            f"INSERT INTO equipment ({columns}) VALUES ({placeholders})",
+            tuple(record.values())
+        )
+        _note_equipment_skus([record["sku"]])
+    return record["sku"]
+
+def add_equipment_rows(columns, rows):
+    """Insert many equipment records given as value tuples in ``columns`` order
+    
+    All rows go through one prepared statement with executemany() inside a
+    single transaction. Returns the number of rows inserted.
+    """
+    unknown = set(columns) - set(EQUIPMENT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown equipment columns: {', '.join(sorted(unknown))}")
+    
+    placeholders = ", ".join("?" for _ in columns)
+    with transaction("equipment") as conn:
+        cursor = conn.executemany(
+            f"INSERT INTO equipment ({', '.join(columns)}) VALUES ({placeholders})",
+            rows
+        )
+        # Rows may come from a generator, so the SKUs are not kept
+        _note_equipment_skus(None)
+        return cursor.rowcount
+
+# Per-row insert triggers that bulk_equipment_insert() replaces with one
+# set-based pass over the new rows
+BULK_DEFERRED_TRIGGERS = ("equipment_fts_insert", "equipment_summary_insert")
+
+@contextmanager
+def bulk_equipment_insert():
+    """Transaction for adding many equipment rows, indexed and counted at the end
+    
+    FTS5 flushes its pending index data at every statement, so through the
+    insert trigger each row becomes its own tiny segment, and the summary
+    trigger rewrites the same count rows once per item. Both slow large
+    imports down more and more. Inside this block those triggers are
+    dropped; on exit the new rows are indexed with one INSERT ... SELECT,
+    the equipment summaries are recomputed and the triggers restored, all
+    in the same transaction.
+    """
+    with transaction("equipment") as conn:
+        placeholders = ", ".join("?" for _ in BULK_DEFERRED_TRIGGERS)
+        triggers = conn.execute(
+            f"SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name IN ({placeholders})",
+            BULK_DEFERRED_TRIGGERS
+        ).fetchall()
+        last_rowid = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM equipment").fetchone()[0]
+        for name, _ in triggers:
+            conn.execute(f"DROP TRIGGER {name}")
+        
+        yield conn
+        
+        conn.execute('''
+        INSERT INTO equipment_fts (rowid, sku, name, description, manufacturer)
+        SELECT rowid, sku, name, description, manufacturer FROM equipment WHERE rowid > ?
+        ''', (last_rowid,))
+        for table, (_, query) in SUMMARY_TABLES.items():
+            if table.startswith("equipment_"):
+                conn.execute(f"DELETE FROM {table}")
+                conn.execute(f"INSERT INTO {table} {query}")
+        for _, sql in triggers:
+            conn.execute(sql)
+
+def find_existing_serials(serial_numbers):
+    """Get the subset of the given serial numbers already used by equipment"""
+    conn = get_db_connection()
+    rows = conn.execute(
+        "SELECT DISTINCT serial_number FROM equipment WHERE serial_number IN (SELECT value FROM json_each(?))",
+        (json.dumps(list(serial_numbers)),)
+    ).fetchall()
+    return {row[0] for row in rows}
+
+class EquipmentConflictError(ValueError):
+    """Raised when equipment changed or is in the wrong state for a write
+    
+    ``conflicts`` maps each offending SKU to the reason. The whole write
+    was rolled back.
+    """
+    
+    def __init__(self, conflicts):
+        self.conflicts = conflicts
+        super().__init__(f"{len(conflicts)} item(s) cannot be processed: {', '.join(conflicts)}")
+
+def update_equipment(skus, expected_version=None, **fields):
+    """Update the given columns for one SKU or a list of SKUs
+    
+    Each SKU costs one primary-key UPDATE and all of them run inside a single
+    transaction. ``updated_at`` is stamped automatically unless provided and
+    every changed row gets a new version. Pass the version that was read as
+    ``expected_version`` (a dict of SKU to version for a list) to only write
+    rows nobody changed since; otherwise EquipmentConflictError is raised
+    and nothing is written. Returns the number of rows changed.
+    """
+    if isinstance(skus, str):
+        if expected_version is not None:
+            expected_version = {skus: expected_version}
+        skus = [skus]
+    
+    unknown = set(fields) - set(EQUIPMENT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown equipment columns: {', '.join(sorted(unknown))}")
+    if "sku" in fields:
+        raise ValueError("The SKU of existing equipment cannot be changed")
+    if not fields or not skus:
+        return 0
     
-    conn.close()
+    fields.setdefault("updated_at", datetime.datetime.now().isoformat())
+    assignments = ", ".join(f"{column} = ?" for column in fields)
+    values = tuple(fields.values())
     
-    # Format: LAB-00001, LAB-00002, etc.
-    return f"LAB-{next_id:05d}"
+    if expected_version is None:
+        with transaction("equipment") as conn:
+            _note_equipment_skus(skus)
+            cursor = conn.executemany(
+                f"UPDATE equipment SET {assignments}, version = version + 1 WHERE sku = ?",
+                [values + (sku,) for sku in skus]
+            )
+            return cursor.rowcount
+    
+    conflicts = {}
+    with transaction("equipment") as conn:
+        _note_equipment_skus(skus)
+        for sku in skus:
+            cursor = conn.execute(
+                f"UPDATE equipment SET {assignments}, version = version + 1 WHERE sku = ? AND version = ?",
+                values + (sku, int(expected_version[sku]))
+            )
+            if cursor.rowcount == 0:
+                exists = conn.execute("SELECT 1 FROM equipment WHERE sku = ?", (sku,)).fetchone()
+                conflicts[sku] = "Changed by someone else" if exists else "Not found in the inventory"
+        
+        # Raising inside the transaction rolls back the rows already updated
+        if conflicts:
+            raise EquipmentConflictError(conflicts)
+        return len(skus)
+
+class CartConflictError(EquipmentConflictError):
+    """Raised when items in a checkout or return cart cannot be processed"""
+
+def _cart_conflicts(conn, cart_sql, params, expected_status, holder=None):
+    """Find cart items that are missing, in the wrong status, held by someone
+    else or changed since they were put in the cart
+    
+    ``cart_sql`` selects the cart's SKUs and the versions read (NULL when
+    unknown) in columns named sku and version.
+    """
+    rows = conn.execute(f'''
+    SELECT cart.sku, e.status, e.checked_out_by, e.version, cart.version
+    FROM ({cart_sql}) cart
+    LEFT JOIN equipment e ON e.sku = cart.sku
+    WHERE e.sku IS NULL OR e.status != ? OR (? IS NOT NULL AND e.checked_out_by IS NOT ?)
+        OR e.version != COALESCE(cart.version, e.version)
+    ''', params + (expected_status, holder, holder)).fetchall()
+    
+    conflicts = {}
+    for sku, status, checked_out_by, version, read_version in rows:
+        if status is None:
+            conflicts[sku] = "Not found in the inventory"
+        elif status != expected_status:
+            conflicts[sku] = f"Currently {status}"
+        elif holder is not None and checked_out_by != holder:
+            conflicts[sku] = f"Checked out by {checked_out_by}"
+        else:
+            conflicts[sku] = "Changed by someone else since it was added to the cart"
+    return conflicts
 
-# Initialize the database
-initialize_database()
\ No newline at end of file
+def checkout_items(skus, user, checkout_date, due_date, notes=None, versions=None):
+    """Check out every SKU in a cart to ``user`` in one transaction
+    
+    All items must be in stock and, when ``versions`` maps SKUs to the
+    versions read, unchanged since; otherwise CartConflictError lists the
+    ones that are not and nothing is changed. The equipment rows and the
+    new history rows are written with one set-based statement each. Returns
+    the number of items checked out.
+    """
+    versions = versions or {}
+    cart = json.dumps([
+        {"sku": sku, "version": None if versions.get(sku) is None else int(versions[sku])}
+        for sku in dict.fromkeys(skus)
+    ])
+    cart_sql = '''
+    SELECT json_extract(value, '$.sku') AS sku, json_extract(value, '$.version') AS version
+    FROM json_each(?)
+    '''
+    now = datetime.datetime.now().isoformat()
+    
+    with transaction("equipment", "checkout_history") as conn:
+        conflicts = _cart_conflicts(conn, cart_sql, (cart,), EQUIPMENT_STATUS["in_stock"])
+        if conflicts:
+            raise CartConflictError(conflicts)
+        _note_equipment_skus(skus)
+        
+        conn.execute(f'''
+        INSERT INTO checkout_history (sku, equipment_name, user, checkout_date, due_date, return_date, notes)
+        SELECT sku, name, ?, ?, ?, NULL, ?
+        FROM equipment
+        WHERE sku IN (SELECT sku FROM ({cart_sql}))
+        ''', (user, checkout_date, due_date, notes, cart))
+        
+        cursor = conn.execute(f'''
+        UPDATE equipment
+        SET status = ?, checked_out_by = ?, checkout_date = ?, due_date = ?, updated_at = ?,
+            version = version + 1
+        WHERE sku IN (SELECT sku FROM ({cart_sql}))
+        ''', (EQUIPMENT_STATUS["checked_out"], user, checkout_date, due_date, now, cart))
+        return cursor.rowcount
+
+def return_items(items, return_date, holder=None):
+    """Return every item in a cart in one transaction
+    
+    ``items`` is a list of dicts with the ``sku``, the ``status`` the item
+    returns to, ``notes`` appended to its open checkout and optionally the
+    ``version`` read. All items must be checked out, to ``holder`` when
+    given, and unchanged when a version is given; otherwise
+    CartConflictError lists the ones that are not and nothing is changed.
+    Returns the number of items returned.
+    """
+    cart = json.dumps(list({item["sku"]: item for item in items}.values()))
+    cart_sql = '''
+    SELECT json_extract(value, '$.sku') AS sku, json_extract(value, '$.status') AS status,
+        json_extract(value, '$.notes') AS notes, json_extract(value, '$.version') AS version
+    FROM json_each(?)
+    '''
+    now = datetime.datetime.now().isoformat()
+    
+    with transaction("equipment", "checkout_history") as conn:
+        conflicts = _cart_conflicts(conn, cart_sql, (cart,), EQUIPMENT_STATUS["checked_out"], holder)
+        if conflicts:
+            raise CartConflictError(conflicts)
+        _note_equipment_skus(item["sku"] for item in items)
+        
+        # Close the latest open checkout of each item; the cart's notes go on
+        # a new line after any notes made at checkout
+        conn.execute(f'''
+        UPDATE checkout_history
+        SET return_date = ?,
+            notes = CASE
+                WHEN latest.notes IS NULL THEN checkout_history.notes
+                WHEN checkout_history.notes IS NULL OR checkout_history.notes = '' THEN latest.notes
+                ELSE checkout_history.notes || char(10) || latest.notes
+            END
+        FROM (
+            SELECT MAX(h.id) AS id, cart.notes
+            FROM ({cart_sql}) cart
+            JOIN checkout_history h ON h.sku = cart.sku AND h.return_date IS NULL
+            GROUP BY cart.sku
+        ) latest
+        WHERE checkout_history.id = latest.id
+        ''', (return_date, cart))
+        
+        cursor = conn.execute(f'''
+        UPDATE equipment
+        SET status = cart.status, checked_out_by = NULL, checkout_date = NULL, due_date = NULL, updated_at = ?,
+            version = equipment.version + 1
+        FROM ({cart_sql}) cart
+        WHERE equipment.sku = cart.sku
+        ''', (now, cart))
+        return cursor.rowcount
+
+def format_sku(number):
+    """Format a sequence number as an equipment SKU, e.g. LAB-00001"""
+    return f"{SKU_PREFIX}{number:0{SKU_DIGITS}d}"
+
+def allocate_skus(count=1):
+    """Atomically reserve ``count`` consecutive SKUs and return them in order
+    
+    Call inside the transaction that inserts the equipment so that the SKUs
+    are only consumed if the insert commits. Concurrent callers never
+    receive the same SKU.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    
+    with transaction() as conn:
+        start = conn.execute(
+            "SELECT next_value FROM sequences WHERE name = ?", (SKU_SEQUENCE,)
+        ).fetchone()[0]
+        conn.execute(
+            "UPDATE sequences SET next_value = next_value + ? WHERE name = ?",
+            (count, SKU_SEQUENCE)
+        )
+    return [format_sku(number) for number in range(start, start + count)]
+
+def peek_next_sku():
+    """Get the SKU the next allocation will return, without reserving it"""
+    conn = get_db_connection()
+    next_value = conn.execute(
+        "SELECT next_value FROM sequences WHERE name = ?", (SKU_SEQUENCE,)
+    ).fetchone()[0]
+    return format_sku(next_value)
@@ -0,0 +1,253 @@
+import os
+import datetime
+import hashlib
+import logging
+import smtplib
+import threading
+from email.message import EmailMessage
+from .database import get_db_connection, transaction
+from .constants import EMAIL_BATCH_SIZE, EMAIL_MAX_ATTEMPTS, EMAIL_RETRY_SECONDS, EMAIL_RETRY_MAX_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# SMTP server settings. Without a host, messages are logged at INFO level
+# instead of sent.
+SMTP_HOST = os.environ.get("INVENTORY_SMTP_HOST", "")
+SMTP_PORT = int(os.environ.get("INVENTORY_SMTP_PORT", "587"))
+SMTP_USER = os.environ.get("INVENTORY_SMTP_USER", "")
+SMTP_PASSWORD = os.environ.get("INVENTORY_SMTP_PASSWORD", "")
+SMTP_STARTTLS = os.environ.get("INVENTORY_SMTP_STARTTLS", "1") == "1"
+SMTP_SENDER = os.environ.get("INVENTORY_SMTP_SENDER", "inventory@localhost")
+SMTP_TIMEOUT = 30
+
+# Seconds a claimed message stays hidden from other workers while it is sent
+EMAIL_LEASE_SECONDS = 300
+
+# Seconds the worker sleeps when the outbox is empty, unless woken by enqueue
+EMAIL_POLL_INTERVAL = 60
+
+# Background worker state; see start_email_worker()
+_worker_lock = threading.Lock()
+_worker_thread = None
+_worker_stop = threading.Event()
+_worker_wake = threading.Event()
+
+def _now():
+    """Current local time; outbox timestamps are compared as ISO strings"""
+    return datetime.datetime.now()
+
+def enqueue_email(to_email, subject, body, dedupe_key=None):
+    """Queue an email for the background worker and return immediately
+    
+    Messages with the same ``dedupe_key`` are only queued once. By default
+    the key covers the recipient, subject, body and date, so the same
+    message is sent at most once a day. Returns False for a duplicate.
+    """
+    now = _now()
+    if dedupe_key is None:
+        content = "\0".join((to_email, subject, body, now.date().isoformat()))
+        dedupe_key = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    
+    with transaction() as conn:
+        cursor = conn.execute('''
+        INSERT OR IGNORE INTO email_outbox (to_email, subject, body, dedupe_key, next_attempt_at, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', (to_email, subject, body, dedupe_key, now.isoformat(), now.isoformat()))
+        queued = cursor.rowcount == 1
+    
+    if queued:
+        _worker_wake.set()
+    return queued
+
+def get_outbox_counts():
+    """Get the number of outbox messages per status"""
+    conn = get_db_connection()
+    rows = conn.execute("SELECT status, COUNT(*) FROM email_outbox GROUP BY status").fetchall()
+    return {status: count for status, count in rows}
+
+def _claim_batch():
+    """Lease up to EMAIL_BATCH_SIZE due messages to this worker
+    
+    Claiming moves next_attempt_at past the lease, so a second worker (or
+    process) skips them, and a crashed worker's messages become due again.
+    """
+    now = _now()
+    lease = now + datetime.timedelta(seconds=EMAIL_LEASE_SECONDS)
+    
+    with transaction() as conn:
+        rows = conn.execute('''
+        UPDATE email_outbox
+        SET next_attempt_at = ?, attempts = attempts + 1
+        WHERE id IN (
+            SELECT id FROM email_outbox
+            WHERE status = 'pending' AND next_attempt_at <= ?
+            ORDER BY next_attempt_at, id
+            LIMIT ?
+        )
+        RETURNING id, to_email, subject, body, attempts
+        ''', (lease.isoformat(), now.isoformat(), EMAIL_BATCH_SIZE)).fetchall()
+    
+    return sorted((dict(row) for row in rows), key=lambda row: row["id"])
+
+def _retry_delay(attempts):
+    """Seconds to wait before the next attempt, doubling with each failure"""
+    return min(EMAIL_RETRY_SECONDS * 2 ** (attempts - 1), EMAIL_RETRY_MAX_SECONDS)
+
+def _record_results(sent, failed):
+    """Mark sent messages and reschedule or give up on failed ones
+    
+    ``failed`` holds (message, error, permanent) tuples.
+    """
+    now = _now()
+    
+    with transaction() as conn:
+        conn.executemany(
+            "UPDATE email_outbox SET status = 'sent', sent_at = ?, last_error = NULL WHERE id = ?",
+            [(now.isoformat(), message["id"]) for message in sent]
+        )
+        
+        for message, error, permanent in failed:
+            if permanent or message["attempts"] >= EMAIL_MAX_ATTEMPTS:
+                conn.execute(
+                    "UPDATE email_outbox SET status = 'failed', last_error = ? WHERE id = ?",
+                    (error, message["id"])
+                )
+            else:
+                retry_at = now + datetime.timedelta(seconds=_retry_delay(message["attempts"]))
+                conn.execute(
+                    "UPDATE email_outbox SET next_attempt_at = ?, last_error = ? WHERE id = ?",
+                    (retry_at.isoformat(), error, message["id"])
+                )
+
+def _open_smtp():
+    """Connect and log in to the configured SMTP server"""
+    server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+    if SMTP_STARTTLS:
+        server.starttls()
+    if SMTP_USER:
+        server.login(SMTP_USER, SMTP_PASSWORD)
+    return server
+
+def _close_smtp(server):
+    """Close an SMTP connection if there is one; always returns None"""
+    if server is not None:
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+    return None
+
+def _build_message(message):
+    """Turn an outbox row into an email from SMTP_SENDER"""
+    email = EmailMessage()
+    email["From"] = SMTP_SENDER
+    email["To"] = message["to_email"]
+    email["Subject"] = message["subject"]
+    email.set_content(message["body"])
+    return email
+
+def _deliver(server, batch):
+    """Send a batch over one SMTP connection, reconnecting if it drops
+    
+    Returns the connection to reuse for the next batch (None if it could
+    not be opened) and the sent and failed messages.
+    """
+    sent = []
+    failed = []
+    
+    for position, message in enumerate(batch):
+        if not SMTP_HOST:
+            logger.info("Email to %s: %s\n%s", message["to_email"], message["subject"], message["body"])
+            sent.append(message)
+            continue
+        
+        if server is None:
+            try:
+                server = _open_smtp()
+            except (smtplib.SMTPException, OSError) as e:
+                # No point trying the rest of the batch against a server that is down
+                failed.extend((pending, str(e), False) for pending in batch[position:])
+                break
+        
+        try:
+            try:
+                server.send_message(_build_message(message))
+            except smtplib.SMTPServerDisconnected:
+                # Idle connections get closed by the server; retry once on a new one
+                server = _open_smtp()
+                server.send_message(_build_message(message))
+            sent.append(message)
+        except smtplib.SMTPRecipientsRefused as e:
+            failed.append((message, str(e), True))
+        except (smtplib.SMTPException, OSError) as e:
+            failed.append((message, str(e), False))
+            # Transient SMTP errors leave the connection usable; network errors do not
+            if not isinstance(e, smtplib.SMTPResponseException):
+                server = _close_smtp(server)
+    
+    return server, sent, failed
+
+def process_outbox(server=None):
+    """Send every message that is due, batch by batch
+    
+    Returns the SMTP connection for reuse along with the number of
+    messages sent and failed in this pass.
+    """
+    total_sent = 0
+    total_failed = 0
+    
+    while True:
+        batch = _claim_batch()
+        if not batch:
+            return server, total_sent, total_failed
+        
+        server, sent, failed = _deliver(server, batch)
+        _record_results(sent, failed)
+        total_sent += len(sent)
+        total_failed += len(failed)
+
+def _worker_loop():
+    """Drain the outbox until stop_email_worker() is called"""
+    server = None
+    
+    while not _worker_stop.is_set():
+        _worker_wake.clear()
+        try:
+            server, _, _ = process_outbox(server)
+        except Exception:
+            # Keep the worker alive; leased messages become due again later
+            logger.exception("Email delivery failed")
+            server = _close_smtp(server)
+        
+        # Keep the connection while more mail is arriving, drop it when idle
+        if not _worker_wake.wait(EMAIL_POLL_INTERVAL):
+            server = _close_smtp(server)
+    
+    _close_smtp(server)
+
+def start_email_worker():
+    """Start the background email worker unless it is already running
+    
+    Safe to call on every rerun; only one worker runs per process.
+    """
+    global _worker_thread
+    
+    with _worker_lock:
+        if _worker_thread is not None and _worker_thread.is_alive():
+            return
+        
+        _worker_stop.clear()
+        _worker_thread = threading.Thread(target=_worker_loop, name="email-worker", daemon=True)
+        _worker_thread.start()
+
+def stop_email_worker():
+    """Stop the background email worker and wait for it to finish"""
+    global _worker_thread
+    
+    with _worker_lock:
+        thread, _worker_thread = _worker_thread, None
+        _worker_stop.set()
+        _worker_wake.set()
+    
+    if thread is not None:
+        thread.join()
@@ -0,0 +1,127 @@
+import threading
+import pandas as pd
+from .database import get_equipment, get_equipment_by_skus, table_version, equipment_changes_since
+
+# Columns kept in memory for labels, lookups and status or holder lists
+INDEX_COLUMNS = (
+    "sku", "name", "status", "category", "checked_out_by",
+    "checkout_date", "due_date", "version"
+)
+
+class EquipmentIndex:
+    """Equipment rows held in memory and looked up by SKU, status or holder
+    
+    Use get_equipment_index() for the shared instance, which catches up
+    with committed writes before it is returned: only the rows written
+    since the last call are read again. Safe to use from several threads.
+    """
+    
+    def __init__(self):
+        # _lock guards the dicts below; _refresh_lock lets one refresh run
+        # at a time without blocking readers while it reads the database
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._rows = {}
+        self._by_status = {}
+        self._by_holder = {}
+        self.version = None
+        self.stats = {"rebuilds": 0, "updates": 0, "rows_updated": 0}
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._rows)
+    
+    @staticmethod
+    def _remove(rows, by_status, by_holder, sku):
+        """Drop a SKU from the rows and partitions"""
+        row = rows.pop(sku, None)
+        if row is not None:
+            by_status.get(row[2], {}).pop(sku, None)
+            by_holder.get(row[4], {}).pop(sku, None)
+    
+    @staticmethod
+    def _add(rows, by_status, by_holder, row):
+        """Add a row given as a tuple in INDEX_COLUMNS order"""
+        sku = row[0]
+        rows[sku] = row
+        # Partitions are dicts used as ordered sets
+        by_status.setdefault(row[2], {})[sku] = None
+        if row[4] is not None:
+            by_holder.setdefault(row[4], {})[sku] = None
+    
+    @staticmethod
+    def _tuples(df):
+        """Get the rows of ``df`` as tuples, with SQL NULLs as None"""
+        # NULLs come back as NaN or None depending on the column
+        df = df.astype(object).where(df.notna(), None)
+        return df.itertuples(index=False, name=None)
+    
+    def _rebuild(self, df):
+        """Replace every row with those in ``df``
+        
+        The new rows are indexed on the side and swapped in at once, so
+        readers see either the old index or the new one, never a partial one.
+        """
+        index = ({}, {}, {})
+        for row in self._tuples(df):
+            self._add(*index, row)
+        with self._lock:
+            self._rows, self._by_status, self._by_holder = index
+    
+    def _update(self, df, skus):
+        """Replace the rows of ``skus`` with those in ``df``"""
+        rows = list(self._tuples(df))
+        with self._lock:
+            index = (self._rows, self._by_status, self._by_holder)
+            for sku in skus:
+                self._remove(*index, sku)
+            for row in rows:
+                self._add(*index, row)
+    
+    def refresh(self):
+        """Catch up with the equipment table, row by row where possible"""
+        with self._refresh_lock:
+            version = table_version("equipment")
+            changed = None if self.version is None else equipment_changes_since(self.version)
+            
+            if changed is None:
+                self._rebuild(get_equipment(columns=INDEX_COLUMNS))
+                self.stats["rebuilds"] += 1
+            elif changed:
+                self._update(get_equipment_by_skus(changed, INDEX_COLUMNS), changed)
+                self.stats["updates"] += 1
+                self.stats["rows_updated"] += len(changed)
+            self.version = version
+    
+    def get(self, sku):
+        """Get one item as a dict of INDEX_COLUMNS, or None if there is no such SKU"""
+        with self._lock:
+            row = self._rows.get(sku)
+        return dict(zip(INDEX_COLUMNS, row)) if row is not None else None
+    
+    def skus(self, status=None, holder=None):
+        """Get the SKUs with a status and/or held by a user (default: all), in order"""
+        with self._lock:
+            if status is None and holder is None:
+                selected = list(self._rows)
+            elif holder is None:
+                selected = list(self._by_status.get(status, ()))
+            else:
+                selected = list(self._by_holder.get(holder, ()))
+                if status is not None:
+                    selected = [sku for sku in selected if self._rows[sku][2] == status]
+        return sorted(selected)
+    
+    def frame(self, skus):
+        """Get the given SKUs as a DataFrame of INDEX_COLUMNS, skipping unknown ones"""
+        with self._lock:
+            rows = [self._rows[sku] for sku in skus if sku in self._rows]
+        return pd.DataFrame(rows, columns=list(INDEX_COLUMNS))
+
+# Index shared by every session of this process
+_index = EquipmentIndex()
+
+def get_equipment_index():
+    """Get the shared equipment index, up to date with committed writes"""
+    _index.refresh()
+    return _index
@@ -0,0 +1,103 @@
+import io
+import gzip
+import importlib.util
+import tempfile
+import pandas as pd
+from .database import get_db_connection
+
+# Export formats: file extension and MIME type
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Arrow IPC": ("arrow", "application/vnd.apache.arrow.file"),
+}
+
+# Formats that need the optional pyarrow package
+COLUMNAR_FORMATS = ("Parquet", "Arrow IPC")
+
+# Rows fetched from the cursor and written per step. Together with the spool
+# size this bounds memory use regardless of how many rows are exported.
+EXPORT_CHUNK_ROWS = 5000
+
+# Exports larger than this are spooled to a temporary file on disk
+EXPORT_SPOOL_BYTES = 8 * 1024 * 1024
+
+def available_formats():
+    """Get the export formats usable with the installed packages"""
+    if importlib.util.find_spec("pyarrow") is None:
+        return [name for name in EXPORT_FORMATS if name not in COLUMNAR_FORMATS]
+    return list(EXPORT_FORMATS)
+
+def export_file_name(stem, format_name):
+    """Build a download file name such as equipment_report.csv.gz"""
+    return f"{stem}.{EXPORT_FORMATS[format_name][0]}"
+
+def _query_chunks(sql, params):
+    """Run a query and yield the result as DataFrames of EXPORT_CHUNK_ROWS rows"""
+    conn = get_db_connection()
+    yield from pd.read_sql_query(sql, conn, params=params, chunksize=EXPORT_CHUNK_ROWS)
+
+def _write_csv(chunks, binary_file):
+    """Write chunks as CSV with a single header row"""
+    text_file = io.TextIOWrapper(binary_file, encoding="utf-8", newline="")
+    for number, chunk in enumerate(chunks):
+        chunk.to_csv(text_file, header=number == 0, index=False)
+    text_file.flush()
+    # Leave the underlying file open for the caller
+    text_file.detach()
+
+def _write_columnar(chunks, binary_file, format_name):
+    """Write chunks as Parquet or an Arrow IPC file, one batch per chunk"""
+    import pyarrow as pa
+    
+    writer = None
+    schema = None
+    
+    for chunk in chunks:
+        if writer is None:
+            # Columns that are empty in the first chunk have no type yet
+            first = pa.Table.from_pandas(chunk, preserve_index=False)
+            schema = pa.schema([
+                field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                for field in first.schema
+            ])
+            if format_name == "Parquet":
+                import pyarrow.parquet as pq
+                writer = pq.ParquetWriter(binary_file, schema)
+            else:
+                writer = pa.ipc.new_file(binary_file, schema)
+        
+        try:
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # A later chunk disagrees with the types seen first, e.g. numbers
+            # in a column that was empty until now
+            table = pa.Table.from_pandas(chunk, preserve_index=False).cast(schema, safe=False)
+        writer.write_table(table)
+    
+    writer.close()
+
+def export_query(sql, params=(), format_name="CSV"):
+    """Run a query and write its result as a downloadable file
+    
+    Rows are read from the cursor and written in chunks, so memory use does
+    not grow with the size of the result. Returns a file object positioned
+    at the start of the export.
+    """
+    if format_name not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {format_name}")
+    
+    output = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+    chunks = _query_chunks(sql, params)
+    
+    if format_name == "CSV":
+        _write_csv(chunks, output)
+    elif format_name == "CSV (gzip)":
+        with gzip.GzipFile(fileobj=output, mode="wb") as compressed:
+            _write_csv(chunks, compressed)
+    else:
+        _write_columnar(chunks, output, format_name)
+    
+    output.seek(0)
+    return output
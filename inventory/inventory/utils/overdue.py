@@ -0,0 +1,166 @@
+import datetime
+import logging
+import threading
+import pandas as pd
+from .database import get_db_connection, transaction
+from .constants import EQUIPMENT_STATUS, DUE_SOON_DAYS, OVERDUE_SCAN_INTERVAL
+
+# Buckets written by scan_due_dates(), most urgent first
+DUE_BUCKETS = ("overdue", "due_today", "due_soon")
+
+logger = logging.getLogger(__name__)
+
+# Background scanner state; see start_overdue_scanner()
+_scanner_lock = threading.Lock()
+_scanner_thread = None
+_scanner_stop = threading.Event()
+
+def scan_due_dates(today=None):
+    """Recompute the due_items and due_buckets tables
+    
+    Checked out items due before today are overdue, items due today are
+    due_today and items due within DUE_SOON_DAYS after that are due_soon.
+    Only those items are read, through the due date index. Returns the
+    number of items in the buckets.
+    
+    Between scans, triggers on equipment keep the buckets current: written
+    items leave them and, if still checked out and due soon, are placed
+    again relative to the date of this scan. A scan is only needed for the
+    date to move on.
+    """
+    today = today or datetime.date.today()
+    params = {
+        "today": today.isoformat(),
+        "tomorrow": (today + datetime.timedelta(days=1)).isoformat(),
+        "horizon": (today + datetime.timedelta(days=DUE_SOON_DAYS + 1)).isoformat(),
+        "status": EQUIPMENT_STATUS["checked_out"],
+    }
+    bucket = '''
+        CASE
+            WHEN due_date < :today THEN 'overdue'
+            WHEN due_date < :tomorrow THEN 'due_today'
+            ELSE 'due_soon'
+        END
+    '''
+    
+    with transaction() as conn:
+        conn.execute("DELETE FROM due_items")
+        conn.execute("DELETE FROM due_buckets")
+        
+        cursor = conn.execute(f'''
+        INSERT INTO due_items (sku, holder, name, checkout_date, due_date, bucket, days_overdue)
+        SELECT sku, COALESCE(checked_out_by, ''), name, checkout_date, due_date, {bucket},
+            CAST(julianday(:today) - julianday(due_date) AS INTEGER)
+        FROM equipment
+        WHERE due_date < :horizon AND status = :status
+        ''', params)
+        
+        # Per-holder counts come from the trigger-maintained due date summary
+        conn.execute(f'''
+        INSERT INTO due_buckets (holder, bucket, items)
+        SELECT holder, {bucket}, SUM(count)
+        FROM equipment_due_counts
+        WHERE due_date < :horizon
+        GROUP BY 1, 2
+        ''', params)
+        
+        conn.execute(
+            "INSERT OR REPLACE INTO due_scans (id, as_of, scanned_at, horizon) VALUES (1, ?, ?, ?)",
+            (params["today"], datetime.datetime.now().isoformat(), params["horizon"])
+        )
+        return cursor.rowcount
+
+def last_scan():
+    """Get the date and time of the last scan as a dict, or None before the first"""
+    conn = get_db_connection()
+    row = conn.execute("SELECT as_of, scanned_at FROM due_scans WHERE id = 1").fetchone()
+    return dict(row) if row else None
+
+def _ensure_scanned():
+    """Scan now if there has been no scan yet today, e.g. without the scanner"""
+    scan = last_scan()
+    if scan is None or scan["as_of"] != datetime.date.today().isoformat():
+        scan_due_dates()
+
+def get_due_items(username=None, bucket=None):
+    """Get the items in the due date buckets, most overdue first
+    
+    Filter by holder with ``username`` and by one of DUE_BUCKETS with
+    ``bucket``. Items without a recorded holder have an empty username.
+    """
+    _ensure_scanned()
+    
+    clauses = []
+    params = []
+    
+    if username is not None:
+        clauses.append("holder = ?")
+        params.append(username)
+    
+    if bucket is not None:
+        clauses.append("bucket = ?")
+        params.append(bucket)
+    
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    
+    conn = get_db_connection()
+    return pd.read_sql_query(f'''
+    SELECT sku, name, holder AS checked_out_by, checkout_date, due_date, bucket, days_overdue
+    FROM due_items{where}
+    ORDER BY days_overdue DESC, sku
+    ''', conn, params=params)
+
+def get_due_buckets():
+    """Get overdue, due today and due soon counts per holder, most overdue first"""
+    _ensure_scanned()
+    
+    columns = ", ".join(
+        f"SUM(CASE WHEN bucket = '{bucket}' THEN items ELSE 0 END) AS {bucket}"
+        for bucket in DUE_BUCKETS
+    )
+    
+    conn = get_db_connection()
+    return pd.read_sql_query(f'''
+    SELECT holder AS username, {columns}
+    FROM due_buckets
+    GROUP BY holder
+    ORDER BY overdue DESC, due_today DESC, due_soon DESC, holder
+    ''', conn)
+
+def _scanner_loop(interval):
+    """Scan every ``interval`` seconds until stop_overdue_scanner() is called"""
+    while not _scanner_stop.is_set():
+        try:
+            scan_due_dates()
+        except Exception:
+            # Keep the scanner alive; the next run will try again
+            logger.exception("Overdue scan failed")
+        _scanner_stop.wait(interval)
+
+def start_overdue_scanner(interval=OVERDUE_SCAN_INTERVAL):
+    """Start the background overdue scanner unless it is already running
+    
+    Safe to call on every rerun; only one scanner runs per process.
+    """
+    global _scanner_thread
+    
+    with _scanner_lock:
+        if _scanner_thread is not None and _scanner_thread.is_alive():
+            return
+        
+        _scanner_stop.clear()
+        _scanner_thread = threading.Thread(
+            target=_scanner_loop, args=(interval,), name="overdue-scanner", daemon=True
+        )
+        _scanner_thread.start()
+
+def stop_overdue_scanner():
+    """Stop the background overdue scanner and wait for it to finish"""
+    global _scanner_thread
+    
+    with _scanner_lock:
+        thread, _scanner_thread = _scanner_thread, None
+        _scanner_stop.set()
+    
+    if thread is not None:
+        thread.join()
@@ -1,6 +1,4 @@
 import os
-from PIL import Image
-import numpy as np
 from .database import IMAGES_DIR
 
 # Mock QR code functionality for development
@@ -8,6 +6,10 @@ from .database import IMAGES_DIR
 
 def generate_qr_code(sku):
     """Generate a placeholder QR code for a given SKU"""
+    # PIL is only imported once a code is drawn, not by every page that
+    # imports this module
+    from PIL import Image
+    
     # Create a blank image
     img = Image.new('RGB', (300, 300), color='white')
     
@@ -0,0 +1,144 @@
+import datetime
+import numpy as np
+import pandas as pd
+from .database import get_db_connection, cached_query, apply_column_types
+
+# Bucket sizes offered for utilization timelines, as pandas frequencies
+UTILIZATION_FREQUENCIES = {"Day": "D", "Week": "W-MON", "Month": "MS"}
+
+# Group name for equipment without a category
+UNCATEGORIZED = "Uncategorized"
+
+def load_intervals(start_date, end_date):
+    """Get checkout intervals overlapping start_date through end_date
+    
+    Each row is one checkout with its SKU, current category and the
+    half-open day interval [start, end) it was out for, clipped to the
+    window. Items not yet returned count as out until the end of today.
+    """
+    today = datetime.date.today()
+    # Cached until either table is written to; open checkouts depend on today
+    return cached_query(
+        ("checkout_history", "equipment"), "utilization_intervals", (start_date, end_date, today),
+        lambda: _load_intervals(start_date, end_date, today)
+    )
+
+def _load_intervals(start_date, end_date, today):
+    """Read and clip the intervals for load_intervals()"""
+    window_start = np.datetime64(start_date, "D")
+    window_end = np.datetime64(end_date, "D") + 1
+    today_end = np.datetime64(today, "D") + 1
+    
+    conn = get_db_connection()
+    intervals = pd.read_sql_query('''
+    SELECT h.sku, e.category, h.checkout_date, h.return_date
+    FROM checkout_history h
+    LEFT JOIN equipment e ON e.sku = h.sku
+    WHERE h.checkout_date < ? AND (h.return_date IS NULL OR h.return_date >= ?)
+    ''', conn, params=(str(window_end), str(window_start)))
+    
+    apply_column_types(intervals)
+    start = intervals["checkout_date"].to_numpy("datetime64[D]")
+    end = intervals["return_date"].to_numpy("datetime64[D]")
+    end = np.where(np.isnat(end), today_end, end)
+    
+    intervals["start"] = np.clip(start, window_start, window_end)
+    intervals["end"] = np.clip(end, window_start, window_end)
+    intervals["category"] = intervals["category"].fillna(UNCATEGORIZED)
+    intervals = intervals[intervals["end"] > intervals["start"]]
+    return intervals[["sku", "category", "start", "end"]].reset_index(drop=True)
+
+def category_sizes():
+    """Get the number of equipment items per category, for utilization_timeline()"""
+    conn = get_db_connection()
+    rows = conn.execute(
+        "SELECT COALESCE(category, ?), COUNT(*) FROM equipment GROUP BY 1", (UNCATEGORIZED,)
+    ).fetchall()
+    return {category: count for category, count in rows}
+
+def daily_concurrency(intervals, start_date, end_date, by="category"):
+    """Count how many items are checked out on each day, per group
+    
+    Built with a difference array: +1 on the day an interval starts and
+    -1 on the day it ends, then a cumulative sum along the days. Returns a
+    DataFrame indexed by day with one column per value of ``by``.
+    """
+    days = pd.date_range(start_date, end_date, freq="D")
+    groups, codes = np.unique(intervals[by].to_numpy(dtype=str), return_inverse=True)
+    
+    first_day = np.datetime64(start_date, "D")
+    start_index = (intervals["start"].to_numpy("datetime64[D]") - first_day).astype(int)
+    end_index = (intervals["end"].to_numpy("datetime64[D]") - first_day).astype(int)
+    
+    # One spare column absorbs intervals that run to the end of the window
+    diff = np.zeros((len(groups), len(days) + 1), dtype=np.int64)
+    np.add.at(diff, (codes, start_index), 1)
+    np.add.at(diff, (codes, end_index), -1)
+    
+    counts = np.cumsum(diff[:, :-1], axis=1)
+    return pd.DataFrame(counts.T, index=days, columns=groups)
+
+def utilization_timeline(intervals, start_date, end_date, freq="W-MON", by="category", group_sizes=None):
+    """Get the fraction of item-days checked out per group and time bucket
+    
+    ``group_sizes`` maps each group to its number of items (for example
+    equipment per category); by default every group counts as one item,
+    which suits per-SKU timelines. Buckets cut off by the window only count
+    the days inside it.
+    """
+    concurrency = daily_concurrency(intervals, start_date, end_date, by)
+    busy = concurrency.resample(freq).sum()
+    days = pd.Series(1, index=concurrency.index).resample(freq).sum()
+    
+    if group_sizes is not None:
+        sizes = pd.Series(group_sizes).reindex(busy.columns).fillna(1).clip(lower=1)
+    else:
+        sizes = pd.Series(1, index=busy.columns)
+    
+    capacity = np.outer(days.to_numpy(), sizes.to_numpy())
+    return busy / capacity
+
+def asset_utilization(intervals, start_date, end_date):
+    """Get the fraction of the window each SKU spent checked out
+    
+    Overlapping checkouts of the same item are merged first: after sorting
+    by start, each interval only adds the part beyond the furthest end
+    seen so far for that SKU.
+    """
+    window_days = (np.datetime64(end_date, "D") + 1 - np.datetime64(start_date, "D")).astype(int)
+    ordered = intervals.sort_values(["sku", "start"])
+    
+    start = ordered["start"].to_numpy("datetime64[D]").astype(np.int64)
+    end = ordered["end"].to_numpy("datetime64[D]").astype(np.int64)
+    furthest_end = pd.Series(end, index=ordered.index).groupby(ordered["sku"]).cummax()
+    previous_end = furthest_end.groupby(ordered["sku"]).shift().fillna(np.iinfo(np.int64).min).to_numpy(np.int64)
+    
+    added = np.clip(end - np.maximum(start, previous_end), 0, None)
+    busy_days = pd.Series(added, index=ordered.index).groupby(ordered["sku"]).sum()
+    
+    result = ordered.groupby("sku")["category"].first().to_frame()
+    result["busy_days"] = busy_days
+    result["utilization"] = busy_days / window_days
+    return result.sort_values("utilization", ascending=False).reset_index()
+
+def peak_concurrency(intervals, by=None):
+    """Find the largest number of items checked out at once
+    
+    Sweeps the sorted start (+1) and end (-1) events; ends sort before
+    starts on the same day because intervals are half-open. Returns a
+    DataFrame with the peak and the first day it was reached, overall or
+    per value of ``by``.
+    """
+    starts = intervals[[by] if by else []].assign(day=intervals["start"], change=1)
+    ends = intervals[[by] if by else []].assign(day=intervals["end"], change=-1)
+    events = pd.concat([starts, ends], ignore_index=True)
+    events = events.sort_values(([by] if by else []) + ["day", "change"], kind="stable")
+    
+    if by:
+        events["out"] = events.groupby(by)["change"].cumsum()
+        peaks = events.loc[events.groupby(by)["out"].idxmax(), [by, "out", "day"]]
+    else:
+        events["out"] = events["change"].cumsum()
+        peaks = events.loc[[events["out"].idxmax()], ["out", "day"]] if len(events) else events[["out", "day"]]
+    
+    return peaks.rename(columns={"out": "peak", "day": "first_reached"}).reset_index(drop=True)
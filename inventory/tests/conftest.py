@@ -0,0 +1,67 @@
+import os
+import sys
+import pytest
+
+# Directory of app.py; the inventory package is imported from there as
+# app.py does
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+from inventory.utils import database
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A fresh, migrated database in a temporary data directory"""
+    # DATA_PATH is relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    database.close_db_connections()
+    database._initialized = False
+    database.ensure_initialized()
+    yield database
+    database.close_db_connections()
+    database._initialized = False
+
+@pytest.fixture
+def sample_data(db):
+    """Fill the database with 500 items, 20 users and their checkout history
+    
+    Every fourth item is checked out and has an open checkout record; the
+    rest have only returned checkouts. Returns the SKUs.
+    """
+    now = "2026-01-01T00:00:00"
+    statuses = [status for status in db.EQUIPMENT_STATUS.values() if status != db.EQUIPMENT_STATUS["checked_out"]]
+    skus = db.allocate_skus(500)
+    
+    users = []
+    equipment = []
+    history = []
+    for i in range(20):
+        users.append((f"user{i}", f"user{i}@lab.org", db.hash_password("pw"), "user", f"User {i}", "Lab", now))
+    for i, sku in enumerate(skus):
+        holder = f"user{i % 20}" if i % 4 == 0 else None
+        status = db.EQUIPMENT_STATUS["checked_out"] if holder else statuses[i % len(statuses)]
+        equipment.append((
+            sku, f"Item {i}", f"Category {i % 10}", f"SN-{i:05d}", status, holder,
+            "2025-12-20" if holder else None, "2026-01-03" if holder else None, now, now
+        ))
+        for month in range(1, 5):
+            history.append((sku, f"Item {i}", f"user{(i + month) % 20}", f"2025-{month:02d}-01", f"2025-{month:02d}-15", f"2025-{month:02d}-10"))
+        if holder:
+            history.append((sku, f"Item {i}", holder, "2025-12-20", "2026-01-03", None))
+    
+    with db.transaction("users", "equipment", "checkout_history") as conn:
+        conn.executemany(
+            "INSERT INTO users (username, email, password, role, name, department, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            users
+        )
+        conn.executemany('''
+        INSERT INTO equipment (sku, name, category, serial_number, status, checked_out_by, checkout_date, due_date, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', equipment)
+        conn.executemany('''
+        INSERT INTO checkout_history (sku, equipment_name, user, checkout_date, due_date, return_date)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', history)
+    
+    db.get_db_connection().execute("ANALYZE")
+    return skus
@@ -0,0 +1,204 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.api.types import is_datetime64_dtype
+from inventory.utils import analytics, utilization
+
+START = datetime.date(2025, 1, 1)
+END = datetime.date(2025, 12, 31)
+
+def cache_entries(db, name):
+    """Get the cache keys of the results cached as ``name``"""
+    return [key for key in db._data_cache if key[1] == name]
+
+def test_history_window_is_cached_until_a_write(sample_data, db):
+    first = analytics.load_history_window(START, END)
+    hits = db.cache_stats()["hits"]
+    second = analytics.load_history_window(START, END)
+    
+    assert db.cache_stats()["hits"] == hits + 1
+    assert second.equals(first)
+    # Callers get their own copy
+    second.drop(second.index, inplace=True)
+    assert len(analytics.load_history_window(START, END)) == len(first)
+    
+    # A checkout drops the cached window instead of keeping a stale copy
+    in_stock = db.query_equipment(statuses=["In Stock"], limit=1)["sku"].iloc[0]
+    db.checkout_items([in_stock], "user1", "2025-06-01", "2025-06-08")
+    assert cache_entries(db, "history_window") == []
+    
+    assert len(analytics.load_history_window(START, END)) == len(first) + 1
+    assert len(cache_entries(db, "history_window")) == 1
+
+def test_utilization_intervals_are_cached_until_a_write(sample_data, db):
+    first = utilization.load_intervals(START, END)
+    assert utilization.load_intervals(START, END).equals(first)
+    assert len(cache_entries(db, "utilization_intervals")) == 1
+    
+    db.return_items([{"sku": sample_data[0], "status": "In Stock", "notes": ""}], "2025-12-28")
+    assert cache_entries(db, "utilization_intervals") == []
+    assert len(utilization.load_intervals(START, END)) == len(first)
+
+def test_breakdown_keeps_checkouts_without_a_category(sample_data, db):
+    db.update_equipment(sample_data[1], category=None)
+    
+    history = analytics.load_history_window(START, END)
+    breakdown = analytics.duration_breakdown(history, "category")
+    
+    assert breakdown["checkouts"].sum() == len(history)
+    uncategorized = breakdown[breakdown["category"] == utilization.UNCATEGORIZED]
+    assert uncategorized["checkouts"].tolist() == [4]
+
+def test_loaders_type_their_columns(sample_data, db):
+    history = analytics.load_history_window(START, END)
+    for column in ("checkout_date", "due_date", "return_date"):
+        assert is_datetime64_dtype(history[column])
+    assert history["category"].dtype == "category"
+    assert history["user"].dtype == "category"
+    assert history["duration_days"].tolist()[:4] == [9, 9, 9, 9]
+    
+    intervals = utilization.load_intervals(START, END)
+    assert is_datetime64_dtype(intervals["start"])
+    assert is_datetime64_dtype(intervals["end"])
+    assert (intervals["end"] > intervals["start"]).all()
+
+def history_frame(rows):
+    """Build an analysis frame from (category, user, duration_days, returned_late) rows"""
+    history = pd.DataFrame(rows, columns=["category", "user", "duration_days", "returned_late"])
+    history.insert(0, "id", range(len(history)))
+    return history
+
+def test_duration_summary_percentiles_and_late_rate():
+    history = history_frame([
+        ("A", "u1", 1, False), ("A", "u1", 2, True), ("B", "u2", 3, False),
+        ("B", "u2", 4, True), ("B", "u3", np.nan, False),
+    ])
+    summary = analytics.duration_summary(history)
+    
+    assert summary["checkouts"] == 5
+    assert summary["returned"] == 4
+    assert summary["mean_days"] == 2.5
+    # Linear interpolation between the returned durations 1, 2, 3 and 4
+    assert summary["p50_days"] == pytest.approx(2.5)
+    assert summary["p90_days"] == pytest.approx(3.7)
+    assert summary["p99_days"] == pytest.approx(3.97)
+    assert summary["late_returns"] == 2
+    assert summary["late_rate"] == 0.5
+
+def test_duration_summary_with_nothing_returned():
+    summary = analytics.duration_summary(history_frame([("A", "u1", np.nan, False)]))
+    
+    assert summary["checkouts"] == 1
+    assert summary["returned"] == 0
+    assert np.isnan(summary["mean_days"])
+    assert np.isnan(summary["p50_days"])
+    assert np.isnan(summary["late_rate"])
+
+def test_duration_breakdown_by_category():
+    history = history_frame([
+        ("A", "u1", 1, True), ("A", "u2", 2, False), ("A", "u1", np.nan, False),
+        ("B", "u1", 10, True), ("C", "u2", np.nan, False),
+    ])
+    breakdown = analytics.duration_breakdown(history, "category").set_index("category")
+    
+    # Busiest group first
+    assert breakdown.index[0] == "A"
+    assert breakdown["checkouts"].to_dict() == {"A": 3, "B": 1, "C": 1}
+    assert breakdown["returned"].to_dict() == {"A": 2, "B": 1, "C": 0}
+    assert breakdown.loc["A", "mean_days"] == 1.5
+    assert breakdown.loc["A", "p50_days"] == 1.5
+    assert breakdown.loc["A", "p90_days"] == pytest.approx(1.9)
+    assert breakdown.loc["B", "p99_days"] == 10
+    assert breakdown["late_returns"].to_dict() == {"A": 1, "B": 1, "C": 0}
+    assert breakdown.loc["A", "late_rate"] == 0.5
+    assert breakdown.loc["B", "late_rate"] == 1.0
+    # A late rate needs at least one return
+    assert np.isnan(breakdown.loc["C", "late_rate"])
+
+WINDOW_START = datetime.date(2025, 3, 1)
+WINDOW_END = datetime.date(2025, 4, 30)
+
+def random_intervals(seed, count=200):
+    """Random clipped intervals inside the window, shaped like load_intervals()"""
+    rng = np.random.default_rng(seed)
+    window_days = (WINDOW_END - WINDOW_START).days + 1
+    start = rng.integers(0, window_days, count)
+    end = np.minimum(start + rng.integers(1, 20, count), window_days)
+    first_day = np.datetime64(WINDOW_START, "D")
+    return pd.DataFrame({
+        "sku": [f"LAB-{n:05d}" for n in rng.integers(0, 30, count)],
+        "category": [f"Category {n}" for n in rng.integers(0, 4, count)],
+        "start": first_day + start,
+        "end": first_day + end,
+    })
+
+def window_days():
+    """Every day of the window, as dates"""
+    return [WINDOW_START + datetime.timedelta(days=n) for n in range((WINDOW_END - WINDOW_START).days + 1)]
+
+def out_on(intervals, day):
+    """Get the intervals that cover ``day``, checked one by one"""
+    day = pd.Timestamp(day)
+    return [row for row in intervals.itertuples() if row.start <= day < row.end]
+
+@pytest.mark.parametrize("seed", range(3))
+def test_daily_and_peak_concurrency_match_a_day_by_day_count(seed):
+    intervals = random_intervals(seed)
+    concurrency = utilization.daily_concurrency(intervals, WINDOW_START, WINDOW_END)
+    
+    totals = {}
+    for day in window_days():
+        covering = out_on(intervals, day)
+        totals[day] = len(covering)
+        for category in concurrency.columns:
+            expected = sum(row.category == category for row in covering)
+            assert concurrency.loc[pd.Timestamp(day), category] == expected
+    
+    peak = utilization.peak_concurrency(intervals)
+    busiest = max(totals.values())
+    assert peak["peak"].tolist() == [busiest]
+    assert peak["first_reached"].iloc[0] == pd.Timestamp(min(day for day in totals if totals[day] == busiest))
+    
+    by_category = utilization.peak_concurrency(intervals, by="category").set_index("category")
+    for category in concurrency.columns:
+        assert by_category.loc[category, "peak"] == concurrency[category].max()
+        assert by_category.loc[category, "first_reached"] == concurrency[category].idxmax()
+
+@pytest.mark.parametrize("seed", range(3))
+def test_asset_utilization_matches_a_day_by_day_count(seed):
+    intervals = random_intervals(seed)
+    result = utilization.asset_utilization(intervals, WINDOW_START, WINDOW_END).set_index("sku")
+    
+    # Overlapping checkouts of one item count each day once
+    busy = {sku: set() for sku in intervals["sku"]}
+    for day in window_days():
+        for row in out_on(intervals, day):
+            busy[row.sku].add(day)
+    
+    assert sorted(result.index) == sorted(busy)
+    for sku, days in busy.items():
+        assert result.loc[sku, "busy_days"] == len(days)
+        assert result.loc[sku, "utilization"] == pytest.approx(len(days) / len(window_days()))
+    assert result["utilization"].is_monotonic_decreasing
+
+def test_utilization_timeline_matches_a_day_by_day_count():
+    intervals = random_intervals(0)
+    sizes = {"Category 0": 3, "Category 1": 5, "Category 2": 1, "Category 3": 2}
+    timeline = utilization.utilization_timeline(intervals, WINDOW_START, WINDOW_END, freq="W-MON", group_sizes=sizes)
+    
+    # Weeks end on, and are labelled with, a Monday; the first and last
+    # weeks only count their days inside the window
+    busy = {}
+    days = {}
+    for day in window_days():
+        week = pd.Timestamp(day + datetime.timedelta(days=-day.weekday() % 7))
+        days[week] = days.get(week, 0) + 1
+        for row in out_on(intervals, day):
+            busy[week, row.category] = busy.get((week, row.category), 0) + 1
+    
+    assert list(timeline.index) == sorted(days)
+    for week in days:
+        for category, size in sizes.items():
+            expected = busy.get((week, category), 0) / (days[week] * size)
+            assert timeline.loc[week, category] == pytest.approx(expected)
@@ -0,0 +1,150 @@
+import pandas as pd
+import pytest
+
+from inventory.utils import bulk_import
+
+def make_chunk(rows, first_line=2):
+    """Build an import chunk from dicts of the columns that are not empty"""
+    chunk = pd.DataFrame(rows).reindex(columns=bulk_import.IMPORT_COLUMNS).fillna("")
+    chunk.index = pd.RangeIndex(first_line, first_line + len(chunk))
+    return chunk
+
+def errors_by_row(report):
+    return {(row.row, row.column): row.error for row in report.itertuples()}
+
+def write_csv(path, rows):
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return str(path)
+
+def trigger_names(db):
+    rows = db.get_db_connection().execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+    return {row[0] for row in rows}
+
+def assert_indexes_consistent(db):
+    """Check the search index and the summary tables against the equipment"""
+    conn = db.get_db_connection()
+    conn.execute("INSERT INTO equipment_fts (equipment_fts, rank) VALUES ('integrity-check', 1)")
+    indexed = conn.execute("SELECT COUNT(*) FROM equipment_fts").fetchone()[0]
+    assert indexed == conn.execute("SELECT COUNT(*) FROM equipment").fetchone()[0]
+    assert db.check_summary_tables() == {}
+
+def test_rows_are_checked_column_by_column(db):
+    values, report = bulk_import.validate_chunk(make_chunk([
+        {"name": "Scope", "status": "in_stock", "purchase_date": "2024-02-30", "purchase_price": "1,200.50"},
+        {"name": "", "status": "Broken", "purchase_price": "-1"},
+        {"name": "Pipette", "status": "Checked Out"},
+        {"name": "Meter", "status": "maintenance", "purchase_date": "2024-02-03"},
+    ]), set())
+    
+    # Imported items have no holder, so they cannot be checked out
+    status_error = "Status must be one of: In Stock, Under Maintenance, Lost/Missing"
+    assert errors_by_row(report) == {
+        (2, "purchase_date"): "Date must be YYYY-MM-DD",
+        (3, "name"): "Name is required",
+        (3, "status"): status_error,
+        (3, "purchase_price"): "Price cannot be negative",
+        (4, "status"): status_error,
+    }
+    assert values.loc[2, "purchase_price"] == 1200.5
+    assert (values.loc[5, "status"], values.loc[5, "purchase_date"]) == ("Under Maintenance", "2024-02-03")
+
+def test_serials_must_be_new(db):
+    with db.transaction("equipment"):
+        db.add_equipment({"name": "Old", "status": "In Stock", "serial_number": "DB-1"})
+    seen = set()
+    
+    _, first = bulk_import.validate_chunk(make_chunk([
+        {"name": "A", "serial_number": "S-1"},
+        {"name": "B", "serial_number": "S-1"},
+        {"name": "C", "serial_number": "DB-1"},
+        {"name": "D"},
+        {"name": "E"},
+    ]), seen)
+    _, second = bulk_import.validate_chunk(make_chunk([{"name": "F", "serial_number": "S-1"}], first_line=7), seen)
+    
+    assert errors_by_row(first) == {
+        (3, "serial_number"): "Serial number appears earlier in the file",
+        (4, "serial_number"): "Serial number already belongs to other equipment",
+    }
+    assert errors_by_row(second) == {(7, "serial_number"): "Serial number appears earlier in the file"}
+
+def test_invalid_row_does_not_claim_its_serial(db):
+    seen = set()
+    _, first = bulk_import.validate_chunk(make_chunk([
+        {"name": "A", "serial_number": "S-1", "purchase_date": "soon"},
+        {"name": "B", "serial_number": "S-1"},
+        {"name": "C", "serial_number": "S-2", "status": "unknown"},
+    ]), seen)
+    _, second = bulk_import.validate_chunk(make_chunk([{"name": "D", "serial_number": "S-2"}], first_line=5), seen)
+    
+    # Only the invalid rows are rejected; their valid copies are imported
+    assert set(first["row"]) == {2, 4}
+    assert second.empty
+    assert seen == {"S-1", "S-2"}
+
+def test_import_allocates_contiguous_skus(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_import, "IMPORT_CHUNK_ROWS", 4)
+    db.allocate_skus(3)
+    rows = [{"name": f"Item {i}", "serial_number": f"S-{i % 9}"} for i in range(10)]
+    result = bulk_import.import_equipment(write_csv(tmp_path / "items.csv", rows))
+    
+    assert (result["rows"], result["imported"], result["invalid_rows"]) == (10, 9, 1)
+    assert list(result["errors"]["row"]) == [11]
+    skus = db.get_equipment(columns=["sku"])["sku"].tolist()
+    assert skus == [db.format_sku(number) for number in range(4, 13)]
+    assert (result["first_sku"], result["last_sku"]) == (skus[0], skus[-1])
+    assert db.peek_next_sku() == db.format_sku(13)
+
+def test_dry_run_writes_nothing(db, tmp_path):
+    result = bulk_import.import_equipment(write_csv(tmp_path / "items.csv", [{"name": "A"}]), dry_run=True)
+    assert (result["rows"], result["imported"]) == (1, 0)
+    assert db.get_equipment().empty
+
+def test_bulk_insert_defers_and_restores_triggers(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_import, "IMPORT_CHUNK_ROWS", 3)
+    triggers = trigger_names(db)
+    assert set(db.BULK_DEFERRED_TRIGGERS) <= triggers
+    
+    with db.bulk_equipment_insert():
+        assert trigger_names(db) == triggers - set(db.BULK_DEFERRED_TRIGGERS)
+        skus = db.allocate_skus(2)
+        db.add_equipment_rows(
+            ("sku", "name", "category", "status", "created_at", "updated_at"),
+            [(sku, "Zeiss scope", "Optics", "In Stock", "2026-01-01", "2026-01-01") for sku in skus]
+        )
+    
+    assert trigger_names(db) == triggers
+    bulk_import.import_equipment(write_csv(tmp_path / "items.csv", [
+        {"name": f"Zeiss lens {i}", "category": "Optics", "status": "lost" if i % 2 else ""} for i in range(7)
+    ]))
+    assert trigger_names(db) == triggers
+    assert_indexes_consistent(db)
+    assert len(db.search_equipment("zeiss", limit=100)) == 9
+    
+    # Rows added after the import are indexed by the restored triggers
+    with db.transaction("equipment"):
+        db.add_equipment({"name": "Zeiss filter", "category": "Optics", "status": "In Stock"})
+    assert_indexes_consistent(db)
+
+def test_failed_import_rolls_back_everything(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(bulk_import, "IMPORT_CHUNK_ROWS", 3)
+    triggers = trigger_names(db)
+    next_sku = db.peek_next_sku()
+    inserted = []
+    
+    def fail_on_second_chunk(columns, rows):
+        if inserted:
+            raise RuntimeError("disk full")
+        inserted.append(db.add_equipment_rows(columns, rows))
+        return inserted[-1]
+    
+    monkeypatch.setattr(bulk_import, "add_equipment_rows", fail_on_second_chunk)
+    with pytest.raises(RuntimeError):
+        bulk_import.import_equipment(write_csv(tmp_path / "items.csv", [{"name": f"Item {i}"} for i in range(7)]))
+    
+    # The first chunk, the SKUs and the dropped triggers are all rolled back
+    assert inserted == [3]
+    assert db.get_equipment().empty
+    assert db.peek_next_sku() == next_sku
+    assert trigger_names(db) == triggers
+    assert_indexes_consistent(db)
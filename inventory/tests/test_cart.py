@@ -0,0 +1,94 @@
+import pytest
+from streamlit.testing.v1 import AppTest
+
+def cart_page(form):
+    """A page with one cart form, on an equipment index of its own"""
+    from inventory.utils.equipment_index import EquipmentIndex
+    from inventory.app import cart
+    
+    index = EquipmentIndex()
+    index.refresh()
+    getattr(cart, form)(index)
+
+@pytest.fixture
+def items(db):
+    """Five in-stock items; returns their SKUs"""
+    with db.transaction():
+        return [db.add_equipment({"name": f"Item {i}", "status": "In Stock"}) for i in range(5)]
+
+def open_cart(form, username="admin", role="admin"):
+    """Render a cart form as ``username``"""
+    app = AppTest.from_function(cart_page, args=(form,), default_timeout=30)
+    app.session_state.username = username
+    app.session_state.user_role = role
+    app.run()
+    assert not app.exception, app.exception[0].value
+    return app
+
+def scan(app, name, sku):
+    """Type a SKU into a cart's scan box as a scanner would"""
+    app.text_input(key=f"{name}_cart_scan").input(sku).run()
+    assert not app.exception, app.exception[0].value
+
+def test_scanning_fills_the_cart_and_checkout_empties_it(db, items):
+    app = open_cart("checkout_cart_form")
+    scan(app, "checkout", items[0].lower())
+    scan(app, "checkout", items[1])
+    # Scanning an item twice keeps one copy
+    scan(app, "checkout", items[0])
+    
+    assert app.session_state["checkout_cart_items"] == items[:2]
+    assert app.session_state["checkout_cart_versions"] == {sku: 1 for sku in items[:2]}
+    assert app.multiselect(key="checkout_cart_select").value == items[:2]
+    
+    app.button(key="checkout_cart_submit").click().run()
+    
+    assert app.success[0].value == "2 item(s) checked out to admin."
+    assert app.session_state["checkout_cart_items"] == []
+    for sku in items[:2]:
+        assert db.get_equipment_by_sku(sku)["checked_out_by"] == "admin"
+
+def test_unknown_sku_is_not_added(db, items):
+    app = open_cart("checkout_cart_form")
+    scan(app, "checkout", "LAB-99999")
+    
+    assert app.session_state["checkout_cart_items"] == []
+    assert app.warning[0].value == "LAB-99999 cannot be added to this cart."
+
+def test_conflicting_items_are_reported_and_can_be_removed(db, items):
+    app = open_cart("checkout_cart_form")
+    scan(app, "checkout", items[0])
+    scan(app, "checkout", items[1])
+    
+    # Someone else edits one item after it went into the cart
+    db.update_equipment(items[1], name="Renamed")
+    app.button(key="checkout_cart_submit").click().run()
+    
+    problems = app.dataframe[0].value
+    assert problems.to_dict("records") == [
+        {"SKU": items[1], "Problem": "Changed by someone else since it was added to the cart"}
+    ]
+    # Nothing was checked out, not even the unchanged item
+    assert db.get_equipment_by_sku(items[0])["status"] == "In Stock"
+    
+    app.button(key="checkout_cart_remove_conflicts").click().run()
+    assert app.session_state["checkout_cart_items"] == [items[0]]
+    assert not app.dataframe
+
+def test_return_cart_returns_only_the_users_own_items(db, items):
+    db.checkout_items(items[:2], "user1", "2026-10-01", "2026-10-08")
+    db.checkout_items(items[2:3], "user2", "2026-10-01", "2026-10-08")
+    
+    app = open_cart("return_cart_form", username="user1", role="user")
+    scan(app, "return", items[2])
+    assert app.warning[0].value == f"{items[2]} cannot be added to this cart."
+    scan(app, "return", items[0])
+    scan(app, "return", items[1])
+    
+    app.button(key="return_cart_submit").click().run()
+    
+    assert app.success[0].value == "2 item(s) returned."
+    for sku in items[:2]:
+        item = db.get_equipment_by_sku(sku)
+        assert (item["status"], item["checked_out_by"]) == ("In Stock", None)
+    assert db.get_equipment_by_sku(items[2])["checked_out_by"] == "user2"
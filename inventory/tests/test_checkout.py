@@ -0,0 +1,89 @@
+import pytest
+
+def add_items(db, count):
+    """Add ``count`` in-stock items and return their SKUs"""
+    with db.transaction():
+        return [db.add_equipment({"name": f"Item {i}", "status": "In Stock"}) for i in range(count)]
+
+def history_rows(db, sku):
+    """Get the checkout history of one SKU, oldest first, as dicts"""
+    rows = db.get_db_connection().execute('''
+    SELECT id, equipment_name, user, checkout_date, due_date, return_date, notes
+    FROM checkout_history WHERE sku = ? ORDER BY id
+    ''', (sku,))
+    return [dict(row) for row in rows]
+
+def test_checkout_appends_one_open_record_per_item(db):
+    skus = add_items(db, 3)
+    
+    assert db.checkout_items(skus[:2], "admin", "2026-10-01", "2026-10-08", notes="For the demo") == 2
+    
+    for i, sku in enumerate(skus[:2]):
+        [row] = history_rows(db, sku)
+        assert row["equipment_name"] == f"Item {i}"
+        assert row["user"] == "admin"
+        assert (row["checkout_date"], row["due_date"], row["return_date"]) == ("2026-10-01", "2026-10-08", None)
+        assert row["notes"] == "For the demo"
+    assert history_rows(db, skus[2]) == []
+
+def test_return_closes_only_the_latest_open_record(db):
+    [sku] = add_items(db, 1)
+    db.checkout_items([sku], "admin", "2026-10-01", "2026-10-08", notes="First")
+    db.return_items([{"sku": sku, "status": "In Stock", "notes": "Fine"}], "2026-10-05")
+    db.checkout_items([sku], "admin", "2026-10-10", "2026-10-17")
+    
+    assert db.return_items([{"sku": sku, "status": "Under Maintenance", "notes": "Scratched"}], "2026-10-12") == 1
+    
+    first, second = history_rows(db, sku)
+    # Each return only writes to its own record; rows are never rewritten
+    assert (first["return_date"], first["notes"]) == ("2026-10-05", "First\nFine")
+    assert (second["checkout_date"], second["return_date"]) == ("2026-10-10", "2026-10-12")
+    assert second["notes"] == "Scratched"
+    assert db.get_equipment_by_sku(sku)["status"] == "Under Maintenance"
+
+def test_return_keeps_checkout_notes_without_return_notes(db):
+    [sku] = add_items(db, 1)
+    db.checkout_items([sku], "admin", "2026-10-01", "2026-10-08", notes="Spare cable included")
+    
+    db.return_items([{"sku": sku, "status": "In Stock", "notes": None}], "2026-10-02")
+    
+    [row] = history_rows(db, sku)
+    assert row["return_date"] == "2026-10-02"
+    assert row["notes"] == "Spare cable included"
+
+def test_checkout_conflicts_name_each_reason(db):
+    skus = add_items(db, 3)
+    db.checkout_items([skus[0]], "user1", "2026-10-01", "2026-10-08")
+    db.update_equipment(skus[1], name="Renamed")
+    
+    with pytest.raises(db.CartConflictError) as error:
+        db.checkout_items(skus + ["LAB-99999"], "admin", "2026-10-02", "2026-10-09", versions={skus[1]: 1, skus[2]: 1})
+    
+    assert error.value.conflicts == {
+        skus[0]: "Currently Checked Out",
+        skus[1]: "Changed by someone else since it was added to the cart",
+        "LAB-99999": "Not found in the inventory",
+    }
+    # The one item without a conflict was not checked out either
+    assert db.get_equipment_by_sku(skus[2])["status"] == "In Stock"
+    assert history_rows(db, skus[2]) == []
+
+def test_return_conflicts_name_each_reason(db):
+    skus = add_items(db, 4)
+    db.checkout_items(skus[:2], "user1", "2026-10-01", "2026-10-08")
+    db.checkout_items(skus[2:3], "user2", "2026-10-01", "2026-10-08")
+    stale = db.get_equipment_by_sku(skus[1])["version"]
+    db.update_equipment(skus[1], name="Renamed")
+    
+    items = [{"sku": sku, "status": "In Stock", "notes": None} for sku in skus]
+    items[1]["version"] = stale
+    with pytest.raises(db.CartConflictError) as error:
+        db.return_items(items, "2026-10-05", holder="user1")
+    
+    assert error.value.conflicts == {
+        skus[1]: "Changed by someone else since it was added to the cart",
+        skus[2]: "Checked out by user2",
+        skus[3]: "Currently In Stock",
+    }
+    assert db.get_equipment_by_sku(skus[0])["checked_out_by"] == "user1"
+    assert history_rows(db, skus[0])[0]["return_date"] is None
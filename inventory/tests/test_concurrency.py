@@ -0,0 +1,144 @@
+import random
+import threading
+
+THREADS = 16
+ROUNDS = 40
+
+def read_equipment(db):
+    """Get the status and version of every item, as a page would read them"""
+    rows = db.get_db_connection().execute("SELECT sku, status, version FROM equipment")
+    return {row["sku"]: (row["status"], row["version"]) for row in rows}
+
+def test_overlapping_carts_and_edits_lose_no_updates(db):
+    with db.transaction():
+        skus = [db.add_equipment({"name": f"Item {i}", "status": "In Stock", "purchase_price": 0.0}) for i in range(25)]
+    # Every cart draws from the same 20 items; the other 5 are edited
+    cart_skus, edited_skus = skus[:20], skus[20:]
+    
+    counts = {"checked_out": 0, "returned": 0, "increments": 0, "conflicts": 0}
+    counts_lock = threading.Lock()
+    errors = []
+    
+    def count(key, value=1):
+        with counts_lock:
+            counts[key] += value
+    
+    def worker(seed):
+        rng = random.Random(seed)
+        try:
+            for _ in range(ROUNDS):
+                state = read_equipment(db)
+                action = rng.random()
+                
+                if action < 0.5:
+                    cart = rng.sample(cart_skus, rng.randint(2, 6))
+                    try:
+                        count("checked_out", db.checkout_items(
+                            cart, "admin", "2026-10-18", "2026-10-25",
+                            versions={sku: state[sku][1] for sku in cart}
+                        ))
+                    except db.CartConflictError:
+                        count("conflicts")
+                
+                elif action < 0.75:
+                    held = [sku for sku in cart_skus if state[sku][0] == db.EQUIPMENT_STATUS["checked_out"]]
+                    if held:
+                        cart = rng.sample(held, min(len(held), 3))
+                        try:
+                            count("returned", db.return_items(
+                                [{"sku": sku, "status": "In Stock", "notes": "", "version": state[sku][1]} for sku in cart],
+                                "2026-10-19"
+                            ))
+                        except db.CartConflictError:
+                            count("conflicts")
+                
+                else:
+                    # Read-modify-write of the price, conditional on the version read
+                    sku = rng.choice(edited_skus)
+                    row = db.get_equipment_by_sku(sku)
+                    try:
+                        db.update_equipment(sku, expected_version=row["version"], purchase_price=row["purchase_price"] + 1)
+                        count("increments")
+                    except db.EquipmentConflictError:
+                        count("conflicts")
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+    # The workers really did collide
+    assert counts["conflicts"] > 0
+    
+    conn = db.get_db_connection()
+    history, returned = conn.execute("SELECT COUNT(*), COUNT(return_date) FROM checkout_history").fetchone()
+    checked_out = conn.execute("SELECT COUNT(*) FROM equipment WHERE status = 'Checked Out'").fetchone()[0]
+    open_per_sku = conn.execute('''
+    SELECT COALESCE(MAX(open), 0) FROM (
+        SELECT COUNT(*) AS open FROM checkout_history WHERE return_date IS NULL GROUP BY sku
+    )
+    ''').fetchone()[0]
+    price_total = conn.execute("SELECT SUM(purchase_price) FROM equipment").fetchone()[0]
+    
+    # Every successful write is in the database exactly once
+    assert history == counts["checked_out"]
+    assert returned == counts["returned"]
+    assert price_total == counts["increments"]
+    # At most one open checkout per SKU, and one for each checked out item
+    assert open_per_sku <= 1
+    assert checked_out == history - returned
+    assert db.check_summary_tables() == {}
+
+def test_concurrent_sku_allocations_are_contiguous_and_unique(db):
+    blocks = []
+    rolled_back = []
+    errors = []
+    lock = threading.Lock()
+    
+    def worker(seed):
+        rng = random.Random(seed)
+        try:
+            for _ in range(ROUNDS):
+                count = rng.randint(1, 5)
+                try:
+                    with db.transaction():
+                        peeked = db.peek_next_sku()
+                        skus = db.allocate_skus(count)
+                        # Some adds fail after reserving; their SKUs are reused
+                        if rng.random() < 0.2:
+                            raise RuntimeError("insert failed")
+                except RuntimeError:
+                    rolled_back.append(count)
+                    continue
+                with lock:
+                    blocks.append((peeked, skus))
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+    assert rolled_back
+    
+    def number(sku):
+        return int(sku[len(db.SKU_PREFIX):])
+    
+    # Inside its transaction a caller sees the SKU it is about to get, and
+    # each call gets a run of consecutive SKUs
+    for peeked, skus in blocks:
+        assert peeked == skus[0]
+        assert [number(sku) for sku in skus] == list(range(number(skus[0]), number(skus[0]) + len(skus)))
+    
+    # Together the committed calls used every SKU once, with no gaps left
+    # by the rolled back ones
+    allocated = sorted(number(sku) for _, skus in blocks for sku in skus)
+    assert allocated == list(range(1, len(allocated) + 1))
+    assert db.peek_next_sku() == db.format_sku(len(allocated) + 1)
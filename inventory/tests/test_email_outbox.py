@@ -0,0 +1,154 @@
+import socket
+import logging
+import statistics
+import time
+import pytest
+
+controller_module = pytest.importorskip("aiosmtpd.controller")
+
+from inventory.utils import email_outbox
+
+MESSAGES = 500
+
+class RecordingHandler:
+    """In-process SMTP stand-in that keeps what it receives"""
+    
+    def __init__(self):
+        self.messages = []
+        self.sessions = 0
+        self.fail_data = False
+    
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        # smtplib greets once per connection
+        self.sessions += 1
+        session.host_name = hostname
+        return responses
+    
+    async def handle_DATA(self, server, session, envelope):
+        if self.fail_data:
+            return "451 Try again later"
+        self.messages.append((envelope.rcpt_tos, envelope.content))
+        return "250 OK"
+
+def free_port():
+    """Get a local TCP port nothing is listening on"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture
+def smtp(db, monkeypatch):
+    """Point the outbox at a local SMTP server for the duration of a test"""
+    handler = RecordingHandler()
+    controller = controller_module.Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    monkeypatch.setattr(email_outbox, "SMTP_HOST", "127.0.0.1")
+    monkeypatch.setattr(email_outbox, "SMTP_PORT", controller.port)
+    monkeypatch.setattr(email_outbox, "SMTP_STARTTLS", False)
+    yield handler
+    email_outbox.stop_email_worker()
+    controller.stop()
+
+def enqueue_many(count):
+    """Queue ``count`` distinct messages and return the latency of each call"""
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        assert email_outbox.enqueue_email(f"user{i}@lab.org", "Reminder", f"Message {i}")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def test_enqueue_does_not_touch_smtp(smtp):
+    latencies = enqueue_many(MESSAGES)
+    
+    median = statistics.median(latencies)
+    p95 = statistics.quantiles(latencies, n=20)[-1]
+    print(f"\nenqueue latency: median {median * 1e3:.2f} ms, p95 {p95 * 1e3:.2f} ms")
+    
+    # UI actions only write to the outbox; nothing is sent until the worker runs
+    assert smtp.sessions == 0
+    assert email_outbox.get_outbox_counts() == {"pending": MESSAGES}
+    assert median < 0.05
+
+def test_delivery_batches_over_one_connection(smtp):
+    enqueue_many(MESSAGES)
+    
+    start = time.perf_counter()
+    server, sent, failed = email_outbox.process_outbox()
+    elapsed = time.perf_counter() - start
+    email_outbox._close_smtp(server)
+    print(f"\ndelivery: {sent / elapsed:.0f} messages/s over {smtp.sessions} connection(s)")
+    
+    assert (sent, failed) == (MESSAGES, 0)
+    assert len(smtp.messages) == MESSAGES
+    assert smtp.sessions == 1
+    assert email_outbox.get_outbox_counts() == {"sent": MESSAGES}
+
+def test_duplicates_are_queued_once(smtp):
+    assert email_outbox.enqueue_email("user1@lab.org", "Reminder", "Overdue items")
+    assert not email_outbox.enqueue_email("user1@lab.org", "Reminder", "Overdue items")
+    
+    server, sent, _ = email_outbox.process_outbox()
+    email_outbox._close_smtp(server)
+    assert sent == 1
+    assert len(smtp.messages) == 1
+
+def test_transient_failures_are_retried_later(smtp):
+    smtp.fail_data = True
+    email_outbox.enqueue_email("user1@lab.org", "Reminder", "Overdue items")
+    
+    server, sent, failed = email_outbox.process_outbox()
+    assert (sent, failed) == (0, 1)
+    row = email_outbox.get_db_connection().execute(
+        "SELECT status, attempts, next_attempt_at, last_error FROM email_outbox"
+    ).fetchone()
+    assert row["status"] == "pending"
+    assert row["attempts"] == 1
+    assert row["next_attempt_at"] > email_outbox._now().isoformat()
+    assert "451" in row["last_error"]
+    
+    # Not due again until the backoff has passed
+    server, sent, failed = email_outbox.process_outbox(server)
+    email_outbox._close_smtp(server)
+    assert (sent, failed) == (0, 0)
+
+def test_worker_delivers_in_background(smtp):
+    email_outbox.start_email_worker()
+    email_outbox.enqueue_email("user1@lab.org", "Reminder", "Overdue items")
+    
+    deadline = time.monotonic() + 10
+    while not smtp.messages and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert len(smtp.messages) == 1
+
+def test_without_a_host_messages_are_logged(db, caplog):
+    email_outbox.enqueue_email("user1@lab.org", "Reminder", "Overdue items")
+    
+    with caplog.at_level(logging.INFO, logger=email_outbox.__name__):
+        server, sent, failed = email_outbox.process_outbox()
+    
+    assert (server, sent, failed) == (None, 1, 0)
+    assert [record.getMessage() for record in caplog.records] == ["Email to user1@lab.org: Reminder\nOverdue items"]
+
+def test_worker_logs_failures_and_keeps_running(db, monkeypatch, caplog):
+    calls = []
+    
+    def failing_pass(server):
+        calls.append(1)
+        if len(calls) == 2:
+            email_outbox._worker_stop.set()
+        # Wake the worker at once instead of after the poll interval
+        email_outbox._worker_wake.set()
+        raise RuntimeError("disk I/O error")
+    
+    monkeypatch.setattr(email_outbox, "process_outbox", failing_pass)
+    email_outbox._worker_stop.clear()
+    try:
+        with caplog.at_level(logging.ERROR, logger=email_outbox.__name__):
+            email_outbox._worker_loop()
+    finally:
+        email_outbox._worker_stop.clear()
+    
+    assert len(calls) == 2
+    assert [record.getMessage() for record in caplog.records] == ["Email delivery failed"] * 2
+    assert "disk I/O error" in caplog.records[0].exc_text
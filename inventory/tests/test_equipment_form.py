@@ -0,0 +1,63 @@
+import io
+import os
+from PIL import Image
+from streamlit.testing.v1 import AppTest
+from inventory.app.pages import equipment
+
+def add_form():
+    """The add equipment form on a page of its own"""
+    from inventory.app.pages import equipment
+    
+    equipment.add_equipment_form()
+
+def jpeg():
+    """A small JPEG as an upload would send it"""
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), color="red").save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+def submit(name, image):
+    """Fill in and submit the add form, with an image upload"""
+    app = AppTest.from_function(add_form, default_timeout=30)
+    app.run()
+    app.text_input[0].input(name)
+    app.file_uploader[0].upload("photo.jpg", image, "image/jpeg")
+    app.button[0].click().run()
+    return app
+
+def test_image_is_saved_outside_the_transaction(db, monkeypatch):
+    image = jpeg()
+    # Record whether a transaction was open whenever an image is written
+    depths = []
+    save = Image.Image.save
+    
+    def traced_save(image, fp, *args, **kwargs):
+        depths.append(getattr(db._local, "depth", 0))
+        return save(image, fp, *args, **kwargs)
+    
+    monkeypatch.setattr(Image.Image, "save", traced_save)
+    app = submit("Oscilloscope", image)
+    assert not app.exception, app.exception[0].value
+    
+    sku = app.session_state.selected_equipment_sku
+    item = db.get_equipment_by_sku(sku)
+    assert item["name"] == "Oscilloscope"
+    # The upload and the QR code were both written with no transaction open
+    assert depths == [0, 0]
+    
+    # The image got its final name after the SKU, with no upload left behind
+    assert os.path.basename(item["image_path"]).startswith(f"{sku}_")
+    assert os.path.exists(item["image_path"])
+    assert [name for name in os.listdir(db.IMAGES_DIR) if name.startswith(".upload_")] == []
+
+def test_failed_insert_leaves_no_image(db, monkeypatch):
+    def failing_add(row):
+        raise RuntimeError("disk full")
+    
+    monkeypatch.setattr(equipment, "add_equipment", failing_add)
+    app = submit("Oscilloscope", jpeg())
+    
+    assert "disk full" in app.exception[0].message
+    assert os.listdir(db.IMAGES_DIR) == []
+    # The reserved SKU was rolled back with the insert
+    assert db.peek_next_sku() == db.format_sku(1)
@@ -0,0 +1,94 @@
+import threading
+from collections import deque
+
+from inventory.utils.equipment_index import EquipmentIndex
+
+def add_items(db, count):
+    with db.transaction("equipment"):
+        return [db.add_equipment({"name": f"Item {i}", "status": "In Stock"}) for i in range(count)]
+
+def fresh_index():
+    index = EquipmentIndex()
+    index.refresh()
+    return index
+
+def test_refresh_reads_only_changed_rows(db):
+    skus = add_items(db, 5)
+    index = fresh_index()
+    assert index.stats == {"rebuilds": 1, "updates": 0, "rows_updated": 0}
+    
+    db.checkout_items(skus[:2], "admin", "2026-10-01", "2026-10-08")
+    index.refresh()
+    
+    assert index.stats == {"rebuilds": 1, "updates": 1, "rows_updated": 2}
+    assert index.get(skus[0])["checked_out_by"] == "admin"
+    assert index.skus(holder="admin") == skus[:2]
+    assert index.skus(status="In Stock") == skus[2:]
+    
+    # Nothing written, nothing read
+    index.refresh()
+    assert index.stats["updates"] == 1
+
+def test_deleted_rows_leave_the_index(db):
+    skus = add_items(db, 3)
+    index = fresh_index()
+    with db.transaction("equipment") as conn:
+        conn.execute("DELETE FROM equipment WHERE sku = ?", (skus[1],))
+        db._note_equipment_skus([skus[1]])
+    index.refresh()
+    
+    assert index.stats["updates"] == 1
+    assert index.get(skus[1]) is None
+    assert index.skus() == [skus[0], skus[2]]
+    assert len(index) == 2
+
+def test_journal_overflow_falls_back_to_rebuild(db, monkeypatch):
+    monkeypatch.setattr(db, "_equipment_journal", deque(maxlen=3))
+    skus = add_items(db, 5)
+    index = fresh_index()
+    
+    for sku in skus:
+        db.update_equipment(sku, location="Room 1")
+    index.refresh()
+    
+    # The first writes were pushed out of the journal, so it reads everything
+    assert index.stats == {"rebuilds": 2, "updates": 0, "rows_updated": 0}
+    assert index.version == db.table_version("equipment")
+
+def test_write_without_skus_falls_back_to_rebuild(db):
+    skus = add_items(db, 3)
+    index = fresh_index()
+    
+    with db.transaction("equipment") as conn:
+        conn.execute("UPDATE equipment SET status = 'Under Maintenance'")
+    index.refresh()
+    
+    assert index.stats["rebuilds"] == 2
+    assert index.skus(status="Under Maintenance") == skus
+
+def test_readers_never_see_a_partial_rebuild(db):
+    skus = add_items(db, 2000)
+    index = fresh_index()
+    stop = threading.Event()
+    partial = []
+    
+    def read():
+        while not stop.is_set():
+            if index.get(skus[-1]) is None or len(index) != len(skus):
+                partial.append(len(index))
+    
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        for _ in range(20):
+            # Forget the version, so the next refresh rebuilds from scratch
+            index.version = None
+            index.refresh()
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+    
+    assert index.stats["rebuilds"] == 21
+    assert partial == []
@@ -0,0 +1,60 @@
+import pytest
+
+# Hot queries of the app and the index each one must search, in the form
+# the database module runs them
+HOT_QUERIES = [
+    (
+        "SELECT * FROM equipment WHERE status IN (?) ORDER BY sku LIMIT ?",
+        ("In Stock", 50),
+        "idx_equipment_status"
+    ),
+    (
+        "SELECT * FROM equipment WHERE category IN (?) ORDER BY sku LIMIT ?",
+        ("Category 1", 50),
+        "idx_equipment_category"
+    ),
+    (
+        "SELECT * FROM equipment WHERE checked_out_by = ? ORDER BY due_date, sku",
+        ("user1",),
+        "idx_equipment_checked_out_by"
+    ),
+    (
+        "SELECT sku FROM equipment WHERE due_date < ?",
+        ("2026-01-01",),
+        "idx_equipment_due_date"
+    ),
+    (
+        "SELECT * FROM checkout_history WHERE sku = ? ORDER BY checkout_date DESC, id DESC LIMIT ?",
+        ("LAB-00001", 50),
+        "idx_history_sku"
+    ),
+    (
+        "SELECT * FROM checkout_history WHERE user = ? ORDER BY checkout_date",
+        ("user1",),
+        "idx_history_user"
+    ),
+    (
+        "SELECT * FROM checkout_history WHERE checkout_date BETWEEN ? AND ?",
+        ("2025-03-01", "2025-03-02"),
+        "idx_history_checkout_date"
+    ),
+    (
+        "SELECT MAX(id) FROM checkout_history WHERE sku = ? AND return_date IS NULL",
+        ("LAB-00001",),
+        "idx_history_open"
+    ),
+    (
+        "SELECT DISTINCT serial_number FROM equipment WHERE serial_number IN (SELECT value FROM json_each(?))",
+        ('["SN-00001"]',),
+        "idx_equipment_serial"
+    ),
+]
+
+def query_plan(conn, sql, params):
+    """Get the details of each step of the plan SQLite picks for a query"""
+    return [row["detail"] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+@pytest.mark.parametrize("sql, params, index", HOT_QUERIES, ids=[query[2] for query in HOT_QUERIES])
+def test_hot_queries_search_index(sample_data, db, sql, params, index):
+    plan = query_plan(db.get_db_connection(), sql, params)
+    assert any(step.startswith("SEARCH") and index in step for step in plan), plan
@@ -0,0 +1,33 @@
+import subprocess
+import sys
+from conftest import APP_DIR
+from inventory.utils.database import MIGRATIONS
+
+# Opens the database in the working directory, which runs the migrations
+START_PROCESS = f"""
+import sys
+sys.path.insert(0, {APP_DIR!r})
+from inventory.utils import database
+database.ensure_initialized()
+print(database.get_schema_version(database.get_db_connection()))
+"""
+
+def test_migrations_reach_latest_version(db):
+    conn = db.get_db_connection()
+    assert db.get_schema_version(conn) == db.MIGRATIONS[-1][0]
+    
+    # Running them again is a no-op
+    assert db.run_migrations() == db.MIGRATIONS[-1][0]
+    versions = [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+    assert versions == [migration[0] for migration in db.MIGRATIONS]
+
+def test_processes_starting_together_apply_each_migration_once(tmp_path):
+    processes = [
+        subprocess.Popen([sys.executable, "-c", START_PROCESS], cwd=tmp_path, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        for _ in range(6)
+    ]
+    results = [process.communicate() for process in processes]
+    
+    for process, (out, err) in zip(processes, results):
+        assert process.returncode == 0, err
+        assert int(out) == MIGRATIONS[-1][0]
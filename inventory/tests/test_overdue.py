@@ -0,0 +1,107 @@
+import datetime
+import logging
+from inventory.utils import overdue
+from inventory.utils.constants import DUE_SOON_DAYS
+
+TODAY = datetime.date.today()
+
+def day(offset):
+    """Get the ISO date ``offset`` days from today"""
+    return (TODAY + datetime.timedelta(days=offset)).isoformat()
+
+def add_items(db, due_offsets, holder="user1"):
+    """Check out one item per offset, due that many days from today; returns the SKUs"""
+    with db.transaction():
+        skus = [db.add_equipment({"name": f"Item {i}", "status": "In Stock"}) for i in range(len(due_offsets))]
+    for sku, offset in zip(skus, due_offsets):
+        db.checkout_items([sku], holder, day(-10), day(offset))
+    return skus
+
+def buckets(db):
+    """Get the bucket of every item in due_items"""
+    rows = db.get_db_connection().execute("SELECT sku, bucket FROM due_items")
+    return dict(rows.fetchall())
+
+def bucket_counts(db):
+    """Get the per-holder bucket counts as {(holder, bucket): items}"""
+    rows = db.get_db_connection().execute("SELECT holder, bucket, items FROM due_buckets")
+    return {(holder, bucket): items for holder, bucket, items in rows}
+
+def test_scan_puts_items_in_buckets_by_due_date(db):
+    overdue_sku, today_sku, soon_sku, later_sku = add_items(db, [-1, 0, DUE_SOON_DAYS, DUE_SOON_DAYS + 1])
+    with db.transaction():
+        db.add_equipment({"name": "Never checked out", "status": "In Stock", "due_date": day(-5)})
+    
+    assert overdue.scan_due_dates() == 3
+    
+    # The due_soon range ends DUE_SOON_DAYS after today, inclusive
+    assert buckets(db) == {overdue_sku: "overdue", today_sku: "due_today", soon_sku: "due_soon"}
+    items = overdue.get_due_items(username="user1").set_index("sku")
+    assert items["days_overdue"].to_dict() == {overdue_sku: 1, today_sku: 0, soon_sku: -DUE_SOON_DAYS}
+    assert list(items.index) == [overdue_sku, today_sku, soon_sku]
+    
+    assert overdue.get_due_buckets().to_dict("records") == [
+        {"username": "user1", "overdue": 1, "due_today": 1, "due_soon": 1}
+    ]
+    assert overdue.last_scan()["as_of"] == TODAY.isoformat()
+
+def test_scan_is_relative_to_the_given_day(db):
+    [sku] = add_items(db, [0])
+    
+    overdue.scan_due_dates(TODAY + datetime.timedelta(days=1))
+    assert buckets(db) == {sku: "overdue"}
+    overdue.scan_due_dates(TODAY - datetime.timedelta(days=DUE_SOON_DAYS + 1))
+    assert buckets(db) == {}
+
+def test_returned_rescheduled_and_deleted_items_leave_the_buckets(db):
+    returned, rescheduled, deleted, kept = add_items(db, [-2, -1, 0, 1])
+    overdue.scan_due_dates()
+    
+    db.return_items([{"sku": returned, "status": "In Stock", "notes": None}], day(0))
+    db.update_equipment(rescheduled, due_date=day(30))
+    with db.transaction("equipment") as conn:
+        conn.execute("DELETE FROM equipment WHERE sku = ?", (deleted,))
+    
+    assert buckets(db) == {kept: "due_soon"}
+    assert bucket_counts(db) == {("user1", "due_soon"): 1}
+
+def test_checkouts_are_placed_without_waiting_for_a_scan(db):
+    overdue.scan_due_dates()
+    
+    # Checked out, moved between buckets and passed to another holder
+    # after the scan
+    late, soon, reassigned = add_items(db, [-1, 2, 1])
+    db.update_equipment(soon, due_date=day(0))
+    db.update_equipment(reassigned, checked_out_by="user2")
+    
+    assert buckets(db) == {late: "overdue", soon: "due_today", reassigned: "due_soon"}
+    assert bucket_counts(db) == {("user1", "overdue"): 1, ("user1", "due_today"): 1, ("user2", "due_soon"): 1}
+    
+    # What the next scan finds is what the triggers already show
+    placed = (buckets(db), bucket_counts(db))
+    overdue.scan_due_dates()
+    assert (buckets(db), bucket_counts(db)) == placed
+
+def test_nothing_is_placed_before_the_first_scan(db):
+    add_items(db, [-1])
+    assert buckets(db) == {}
+
+def test_failed_scan_is_logged_and_the_scanner_keeps_going(db, monkeypatch, caplog):
+    calls = []
+    
+    def failing_scan():
+        calls.append(1)
+        if len(calls) == 2:
+            overdue._scanner_stop.set()
+        raise RuntimeError("database is locked")
+    
+    monkeypatch.setattr(overdue, "scan_due_dates", failing_scan)
+    try:
+        with caplog.at_level(logging.ERROR, logger=overdue.__name__):
+            overdue._scanner_loop(0)
+    finally:
+        overdue._scanner_stop.clear()
+    
+    assert len(calls) == 2
+    assert [record.getMessage() for record in caplog.records] == ["Overdue scan failed"] * 2
+    assert "database is locked" in caplog.records[0].exc_text
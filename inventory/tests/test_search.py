@@ -0,0 +1,63 @@
+import pytest
+
+def add_items(db, names):
+    """Add one in-stock item per name and get their SKUs"""
+    with db.transaction("equipment"):
+        return [db.add_equipment({"name": name, "status": "In Stock"}) for name in names]
+
+def all_pages(search, limit=7):
+    """Follow the cursors of a search to the end and get every SKU found"""
+    skus = []
+    cursor = None
+    while True:
+        page = search(cursor, limit)
+        if page.empty:
+            return skus
+        skus.extend(page["sku"])
+        cursor = page["cursor"].iloc[-1]
+
+@pytest.fixture
+def items(db, monkeypatch):
+    # A low bound makes "Scope" too common to rank in a small table
+    monkeypatch.setattr(db, "SEARCH_RANK_LIMIT", 10)
+    names = [f"Scope {i}" for i in range(30)] + ["Zeiss Scope", "Zeiss Scope Zeiss", "Zeiss Centrifuge"]
+    return dict(zip(names, add_items(db, names)))
+
+def test_selective_terms_are_ranked(db, items):
+    results = db.search_equipment("zeiss")
+    assert set(results["sku"]) == {items["Zeiss Scope"], items["Zeiss Scope Zeiss"], items["Zeiss Centrifuge"]}
+    assert results["rank"].is_monotonic_increasing
+    # The name with the word twice ranks first
+    assert results["sku"].iloc[0] == items["Zeiss Scope Zeiss"]
+    assert "«Zeiss»" in results["match"].iloc[0]
+
+def test_common_words_filter_but_do_not_rank(db, items):
+    results = db.search_equipment("scope zeiss")
+    assert set(results["sku"]) == {items["Zeiss Scope"], items["Zeiss Scope Zeiss"]}
+    assert results["rank"].notna().all()
+
+def test_common_terms_are_listed_in_table_order(db, items):
+    results = db.search_equipment("scope")
+    assert results["rank"].isna().all()
+    assert list(results["sku"]) == sorted(results["sku"])
+
+@pytest.mark.parametrize("term", ["zeiss", "scope", "scope zeiss"])
+def test_cursor_pages_through_every_match_once(db, items, term):
+    skus = all_pages(lambda cursor, limit: db.search_equipment(term, after=cursor, limit=limit))
+    expected = {sku for name, sku in items.items() if all(word in name.lower() for word in term.split())}
+    assert sorted(skus) == sorted(expected)
+
+def test_filters_apply_before_paging(db, items):
+    db.update_equipment(items["Scope 3"], status="Maintenance")
+    results = db.search_equipment("scope", statuses=["Maintenance"])
+    assert list(results["sku"]) == [items["Scope 3"]]
+
+def test_users_are_searched_the_same_way(db):
+    results = db.search_users("admin")
+    assert list(results["username"]) == ["admin"]
+    assert db.search_users("admin", after=results["cursor"].iloc[-1]).empty
+
+def test_short_terms_are_rejected(db):
+    assert db.full_text_query("ab") is None
+    with pytest.raises(ValueError):
+        db.search_equipment("ab")
@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+import functools
+import pytest
+from streamlit.runtime.scriptrunner import RerunData
+from streamlit.testing.v1 import AppTest, local_script_runner
+
+from conftest import APP_DIR
+from inventory.utils import database, overdue, email_outbox
+
+def all_report_tabs():
+    """The Reports page as it was before sections: every report in a tab"""
+    import streamlit as st
+    from inventory.utils.database import begin_request
+    from inventory.app.pages import reports
+    
+    begin_request()
+    st.title("Reports")
+    tabs = st.tabs(["Equipment Status", "Checkout History", "User Activity", "Overdue Items", "Utilization"])
+    reports_in_tabs = [
+        reports.equipment_status_report,
+        reports.checkout_history_report,
+        reports.user_activity_report,
+        reports.overdue_items_report,
+        reports.utilization_report,
+    ]
+    for tab, report in zip(tabs, reports_in_tabs):
+        with tab:
+            report()
+
+def one_report(name):
+    """What a fragment rerun of one report section runs"""
+    from inventory.utils.database import begin_request
+    from inventory.app.pages import reports
+    
+    begin_request()
+    getattr(reports, name)()
+
+@pytest.fixture
+def statements(sample_data, monkeypatch):
+    """Count the SQL statements run on pooled connections"""
+    counter = {"count": 0}
+    lock = threading.Lock()
+    open_connection = database._open_connection
+    
+    def traced():
+        conn = open_connection()
+        
+        def count(statement):
+            with lock:
+                counter["count"] += 1
+        
+        conn.set_trace_callback(count)
+        return conn
+    
+    # Reopen the pool with traced connections, and keep the background
+    # workers from adding their own statements
+    database.close_db_connections()
+    monkeypatch.setattr(database, "_open_connection", traced)
+    monkeypatch.setattr(overdue, "start_overdue_scanner", lambda: None)
+    monkeypatch.setattr(email_outbox, "start_email_worker", lambda: None)
+    return counter
+
+def measure(app, statements, runs=3):
+    """Rerun ``app`` with a warm cache and get the fewest statements and seconds"""
+    app.run()
+    assert not app.exception, app.exception[0].value
+    
+    best_count = best_time = None
+    for _ in range(runs):
+        before = statements["count"]
+        start = time.perf_counter()
+        app.run()
+        elapsed = time.perf_counter() - start
+        count = statements["count"] - before
+        best_count = count if best_count is None else min(best_count, count)
+        best_time = elapsed if best_time is None else min(best_time, elapsed)
+    return best_count, best_time
+
+def test_reports_rerun_runs_only_the_selected_section(statements):
+    app = AppTest.from_file(os.path.join(APP_DIR, "app.py"), default_timeout=120)
+    app.session_state.authenticated = True
+    app.session_state.username = "admin"
+    app.session_state.user_role = "admin"
+    app.session_state["reports_section"] = "Equipment Status"
+    app.run()
+    app.sidebar.radio[0].set_value("Reports")
+    page_count, page_time = measure(app, statements)
+    headings = [subheader.value for subheader in app.subheader]
+    assert "Equipment Status Report" in headings
+    assert "Checkout History Report" not in headings
+    
+    tabs = AppTest.from_function(all_report_tabs, default_timeout=120)
+    tabs.session_state.user_role = "admin"
+    tabs_count, tabs_time = measure(tabs, statements)
+    
+    section = AppTest.from_function(one_report, args=("equipment_status_report",), default_timeout=120)
+    section_count, section_time = measure(section, statements)
+    
+    print(
+        f"\nReports rerun: all tabs {tabs_count} statements / {tabs_time * 1e3:.0f} ms, "
+        f"page with sections {page_count} / {page_time * 1e3:.0f} ms, "
+        f"section alone {section_count} / {section_time * 1e3:.0f} ms"
+    )
+    # A rerun of the page only runs the statements of the selected section,
+    # far fewer than drawing every report did
+    assert page_count == section_count
+    assert page_count < tabs_count
+
+def counted_sections():
+    """A page of two sections that count their runs and each have a button"""
+    import streamlit as st
+    from inventory.app.sections import show_sections
+    
+    runs = st.session_state.setdefault("runs", {"page": 0, "First": 0, "Second": 0})
+    runs["page"] += 1
+    
+    def section(name):
+        def draw():
+            runs[name] += 1
+            if st.button("Refresh", key=f"{name}_refresh"):
+                st.session_state.clicked = name
+        return draw
+    
+    show_sections("counted", {"First": section("First"), "Second": section("Second")})
+
+def test_widget_in_a_section_reruns_only_that_section(monkeypatch):
+    app = AppTest.from_function(counted_sections)
+    app.run()
+    assert app.session_state.runs == {"page": 1, "First": 1, "Second": 0}
+    
+    # The selected section is the only fragment. AppTest always reruns the
+    # whole script, so a click is sent as the browser would send it: as a
+    # rerun of that fragment alone.
+    [fragment_id] = list(app._fragment_storage._fragments)
+    monkeypatch.setattr(local_script_runner, "RerunData", functools.partial(RerunData, fragment_id_queue=[fragment_id]))
+    app.button(key="First_refresh").click().run()
+    
+    assert not app.exception, app.exception[0].value
+    assert app.session_state.clicked == "First"
+    assert app.session_state.runs == {"page": 1, "First": 2, "Second": 0}
@@ -0,0 +1,154 @@
+import sqlite3
+import threading
+from streamlit.testing.v1 import AppTest
+
+# Column subsets of equipment, each cached as its own entry
+PROJECTIONS = [["sku"], ["sku", "name"], ["sku", "status"], ["sku", "category"], ["sku", "location"]]
+
+def add_items(db, count):
+    with db.transaction("equipment"):
+        return [db.add_equipment({"name": f"Item {i}", "status": "In Stock"}) for i in range(count)]
+
+def external_write(db, sql, params=(), table="equipment"):
+    """Write through a connection of its own, as another process would with this module"""
+    conn = sqlite3.connect(db.DB_FILE, isolation_level=None)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute(sql, params)
+        conn.execute("UPDATE table_versions SET version = version + 1 WHERE name = ?", (table,))
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+
+def test_cache_is_bounded_by_entries(db, monkeypatch):
+    monkeypatch.setattr(db, "DATA_CACHE_MAX_ENTRIES", 3)
+    add_items(db, 10)
+    db.clear_data_cache()
+    before = db.cache_stats()
+    
+    for columns in PROJECTIONS:
+        db.get_equipment(columns=columns)
+    stats = db.cache_stats()
+    assert stats["entries"] == 3
+    assert stats["evictions"] - before["evictions"] == 2
+    
+    # The least recently used entries went first
+    db.get_equipment(columns=PROJECTIONS[-1])
+    assert db.cache_stats()["hits"] == stats["hits"] + 1
+    db.get_equipment(columns=PROJECTIONS[0])
+    assert db.cache_stats()["misses"] == stats["misses"] + 1
+
+def test_cache_is_bounded_by_bytes(db, monkeypatch):
+    add_items(db, 200)
+    db.clear_data_cache()
+    db.get_equipment()
+    size = db.cache_stats()["bytes"]
+    db.clear_data_cache()
+    
+    # Room for one full read and the SKU column, but not two full reads
+    monkeypatch.setattr(db, "DATA_CACHE_MAX_BYTES", int(size * 1.5))
+    full = db.get_equipment()
+    db.get_equipment(columns=["sku"])
+    assert db.cache_stats()["entries"] == 2
+    db.cached_query(("equipment",), "copy", (), full.copy)
+    stats = db.cache_stats()
+    assert stats["bytes"] <= db.DATA_CACHE_MAX_BYTES
+    # The full read was the least recently used, so it made room
+    assert stats["entries"] == 2
+    db.get_equipment(columns=["sku"])
+    assert db.cache_stats()["hits"] == stats["hits"] + 1
+    
+    # A read larger than the whole cache is returned but not kept
+    monkeypatch.setattr(db, "DATA_CACHE_MAX_BYTES", size // 2)
+    db.clear_data_cache()
+    assert len(db.get_equipment()) == 200
+    assert db.cache_stats()["entries"] == 0
+
+def test_write_on_another_thread_invalidates(db):
+    skus = add_items(db, 3)
+    assert set(db.get_equipment()["status"]) == {"In Stock"}
+    
+    writer = threading.Thread(target=db.update_equipment, args=(skus[0],), kwargs={"status": "Under Maintenance"})
+    writer.start()
+    writer.join()
+    
+    assert db.get_equipment().set_index("sku").loc[skus[0], "status"] == "Under Maintenance"
+
+def test_write_by_another_connection_invalidates(db):
+    skus = add_items(db, 3)
+    users = db.get_users()
+    assert set(db.get_equipment()["status"]) == {"In Stock"}
+    hits = db.cache_stats()["hits"]
+    
+    external_write(db, "UPDATE equipment SET status = 'Lost/Missing' WHERE sku = ?", (skus[1],))
+    
+    assert db.get_equipment().set_index("sku").loc[skus[1], "status"] == "Lost/Missing"
+    # Tables the other connection did not write stay cached
+    assert db.get_users().equals(users)
+    assert db.cache_stats()["hits"] == hits + 1
+
+def test_write_right_after_own_commit_is_not_missed(db, monkeypatch):
+    skus = add_items(db, 3)
+    db.get_equipment()
+    tables_changed = db._tables_changed
+    
+    def commit_then_external_write(versions, skus_written=None):
+        # Another process commits between this commit and its bookkeeping
+        external_write(db, "UPDATE equipment SET location = 'Annex' WHERE sku = ?", (skus[2],))
+        tables_changed(versions, skus_written)
+    
+    monkeypatch.setattr(db, "_tables_changed", commit_then_external_write)
+    db.update_equipment(skus[0], location="Room 1")
+    
+    locations = db.get_equipment().set_index("sku")["location"]
+    assert (locations[skus[0]], locations[skus[2]]) == ("Room 1", "Annex")
+    # Neither can the equipment index mistake the other write for none
+    assert db.equipment_changes_since(db.table_version("equipment") - 2) is None
+
+def both_cart_forms():
+    """Draw the checkout and return carts in one request, each on its own index"""
+    import streamlit as st
+    from inventory.utils.database import begin_request, clear_data_cache, request_stats
+    from inventory.utils.equipment_index import EquipmentIndex
+    from inventory.app import cart
+    
+    clear_data_cache()
+    begin_request()
+    for form in (cart.checkout_cart_form, cart.return_cart_form):
+        index = EquipmentIndex()
+        index.refresh()
+        form(index)
+    st.session_state.request_stats = request_stats()
+
+def test_request_scope_shares_reads_between_renders(db):
+    add_items(db, 5)
+    app = AppTest.from_function(both_cart_forms, default_timeout=30)
+    app.session_state.username = "admin"
+    app.session_state.user_role = "admin"
+    app.run()
+    assert not app.exception, app.exception[0].value
+    
+    # Both indexes read the same equipment columns; the second read, with
+    # the cache cleared, came from the first one
+    assert app.session_state.request_stats == {"calls": 3, "queries": 2, "shared": 1, "saved": 1}
+
+def test_request_scope_cuts_column_subsets_from_full_reads(db):
+    add_items(db, 5)
+    db.clear_data_cache()
+    
+    db.begin_request()
+    full = db.get_equipment()
+    names = db.get_equipment(columns=["sku", "name"])
+    assert names.equals(full[["sku", "name"]])
+    assert db.request_stats() == {"calls": 2, "queries": 1, "shared": 1, "saved": 1}
+    
+    # A write in the middle of the request is seen by the next read
+    add_items(db, 1)
+    assert len(db.get_equipment(columns=["sku", "name"])) == 6
+    assert db.request_stats()["queries"] == 2
+    
+    # A new request starts with no reads of its own, but the shared cache
+    # still answers without SQL
+    db.begin_request()
+    db.get_equipment(columns=["sku", "name"])
+    assert db.request_stats() == {"calls": 1, "queries": 0, "shared": 0, "saved": 1}
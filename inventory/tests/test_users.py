@@ -0,0 +1,54 @@
+from streamlit.testing.v1 import AppTest
+
+def add_user_page():
+    from inventory.app.pages.users import add_user_form
+    
+    add_user_form()
+
+def delete_user_page(username):
+    from inventory.app.pages.users import delete_user
+    
+    delete_user(username)
+
+def submit_new_user(username, password="secret1"):
+    """Fill in and submit the add user form, and get the app after the rerun"""
+    app = AppTest.from_function(add_user_page, default_timeout=30)
+    app.run()
+    for label, value in (("Username", username), ("Name", "Alice A"), ("Email", "alice@lab.org"), ("Department", "Physics")):
+        next(field for field in app.text_input if field.label == label).input(value)
+    for label in ("Password", "Confirm Password"):
+        next(field for field in app.text_input if field.label == label).input(password)
+    app.button[0].click().run()
+    assert not app.exception, app.exception[0].value
+    return app
+
+def test_added_user_can_log_in(db):
+    app = submit_new_user("alice")
+    assert [message.value for message in app.success] == ["User 'alice' added successfully!"]
+    
+    user = db.get_user("alice")
+    # Stored as the hash the login compares against
+    assert user["password"] == db.hash_password("secret1")
+    assert (user["name"], user["email"], user["department"]) == ("Alice A", "alice@lab.org", "Physics")
+    assert len(db.search_users("alice")) == 1
+
+def test_existing_username_is_rejected(db):
+    password = db.get_user("admin")["password"]
+    app = submit_new_user("admin")
+    assert [message.value for message in app.error] == ["Username 'admin' already exists."]
+    assert db.get_user("admin")["password"] == password
+
+def test_deleting_a_user_returns_their_equipment(db):
+    submit_new_user("alice")
+    with db.transaction("equipment"):
+        skus = [db.add_equipment({"name": f"Item {i}", "status": "In Stock"}) for i in range(3)]
+    db.checkout_items(skus[:2], "alice", "2026-10-01", "2026-10-08")
+    assert list(db.get_items_held_by("alice")["sku"]) == skus[:2]
+    
+    app = AppTest.from_function(delete_user_page, args=("alice",), default_timeout=30)
+    app.run()
+    assert not app.exception, app.exception[0].value
+    
+    assert db.get_user("alice") is None
+    assert db.get_items_held_by("alice").empty
+    assert set(db.get_equipment_by_skus(skus)["status"]) == {"In Stock"}